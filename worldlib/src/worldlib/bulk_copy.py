@@ -0,0 +1,146 @@
+# Software License Agreement (BSD License)
+#
+# Copyright (c) 2013, Willow Garage, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above
+# copyright notice, this list of conditions and the following
+# disclaimer in the documentation and/or other materials provided
+# with the distribution.
+# * Neither the name of Willow Garage, Inc. nor the names of its
+# contributors may be used to endorse or promote products derived
+# from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Functions to bulk load rows into PostgreSQL with COPY, which is much faster than multi-row inserts
+for large batches (e.g., when importing a snapshot). COPY cannot return the ids of the new rows,
+so they are reserved from the sequence of the table first and loaded with the rows.
+
+@author:  Jihoon Lee
+@version: October 16, 2026
+'''
+
+import datetime
+from cStringIO import StringIO
+
+# the escapes of the COPY text format
+_escapes = [('\\', '\\\\'), ('\n', '\\n'), ('\r', '\\r'), ('\t', '\\t')]
+
+def reserve_ids(cur, sequence, count):
+    '''
+    Reserve the given number of ids from a sequence.
+
+    @param cur: the cursor to use
+    @type  cur: Cursor
+    @param sequence: the name of the sequence
+    @type  sequence: string
+    @param count: the number of ids to reserve
+    @type  count: int
+    @return: the reserved ids
+    @rtype:  list
+    '''
+    cur.execute("""SELECT nextval(%s) FROM generate_series(1, %s)""", (sequence, count))
+    return [r[0] for r in cur.fetchall()]
+
+def copy_rows(cur, table, cols, rows, timestamps=()):
+    '''
+    Load rows into a table with a single COPY. Lists are loaded as arrays and the values of
+    timestamp columns are given as unix time.
+
+    @param cur: the cursor to use
+    @type  cur: Cursor
+    @param table: the name of the table
+    @type  table: string
+    @param cols: the names of the columns of the rows
+    @type  cols: list
+    @param rows: the value tuples of the rows, with None for NULL
+    @type  rows: list
+    @param timestamps: the names of the timestamp columns
+    @type  timestamps: list
+    '''
+    stamped = [c in timestamps for c in cols]
+    buff = StringIO()
+    for row in rows:
+        fields = [_timestamp(v) if s and v is not None else v for s, v in zip(stamped, row)]
+        buff.write('\t'.join([_field(v) for v in fields]) + '\n')
+    buff.seek(0)
+    cur.copy_expert("""COPY """ + table + """ (""" + ', '.join(cols) + """) FROM STDIN""", buff)
+
+def _timestamp(value):
+    '''
+    Convert a unix time to a timestamp which PostgreSQL can read.
+
+    @param value: the unix time
+    @type  value: float
+    @return: the UTC timestamp
+    @rtype:  string
+    '''
+    return datetime.datetime.utcfromtimestamp(value).isoformat() + '+00'
+
+def _field(value):
+    '''
+    Convert a value to a field of the COPY text format.
+
+    @param value: the value
+    @type  value: object
+    @return: the field
+    @rtype:  string
+    '''
+    if value is None:
+        return '\\N'
+    if isinstance(value, (list, tuple)):
+        value = '{' + ','.join([_element(v) for v in value]) + '}'
+    else:
+        value = _text(value)
+    for c, escape in _escapes:
+        value = value.replace(c, escape)
+    return value
+
+def _element(value):
+    '''
+    Convert a value to an element of an array literal.
+
+    @param value: the value
+    @type  value: object
+    @return: the quoted element
+    @rtype:  string
+    '''
+    if value is None:
+        return 'NULL'
+    return '"' + _text(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+def _text(value):
+    '''
+    Convert a scalar value to its text representation.
+
+    @param value: the value
+    @type  value: object
+    @return: the text
+    @rtype:  string
+    '''
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    elif isinstance(value, float):
+        return repr(value)
+    elif isinstance(value, unicode):
+        return value.encode('utf-8')
+    return str(value)
@@ -0,0 +1,170 @@
+# Software License Agreement (BSD License)
+#
+# Copyright (c) 2013, Willow Garage, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above
+# copyright notice, this list of conditions and the following
+# disclaimer in the documentation and/or other materials provided
+# with the distribution.
+# * Neither the name of Willow Garage, Inc. nor the names of its
+# contributors may be used to endorse or promote products derived
+# from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+'''
+The ChangeListener class listens for the notifications sent by the triggers on the world object
+instance tables. Each notification names the operation, the instance_id and the tags of the
+changed instance (and, for updates, its tags before the change), so that changes made by any
+writer of the database can be followed without polling.
+
+@author:  Jihoon Lee
+@version: October 16, 2026
+'''
+
+import rospy
+import json
+import psycopg2
+import select
+import threading
+import time
+from worldlib.connection_pool import split_host
+
+class ChangeListener(object):
+    '''
+    The main ChangeListener object which receives change notifications on a background thread.
+    '''
+
+    # the channel the world object instance triggers notify on
+    CHANNEL = 'world_object_instance_changes'
+    # operations reported in the notifications
+    CREATED = 'INSERT'
+    UPDATED = 'UPDATE'
+    REMOVED = 'DELETE'
+
+    def __init__(self, user, pwd, host, cb, retry_interval=5.0, on_reconnect=None):
+        '''
+        Creates the ChangeListener object and starts listening. The callback is called on the
+        listener thread with a list of (operation, instance_id, tags, old_tags) tuples for each
+        batch of notifications received, where old_tags are the tags before an update (None for
+        other operations).
+        
+        @param user: the database username
+        @type  user: string
+        @param pwd: the database password
+        @type  pwd: string
+        @param host: the database hostname
+        @type  host: string
+        @param cb: the function to call with the changes
+        @type  cb: function
+        @param retry_interval: seconds to wait before reconnecting after the connection is lost
+        @type  retry_interval: float
+        @param on_reconnect: if given, the function to call on the listener thread once the
+                             connection is re-opened, since changes made while it was down were
+                             missed
+        @type  on_reconnect: function
+        '''
+        self._user = user
+        self._pwd = pwd
+        self._host = host
+        self._cb = cb
+        self._retry_interval = retry_interval
+        self._on_reconnect = on_reconnect
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='change_listener')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        '''
+        Stop listening. The listener thread exits within a second.
+        '''
+        self._running = False
+
+    def _run(self):
+        '''
+        The main loop of the listener thread. The connection is re-opened if it is lost, but any
+        notifications sent while it was down are missed, which the owner is told of through
+        on_reconnect.
+        '''
+        connected = False
+        while self._running:
+            conn = None
+            try:
+                host, port = split_host(self._host)
+                conn = psycopg2.connect(database='world_model', user=self._user, 
+                                        password=self._pwd, host=host, port=port)
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                cur = conn.cursor()
+                cur.execute("""LISTEN """ + self.CHANNEL)
+                cur.close()
+                if connected and self._on_reconnect is not None:
+                    self._call(self._on_reconnect)
+                connected = True
+                while self._running:
+                    # wake up regularly to check if we should stop
+                    if select.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    changes = []
+                    while conn.notifies:
+                        changes.append(self._parse(conn.notifies.pop(0).payload))
+                    if len(changes) > 0:
+                        self._call(self._cb, changes)
+            except Exception as e:
+                rospy.logwarn('World model change listener failed: ' + str(e))
+                time.sleep(self._retry_interval)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+    def _call(self, cb, *args):
+        '''
+        Call one of the callbacks of the owner. Its errors are logged rather than treated as a
+        lost connection, so they cannot cause notifications to be missed.
+        
+        @param cb: the function to call
+        @type  cb: function
+        @param args: the arguments to call it with
+        @type  args: tuple
+        '''
+        try:
+            cb(*args)
+        except Exception as e:
+            rospy.logerr('World model change callback failed: ' + str(e))
+
+    def _parse(self, payload):
+        '''
+        Parse the payload of a notification.
+        
+        @param payload: the JSON payload sent by the trigger
+        @type  payload: string
+        @return: the operation, instance_id, tags and tags before an update of the change
+        @rtype: tuple
+        '''
+        change = json.loads(payload)
+        old_tags = change.get('old_tags')
+        if change['op'] == self.UPDATED and old_tags is None:
+            old_tags = []
+        return (change['op'], change['instance_id'], change['tags'] or [], old_tags)
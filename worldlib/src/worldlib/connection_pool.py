@@ -0,0 +1,341 @@
+# Software License Agreement (BSD License)
+#
+# Copyright (c) 2013, Willow Garage, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above
+# copyright notice, this list of conditions and the following
+# disclaimer in the documentation and/or other materials provided
+# with the distribution.
+# * Neither the name of Willow Garage, Inc. nor the names of its
+# contributors may be used to endorse or promote products derived
+# from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+'''
+The ConnectionPool class provides a thread-safe pool of connections to the PostgreSQL World Model
+database. A single pool can be shared between the worldlib connection classes so that concurrent
+requests are not serialized on a single connection. The pool also holds the StatementCache of the
+statements prepared on its connections, and the optional Metrics object which times the statements
+run on them. Hosts may be given as 'hostname' or 'hostname:port'.
+
+@author:  Jihoon Lee
+@version: October 16, 2026
+'''
+
+import psycopg2
+import threading
+import time
+from contextlib import contextmanager
+from worldlib.statement_cache import StatementCache
+
+def split_host(host):
+    '''
+    Split a host given as 'hostname' or 'hostname:port' into its hostname and port.
+
+    @param host: the host
+    @type  host: string
+    @return: the hostname and the port (None for the default port)
+    @rtype:  tuple
+    '''
+    if ':' in host:
+        hostname, port = host.rsplit(':', 1)
+        return (hostname, int(port))
+    return (host, None)
+
+class PoolTimeoutError(psycopg2.OperationalError):
+    '''
+    Raised when no connection of the pool became free in time. Unlike other operational errors,
+    this does not mean that the database cannot be reached.
+    '''
+    pass
+
+class ConnectionPool(object):
+    '''
+    The main ConnectionPool object which manages a bounded set of connections to the PostgreSQL
+    World Model database.
+    '''
+
+    def __init__(self, user, pwd, host='localhost', min_size=1, max_size=8, timeout=30.0,
+                 health_check_interval=30.0, max_statements=64, metrics=None,
+                 connect_timeout=None):
+        '''
+        Creates the ConnectionPool object and opens the minimum number of connections.
+
+        @param user: the database username
+        @type  user: string
+        @param pwd: the database password
+        @type  pwd: string
+        @param host: the database hostname (and port, e.g., 'localhost:5433')
+        @type  host: string
+        @param min_size: the number of connections to keep open at all times
+        @type  min_size: int
+        @param max_size: the maximum number of connections to open at once
+        @type  max_size: int
+        @param timeout: the number of seconds to wait for a free connection (None waits forever)
+        @type  timeout: float
+        @param health_check_interval: idle connections older than this many seconds are checked
+                                      before being handed out
+        @type  health_check_interval: float
+        @param max_statements: the maximum number of statements prepared on each connection (0 to
+                               never prepare statements)
+        @type  max_statements: int
+        @param metrics: the Metrics object to time statements and connection waits with (None to
+                        disable)
+        @type  metrics: Metrics
+        @param connect_timeout: the number of seconds to wait for a new connection to be opened
+                                (None to use the default of the client)
+        @type  connect_timeout: int
+        '''
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError('Invalid pool size: min=' + str(min_size) + ', max=' + str(max_size))
+        # name of the database
+        self._db = 'world_model'
+        self._user = user
+        self._pwd = pwd
+        self._host, self._port = split_host(host)
+        self.connect_timeout = connect_timeout
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        # statements shared by all users of the pool, prepared on each connection as it needs them
+        self.statements = StatementCache(max_statements)
+        self.metrics = metrics
+        # idle connections as (connection, last used time) pairs
+        self._idle = []
+        # number of connections currently open (idle or in use)
+        self._size = 0
+        self._closed = False
+        # guards the idle list and size
+        self._cond = threading.Condition(threading.Lock())
+        # open the minimum number of connections
+        with self._cond:
+            for i in range(min_size):
+                self._idle.append((self._connect(), time.time()))
+                self._size += 1
+
+    @contextmanager
+    def connection(self, write=True):
+        '''
+        Context manager which checks out a connection for the duration of the block. Any open
+        transaction is rolled back if the block raises an exception, and connections which have
+        been dropped by the server are discarded so that a fresh one is opened on the next request.
+        Callers are responsible for committing their own work.
+
+        @param write: if the block may write (ignored, every connection of the pool can write)
+        @type  write: bool
+        @return: the checked out connection
+        @rtype:  connection
+        '''
+        start = time.time()
+        conn = self.getconn()
+        if self.metrics is not None:
+            self.metrics.observe('pool.wait', time.time() - start)
+        with self.hold(conn) as conn:
+            yield conn
+
+    @contextmanager
+    def hold(self, conn):
+        '''
+        Context manager which returns a connection checked out with getconn to the pool at the end
+        of the block, as in connection.
+
+        @param conn: the checked out connection
+        @type  conn: connection
+        @return: the connection
+        @rtype:  connection
+        '''
+        acquired = time.time()
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            # the connection is likely broken, do not hand it out again
+            self.putconn(conn, discard=True)
+            raise
+        except:
+            self._rollback(conn)
+            self.putconn(conn)
+            raise
+        else:
+            self.putconn(conn)
+        finally:
+            if self.metrics is not None:
+                self.metrics.observe('pool.hold', time.time() - acquired)
+
+    def getconn(self):
+        '''
+        Check out a connection from the pool. This will block until a connection is available if
+        the pool is at its maximum size. Idle connections are health checked before being returned
+        and are transparently replaced if they have been dropped.
+
+        @return: a healthy connection
+        @rtype:  connection
+        '''
+        deadline = None if self.timeout is None else time.time() + self.timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise psycopg2.InterfaceError('connection pool is closed')
+                if len(self._idle) > 0:
+                    conn, last_used = self._idle.pop()
+                    break
+                elif self._size < self.max_size:
+                    # reserve a slot and open the connection outside of the lock
+                    self._size += 1
+                    conn, last_used = None, None
+                    break
+                # wait for a connection to be returned
+                if deadline is None:
+                    self._cond.wait()
+                else:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        raise PoolTimeoutError('timed out waiting for a database connection')
+                    self._cond.wait(remaining)
+        try:
+            if conn is None:
+                conn = self._connect()
+            elif not self._is_healthy(conn, last_used):
+                self._close_quietly(conn)
+                conn = self._connect()
+        except:
+            # give the reserved slot back
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        return conn
+
+    def putconn(self, conn, discard=False):
+        '''
+        Return a connection to the pool.
+
+        @param conn: the connection to return
+        @type  conn: connection
+        @param discard: if the connection should be closed instead of reused
+        @type  discard: bool
+        '''
+        if not discard and not conn.closed:
+            # never hand out a connection with an open transaction
+            if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                discard = not self._rollback(conn)
+        else:
+            discard = True
+        with self._cond:
+            if discard or self._closed:
+                self._close_quietly(conn)
+                self._size -= 1
+            else:
+                self._idle.append((conn, time.time()))
+            self._cond.notify()
+
+    def close(self):
+        '''
+        Close all idle connections and prevent new connections from being checked out. Connections
+        which are currently checked out are closed when they are returned.
+        '''
+        with self._cond:
+            self._closed = True
+            for conn, last_used in self._idle:
+                self._close_quietly(conn)
+                self._size -= 1
+            self._idle = []
+            self._cond.notify_all()
+
+    def stats(self):
+        '''
+        Get the number of open and idle connections of the pool.
+
+        @return: the number of connections as 'size' and 'idle'
+        @rtype: dict
+        '''
+        with self._cond:
+            return {'size' : self._size, 'idle' : len(self._idle)}
+
+    def _connect(self):
+        '''
+        Open a new connection to the world model database.
+
+        @return: the new connection
+        @rtype:  connection
+        '''
+        args = {'database' : self._db, 'user' : self._user, 'password' : self._pwd, 
+                'host' : self._host}
+        if self._port is not None:
+            args['port'] = self._port
+        if self.connect_timeout is not None:
+            args['connect_timeout'] = self.connect_timeout
+        if self.metrics is not None:
+            args['cursor_factory'] = self.metrics.cursor_factory
+        return psycopg2.connect(**args)
+
+    def _is_healthy(self, conn, last_used):
+        '''
+        Check if the given idle connection is still usable. Connections which have been idle for
+        longer than the health check interval are pinged with a trivial query.
+
+        @param conn: the connection to check
+        @type  conn: connection
+        @param last_used: the time the connection was returned to the pool
+        @type  last_used: float
+        @return: if the connection can be used
+        @rtype:  bool
+        '''
+        if conn.closed:
+            return False
+        if time.time() - last_used < self.health_check_interval:
+            return True
+        try:
+            cur = conn.cursor()
+            cur.execute("""SELECT 1""")
+            cur.close()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _rollback(self, conn):
+        '''
+        Roll back any open transaction on the given connection.
+
+        @param conn: the connection to roll back
+        @type  conn: connection
+        @return: if the roll back was successful
+        @rtype:  bool
+        '''
+        try:
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _close_quietly(self, conn):
+        '''
+        Close the given connection, ignoring any errors.
+
+        @param conn: the connection to close
+        @type  conn: connection
+        '''
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
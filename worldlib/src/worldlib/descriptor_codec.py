@@ -0,0 +1,120 @@
+# Software License Agreement (BSD License)
+#
+# Copyright (c) 2013, Willow Garage, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above
+# copyright notice, this list of conditions and the following
+# disclaimer in the documentation and/or other materials provided
+# with the distribution.
+# * Neither the name of Willow Garage, Inc. nor the names of its
+# contributors may be used to endorse or promote products derived
+# from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Functions to compress and decompress descriptor data before it is stored in a Large Object. The
+name of the codec used is stored with each descriptor so that data written with a different codec
+(or before codecs existed) can always be read back.
+
+@author:  Jihoon Lee
+@version: October 16, 2026
+'''
+
+import bz2
+import zlib
+# LZMA is only available in the standard library for Python 3
+try:
+    import lzma
+except ImportError:
+    try:
+        from backports import lzma
+    except ImportError:
+        lzma = None
+
+# data is stored as is
+NONE = 'none'
+# data is compressed with zlib
+ZLIB = 'zlib'
+# data is compressed with bzip2
+BZ2 = 'bz2'
+# data is compressed with LZMA (requires the lzma module)
+LZMA = 'lzma'
+
+# the encode and decode functions for each codec
+_codecs = {
+           NONE : (lambda data: data, lambda data: data),
+           ZLIB : (zlib.compress, zlib.decompress),
+           BZ2 : (bz2.compress, bz2.decompress),
+           }
+if lzma is not None:
+    _codecs[LZMA] = (lzma.compress, lzma.decompress)
+
+def available_codecs():
+    '''
+    Get the names of the codecs which can be used on this system.
+
+    @return: the names of the available codecs
+    @rtype:  list
+    '''
+    return sorted(_codecs.keys())
+
+def encode(codec, data):
+    '''
+    Encode the given data with the given codec.
+
+    @param codec: the name of the codec
+    @type  codec: string
+    @param data: the raw data
+    @type  data: string
+    @return: the encoded data
+    @rtype:  string
+    '''
+    return _lookup(codec)[0](data)
+
+def decode(codec, data):
+    '''
+    Decode the given data with the given codec. Data without a codec (i.e., written before codecs
+    were introduced) is returned as is.
+
+    @param codec: the name of the codec, or None
+    @type  codec: string
+    @param data: the encoded data
+    @type  data: string
+    @return: the raw data
+    @rtype:  string
+    '''
+    if codec is None:
+        return data
+    return _lookup(codec)[1](data)
+
+def _lookup(codec):
+    '''
+    Get the encode and decode functions for the given codec.
+
+    @param codec: the name of the codec
+    @type  codec: string
+    @return: the encode and decode functions
+    @rtype:  tuple
+    '''
+    if codec not in _codecs:
+        raise ValueError('Unknown or unavailable descriptor codec "' + str(codec) + '".')
+    return _codecs[codec]
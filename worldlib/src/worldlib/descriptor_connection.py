@@ -39,8 +39,12 @@ description.
 @version: February 18, 2013
 '''
 
-import psycopg2
-import thread
+import time
+from psycopg2.extras import execute_values
+from worldlib.connection_pool import ConnectionPool
+from worldlib.bulk_copy import copy_rows, reserve_ids
+from worldlib.descriptor_digest import compute_digest
+from worldlib import descriptor_codec
 
 class DescriptorConnection(object):
     '''
@@ -48,7 +52,7 @@ class DescriptorConnection(object):
     database.
     '''
 
-    def __init__(self, user, pwd, host='localhost'):
+    def __init__(self, user, pwd, host='localhost', pool=None, codec=descriptor_codec.ZLIB):
         '''
         Creates the DescriptorConnection object and connects to the descriptors table.
         
@@ -58,113 +62,318 @@ class DescriptorConnection(object):
         @type  pwd: string
         @param host: the database hostname
         @type  host: string
+        @param pool: a shared connection pool to use instead of creating a private one
+        @type  pool: ConnectionPool
+        @param codec: the codec used to compress new data (see descriptor_codec)
+        @type  codec: string
         '''
         # name of the descriptors table
         self._descriptors = 'descriptors'
-        # name of the database
-        self._db = 'world_model'
+        # columns in the order expected by _db_to_dict, with a place holder for the data
+        self._columns = ('descriptor_id, description_id, type, %s, ref, tags, digest, codec, '
+                         'encoding')
+        # make sure the codec exists before anything is written with it
+        if codec not in descriptor_codec.available_codecs():
+            raise ValueError('Unknown or unavailable descriptor codec "' + str(codec) + '".')
+        self._codec = codec
+        # number of bytes to read from a Large Object at a time
+        self._chunk_size = 1024 * 1024
+        # number of rows, with their data, to fetch from the server at a time
+        self._fetch_size = 16
         # connect to the world model database
-        self.conn = psycopg2.connect(database=self._db, user=user, password=pwd, host=host)
-        # create a lock 
-        self.lock = thread.allocate_lock()
+        self._pool = pool if pool is not None else ConnectionPool(user, pwd, host)
 
     def insert(self, entity):
         '''
         Insert the given entity into the descriptors table. This will create a new descriptor. The 
         descriptor_id will be set to a unique value and returned. Note that any data found in the 
         data field (if any) will be stored into a Large Object and the OID will be placed in the 
-        spot of their value.
+        spot of their value. The content digest of the descriptor is computed and stored with it
+        (unless one is given), and the data is compressed with the codec of this connection.
         
         @param entity: the entity to insert with the correct keys for the columns
         @type  entity: dict
         @return: the descriptor_id
         @rtype: integer
         '''
-        # ensure the descriptor ID does not get set by the user
-        if 'descriptor_id' in entity.keys():
-            del entity['descriptor_id']
-        with self.lock:
-            # check if there is data
-            if 'data' in entity.keys():
-                # store the data in a Large Object
-                lobj = self.conn.lobject()
-                lobj.write(entity['data'])
-                self.conn.commit()
-                entity['data'] = lobj.oid
+        with self._pool.connection() as conn:
+            self._prepare(conn, entity)
             # build the SQL
             helper = self._build_sql_helper(entity)
             # create a cursor
-            cur = self.conn.cursor()
-            cur.execute("""INSERT INTO """ + self._descriptors + 
-                        """ (descriptor_id, """ + helper['cols'] + """) 
-                        VALUES (nextval('descriptors_descriptor_id_seq'), 
-                        """ + helper['holders'] + """) RETURNING descriptor_id""", helper['values'])
+            cur = conn.cursor()
+            self._pool.statements.execute(cur, (self._descriptors, 'insert') + helper['cols'], 
+                                          lambda: """INSERT INTO """ + self._descriptors + 
+                                          """ (descriptor_id, """ + ', '.join(helper['cols']) + """) 
+                                          VALUES (nextval('descriptors_descriptor_id_seq'), """ + 
+                                          ', '.join(helper['holders']) + """) 
+                                          RETURNING descriptor_id""", helper['values'])
             descriptor_id = cur.fetchone()[0]
-            self.conn.commit()
+            conn.commit()
             cur.close()
         # return the descriptor ID
         return descriptor_id
     
-    def search_by_description_id(self, description_id):
+    def insert_many(self, entities, conn=None):
+        '''
+        Insert the given entities into the descriptors table with a single multi-row statement in
+        one transaction. Data is stored and compressed as in insert. A unique descriptor_id will be
+        set for each and returned. If a connection is given, the entities are inserted with it and
+        the caller is responsible for committing them.
+        
+        @param entities: the entities to insert with the correct keys for the columns
+        @type  entities: list
+        @param conn: a checked out connection to insert with instead of one from the pool
+        @type  conn: connection
+        @return: the descriptor_ids, in the same order as the entities
+        @rtype: list
+        '''
+        if len(entities) is 0:
+            return []
+        if conn is None:
+            with self._pool.connection() as conn:
+                descriptor_ids = self.insert_many(entities, conn)
+                conn.commit()
+            return descriptor_ids
+        for e in entities:
+            self._prepare(conn, e)
+        # build the SQL, using NULL for the columns an entity does not set
+        cols = set()
+        for e in entities:
+            cols.update(e.keys())
+        cols = sorted(cols)
+        values = [tuple([e.get(c) for c in cols]) for e in entities]
+        # create a cursor
+        cur = conn.cursor()
+        rows = execute_values(cur, """INSERT INTO """ + self._descriptors + 
+                              """ (descriptor_id, """ + ', '.join(cols) + """) VALUES %s 
+                              RETURNING descriptor_id""", values, 
+                              """(nextval('descriptors_descriptor_id_seq'), """ + 
+                              ', '.join(['%s'] * len(cols)) + """)""", len(entities), True)
+        cur.close()
+        # multi-row inserts return their rows in the order of the values
+        return [r[0] for r in rows]
+
+    def copy_many(self, entities):
+        '''
+        Insert the given entities into the descriptors table with COPY in one transaction, which
+        is faster than insert_many for large batches. Data is stored and compressed as in insert.
+        A unique descriptor_id will be set for each and returned.
+        
+        @param entities: the entities to insert with the correct keys for the columns
+        @type  entities: list
+        @return: the descriptor_ids, in the same order as the entities
+        @rtype: list
+        '''
+        if len(entities) is 0:
+            return []
+        with self._pool.connection() as conn:
+            for e in entities:
+                self._prepare(conn, e)
+            cols = set()
+            for e in entities:
+                cols.update(e.keys())
+            cols = sorted(cols)
+            # create a cursor
+            cur = conn.cursor()
+            descriptor_ids = reserve_ids(cur, 'descriptors_descriptor_id_seq', len(entities))
+            copy_rows(cur, self._descriptors, ['descriptor_id'] + cols, 
+                      [(i,) + tuple([e.get(c) for c in cols]) 
+                       for i, e in zip(descriptor_ids, entities)])
+            conn.commit()
+            cur.close()
+        return descriptor_ids
+
+    def search_by_description_id(self, description_id, include_data=True):
         '''
         Search for and return all entities in the descriptors table with the given description_id, 
         if any. This will load the file and return the contents.
         
         @param description_id: the description_id to search for
         @type  description_id: int
+        @param include_data: if the contents of the data field should be loaded
+        @type  include_data: bool
         @return: the entities found
         @rtype:  list
         '''
-        final = []
-        with self.lock:
+        return self.search_by_description_ids([description_id], include_data).get(description_id, 
+                                                                                  [])
+
+    def search_by_description_ids(self, description_ids, include_data=True):
+        '''
+        Search for and return all entities in the descriptors table which belong to any of the
+        given description_ids. The rows and the contents of their Large Objects are loaded with a
+        single query, which is read through a server-side cursor a few rows at a time so that only
+        those rows are held before they are decoded. If include_data is False, only the metadata
+        is loaded and the data field will be None.
+        
+        @param description_ids: the description_ids to search for
+        @type  description_ids: list
+        @param include_data: if the contents of the data field should be loaded
+        @type  include_data: bool
+        @return: the entities found, keyed by description_id
+        @rtype:  dict
+        '''
+        final = {}
+        # do not search empty arrays
+        if len(description_ids) > 0:
+            # read the Large Objects on the server instead of opening each one
+            data = 'lo_get(data)' if include_data else 'NULL'
+            with self._pool.connection(False) as conn:
+                start = time.time()
+                size = 0
+                # create a server-side cursor
+                cur = conn.cursor('search_by_description_ids')
+                cur.itersize = self._fetch_size
+                cur.execute("""SELECT """ + (self._columns % data) + """ FROM """ + 
+                            self._descriptors + """ WHERE description_id = ANY (%s) 
+                            ORDER BY descriptor_id""", (list(description_ids),))
+                for r in cur:
+                    if r[3] is not None:
+                        size += len(r[3])
+                    entity = self._db_to_dict(r)
+                    final.setdefault(entity['description_id'], []).append(entity)
+                cur.close()
+                if include_data and self._pool.metrics is not None:
+                    self._pool.metrics.observe('lobject.read', time.time() - start, 
+                                               sum([len(v) for v in final.values()]), size)
+        return final
+
+    def search_descriptor_id(self, descriptor_id, include_data=True):
+        '''
+        Search for and return the entity in the descriptors table with the given descriptor_id, if
+        one exists. Only the Large Object of this descriptor is opened, and it is streamed in
+        chunks.
+        
+        @param descriptor_id: the descriptor_id to search for
+        @type  descriptor_id: int
+        @param include_data: if the contents of the data field should be loaded
+        @type  include_data: bool
+        @return: the entity found, or None if an invalid descriptor_id was given
+        @rtype:  dict
+        '''
+        with self._pool.connection(False) as conn:
             # create a cursor
-            cur = self.conn.cursor()
-            # check if the description actually exists
-            cur.execute("""SELECT * FROM """ + self._descriptors + 
-                        """ WHERE description_id = %s""", (description_id,))
-            # extract the values
+            cur = conn.cursor()
+            cur.execute("""SELECT """ + (self._columns % 'data') + """ FROM """ + 
+                        self._descriptors + """ WHERE descriptor_id = %s""", (descriptor_id,))
+            result = cur.fetchone()
+            cur.close()
+            if result is None:
+                return None
+            # replace the OID with the contents of the Large Object
+            data = None
+            if include_data and result[3] is not None:
+                data = self._read_large_object(conn, result[3])
+        return self._db_to_dict(result[:3] + (data,) + result[4:])
+
+    def search_digest(self, digest):
+        '''
+        Search for and return all entities in the descriptors table with the given content digest.
+        Only the metadata is loaded and the data field will be None.
+        
+        @param digest: the content digest to search for
+        @type  digest: string
+        @return: the entities found
+        @rtype:  list
+        '''
+        with self._pool.connection(False) as conn:
+            # create a cursor
+            cur = conn.cursor()
+            cur.execute("""SELECT """ + (self._columns % 'NULL') + """ FROM """ + 
+                        self._descriptors + """ WHERE digest = %s ORDER BY descriptor_id""", 
+                        (digest,))
             results = cur.fetchall()
-            for r in results:
-                # convert to a dictionary and convert the timestamps
-                final.append(self._db_to_dict(r))
             cur.close()
-        return final
+        return [self._db_to_dict(r) for r in results]
+
+    def _read_large_object(self, conn, oid):
+        '''
+        Read the contents of the given Large Object in fixed size chunks, so that no single read
+        transfers an unbounded amount of data.
+        
+        @param conn: the connection to read with
+        @type  conn: connection
+        @param oid: the OID of the Large Object
+        @type  oid: int
+        @return: the contents of the Large Object
+        @rtype: string
+        '''
+        start = time.time()
+        chunks = []
+        lobj = conn.lobject(oid, 'rb')
+        chunk = lobj.read(self._chunk_size)
+        while len(chunk) > 0:
+            chunks.append(chunk)
+            chunk = lobj.read(self._chunk_size)
+        lobj.close()
+        data = ''.join(chunks)
+        if self._pool.metrics is not None:
+            self._pool.metrics.observe('lobject.read', time.time() - start, 1, len(data))
+        return data
     
+    def _prepare(self, conn, entity):
+        '''
+        Prepare an entity for insertion. The descriptor_id is removed, the content digest is
+        computed (unless one is given), and any data is compressed and written to a new Large
+        Object whose OID takes the place of the data. The Large Object is committed along with the
+        rows inserted on the same connection.
+        
+        @param conn: the connection the entity will be inserted with
+        @type  conn: Connection
+        @param entity: the entity to prepare
+        @type  entity: dict
+        '''
+        # ensure the descriptor ID does not get set by the user
+        if 'descriptor_id' in entity.keys():
+            del entity['descriptor_id']
+        # index the contents so duplicates can be found without reading the data
+        if 'digest' not in entity.keys():
+            entity['digest'] = compute_digest(entity.get('type'), entity.get('ref'), 
+                                              entity.get('data'))
+        # check if there is data
+        if 'data' in entity.keys():
+            # store the data in a Large Object
+            start = time.time()
+            data = descriptor_codec.encode(self._codec, entity['data'])
+            lobj = conn.lobject()
+            lobj.write(data)
+            lobj.close()
+            if self._pool.metrics is not None:
+                self._pool.metrics.observe('lobject.write', time.time() - start, 1, len(data))
+            entity['data'] = lobj.oid
+            entity['codec'] = self._codec
+
     def _build_sql_helper(self, entity):
         '''
         A helper function to build the SQL for an insertion/update. This will take the entity dict
-        and create a new dict containing a string of comma separated column names, a string of
-        comma separated place holders (e.g., '%s'), and a tuple of the values.
+        and create a new dict containing a tuple of the sorted column names, a tuple of the
+        matching place holders (e.g., '%s'), and a tuple of the values. Entities which set the same
+        columns share the same statement.
         
         @param entity: the entity to build the SQL helper for
         @type  entity: dict
         @return: the dictionary containing the three helper variables
         @rtype: dict
         '''
-        final = {'cols' : '', 'holders' : '', 'values' : ()}
-        for k in entity.keys():
-            final['cols'] += k + ', '
-            final['holders'] += '%s, '
-            final['values'] += (entity[k],)
-        # remove trailing ', '
-        final['cols'] = final['cols'][:-2]
-        final['holders'] = final['holders'][:-2]
-        return final
+        cols = tuple(sorted(entity.keys()))
+        return {'cols' : cols, 'holders' : ('%s',) * len(cols), 
+                'values' : tuple([entity[c] for c in cols])}
 
     def _db_to_dict(self, entity):
         '''
-        Convert a database tuple to a dict. This function assumes the tuple is in the correct order.
-        This function will load the data in the data field.
+        Convert a database tuple to a dict. This function assumes the tuple is in the correct order
+        and that the contents of the data field have already been loaded. The data will be 
+        decompressed with the codec it was stored with.
         
         @param entity: the entity to build the dictionary for
         @type  entity: tuple
         @return: the dictionary containing the information from the database
         @rtype: dict
         '''
-        # load the data
+        # decompress the data
         if entity[3] is not None:
-            lobj = self.conn.lobject(entity[3])
-            data = lobj.read()
+            data = descriptor_codec.decode(entity[7], str(entity[3]))
         else:
             data = None
         # convert each one assuming the ordering is correct
@@ -175,5 +384,8 @@ class DescriptorConnection(object):
                 'data' : data,
                 'ref' : entity[4],
                 'tags' : entity[5],
+                'digest' : entity[6],
+                'codec' : entity[7],
+                'encoding' : entity[8],
                 }
         return final
\ No newline at end of file
@@ -0,0 +1,67 @@
+# Software License Agreement (BSD License)
+#
+# Copyright (c) 2013, Willow Garage, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above
+# copyright notice, this list of conditions and the following
+# disclaimer in the documentation and/or other materials provided
+# with the distribution.
+# * Neither the name of Willow Garage, Inc. nor the names of its
+# contributors may be used to endorse or promote products derived
+# from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Functions to compute the content digest of a descriptor. The digest is stored alongside each
+descriptor so that identical descriptors (e.g., the same map published twice) can be found with a
+single indexed lookup. This module has no database dependencies so that clients can compute the
+digest of a descriptor before sending it.
+
+@author:  Jihoon Lee
+@version: October 16, 2026
+'''
+
+import hashlib
+
+def compute_digest(type, ref, data):
+    '''
+    Compute the content digest of a descriptor from its type, reference and data. Each part is
+    length prefixed so that different splits of the same bytes do not collide.
+
+    @param type: the type of data
+    @type  type: string
+    @param ref: the JSON representation of the source reference
+    @type  ref: string
+    @param data: the raw descriptor data
+    @type  data: string
+    @return: the hex encoded SHA-1 digest
+    @rtype:  string
+    '''
+    sha = hashlib.sha1()
+    for part in (type, ref, data):
+        if part is None:
+            part = ''
+        elif isinstance(part, unicode):
+            part = part.encode('utf-8')
+        sha.update(str(len(part)) + ':')
+        sha.update(part)
+    return sha.hexdigest()
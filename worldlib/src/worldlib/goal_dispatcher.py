@@ -0,0 +1,198 @@
+# Software License Agreement (BSD License)
+#
+# Copyright (c) 2013, Willow Garage, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above
+# copyright notice, this list of conditions and the following
+# disclaimer in the documentation and/or other materials provided
+# with the distribution.
+# * Neither the name of Willow Garage, Inc. nor the names of its
+# contributors may be used to endorse or promote products derived
+# from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+'''
+The GoalDispatcher class runs action server goals on a bounded pool of worker threads. Read-only
+goals (e.g., searches) and goals which modify the world model are queued separately so that a
+burst of searches cannot delay writes, and goals are rejected once a queue is full so that latency
+stays bounded under load. If given a Metrics object, the time goals wait in the queues and the
+time taken by each goal callback are recorded.
+
+@author:  Jihoon Lee
+@version: October 16, 2026
+'''
+
+import rospy
+import threading
+import time
+import Queue
+
+class GoalDispatcher(object):
+    '''
+    The main GoalDispatcher object which accepts goals and executes them on worker threads.
+    '''
+
+    # goals are executed on a bounded pool of worker threads
+    POOL = 'pool'
+    # goals are executed directly in the action server callback
+    INLINE = 'inline'
+
+    def __init__(self, mode=POOL, read_workers=4, write_workers=2, max_queue_depth=64,
+                 metrics=None):
+        '''
+        Creates the GoalDispatcher object and starts the worker threads.
+
+        @param mode: the dispatch mode (GoalDispatcher.POOL or GoalDispatcher.INLINE)
+        @type  mode: string
+        @param read_workers: the number of threads serving read-only goals
+        @type  read_workers: int
+        @param write_workers: the number of threads serving goals which modify the world model
+        @type  write_workers: int
+        @param max_queue_depth: the number of goals which may wait in each queue before new goals
+                                are rejected (0 for no limit)
+        @type  max_queue_depth: int
+        @param metrics: the Metrics object to time goals with (None to disable)
+        @type  metrics: Metrics
+        '''
+        if mode not in [self.POOL, self.INLINE]:
+            raise ValueError('Unknown dispatch mode "' + str(mode) + '".')
+        if mode == self.POOL and (read_workers < 1 or write_workers < 1):
+            raise ValueError('At least one read and one write worker is required.')
+        self.mode = mode
+        self.metrics = metrics
+        self._reads = Queue.Queue(max_queue_depth)
+        self._writes = Queue.Queue(max_queue_depth)
+        self._lock = threading.Lock()
+        if self.mode == self.POOL:
+            for i in range(read_workers):
+                self._start_worker(self._reads, 'read')
+            for i in range(write_workers):
+                self._start_worker(self._writes, 'write')
+
+    def reader(self, cb):
+        '''
+        Wrap the given goal callback so that it is dispatched as a read-only goal.
+
+        @param cb: the goal callback which takes a ServerGoalHandle
+        @type  cb: function
+        @return: the wrapped callback to give to the action server
+        @rtype:  function
+        '''
+        return lambda gh: self.dispatch(gh, cb, False)
+
+    def writer(self, cb):
+        '''
+        Wrap the given goal callback so that it is dispatched as a goal which modifies the world
+        model.
+
+        @param cb: the goal callback which takes a ServerGoalHandle
+        @type  cb: function
+        @return: the wrapped callback to give to the action server
+        @rtype:  function
+        '''
+        return lambda gh: self.dispatch(gh, cb, True)
+
+    def dispatch(self, gh, cb, write):
+        '''
+        Accept the given goal and run the callback for it, or reject the goal if its queue is full.
+
+        @param gh: the goal handle to dispatch
+        @type  gh: ServerGoalHandle
+        @param cb: the goal callback which takes the goal handle
+        @type  cb: function
+        @param write: if the goal modifies the world model
+        @type  write: bool
+        '''
+        if self.mode == self.INLINE:
+            gh.set_accepted()
+            self._run(gh, cb)
+            return
+        queue = self._writes if write else self._reads
+        # only dispatch adds to the queues so the check cannot go stale while locked
+        with self._lock:
+            if queue.full():
+                if self.metrics is not None:
+                    self.metrics.count('queue.rejected.' + ('write' if write else 'read'))
+                rospy.logwarn('World model is overloaded, rejecting goal.')
+                gh.set_rejected(None, 'Too many pending goals.')
+                return
+            # goals must be active before a worker can finish them
+            gh.set_accepted()
+            queue.put_nowait((gh, cb, time.time()))
+
+    def queue_depths(self):
+        '''
+        Get the number of goals waiting in the read and write queues.
+
+        @return: the read and write queue depths
+        @rtype:  dict
+        '''
+        return {'read' : self._reads.qsize(), 'write' : self._writes.qsize()}
+
+    def _start_worker(self, queue, name):
+        '''
+        Start a daemon thread serving goals from the given queue.
+
+        @param queue: the queue to serve
+        @type  queue: Queue
+        @param name: the type of goals served, used to name the thread
+        @type  name: string
+        '''
+        t = threading.Thread(target=self._work, args=(queue, name), name='world_model_' + name)
+        t.daemon = True
+        t.start()
+
+    def _work(self, queue, name):
+        '''
+        The main loop for a worker thread.
+
+        @param queue: the queue to serve
+        @type  queue: Queue
+        @param name: the type of goals served
+        @type  name: string
+        '''
+        while True:
+            gh, cb, queued = queue.get()
+            if self.metrics is not None:
+                self.metrics.observe('queue.' + name, time.time() - queued)
+            self._run(gh, cb)
+            queue.task_done()
+
+    def _run(self, gh, cb):
+        '''
+        Run the callback for an accepted goal. The goal is aborted if the callback fails.
+
+        @param gh: the goal handle
+        @type  gh: ServerGoalHandle
+        @param cb: the goal callback which takes the goal handle
+        @type  cb: function
+        '''
+        start = time.time()
+        try:
+            cb(gh)
+        except Exception as e:
+            rospy.logerr('World model goal failed: ' + str(e))
+            gh.set_aborted(None, str(e))
+            if self.metrics is not None:
+                self.metrics.count('action.failed.' + getattr(cb, '__name__', 'goal'))
+        if self.metrics is not None:
+            self.metrics.observe('action.' + getattr(cb, '__name__', 'goal'), time.time() - start)
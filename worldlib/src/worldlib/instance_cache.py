@@ -0,0 +1,321 @@
+# Software License Agreement (BSD License)
+#
+# Copyright (c) 2013, Willow Garage, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above
+# copyright notice, this list of conditions and the following
+# disclaimer in the documentation and/or other materials provided
+# with the distribution.
+# * Neither the name of Willow Garage, Inc. nor the names of its
+# contributors may be used to endorse or promote products derived
+# from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+'''
+The InstanceCache class keeps a bounded, in-memory copy of recently used world object instances
+along with an inverted index from each tag to the instances that contain it. Tag searches that
+were answered by the database once are remembered as complete so that repeating them can be
+served from memory. The owner is expected to put, evict and remove instances whenever it changes
+them in the database. Updated instances are evicted rather than merged, since concurrent writers
+may reach the cache in a different order than they committed.
+
+@author:  Jihoon Lee
+@version: October 16, 2026
+'''
+
+import threading
+from collections import OrderedDict
+
+class InstanceCache(object):
+    '''
+    The main InstanceCache object which holds instances by instance_id in least recently used
+    order.
+    '''
+
+    def __init__(self, max_size=1024, max_searches=256):
+        '''
+        Creates the InstanceCache object.
+        
+        @param max_size: the maximum number of instances to hold
+        @type  max_size: int
+        @param max_searches: the maximum number of complete tag searches to remember
+        @type  max_searches: int
+        '''
+        self._max_size = max_size
+        self._max_searches = max_searches
+        # instance_id -> (tags, value) in least recently used order
+        self._entries = OrderedDict()
+        # tag -> set of cached instance_ids
+        self._index = {}
+        # tag sets whose matching instances are all cached, in least recently used order
+        self._searches = OrderedDict()
+        # bumped on every change so that stale search results are not installed
+        self._version = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def version(self):
+        '''
+        Get the current version of the cache. This should be read before searching the database
+        and given back to put_search.
+        
+        @return: the current version
+        @rtype: int
+        '''
+        with self._lock:
+            return self._version
+
+    def get(self, instance_id):
+        '''
+        Get the cached value of an instance.
+        
+        @param instance_id: the instance_id of the instance
+        @type  instance_id: int
+        @return: the cached value, or None if the instance is not cached
+        @rtype: object
+        '''
+        with self._lock:
+            if instance_id not in self._entries:
+                self._misses += 1
+                return None
+            self._hits += 1
+            return self._touch(instance_id)[1]
+
+    def peek(self, instance_id):
+        '''
+        Get the cached value of an instance without counting a hit or miss or changing its place
+        in the least recently used order.
+        
+        @param instance_id: the instance_id of the instance
+        @type  instance_id: int
+        @return: the cached value, or None if the instance is not cached
+        @rtype: object
+        '''
+        with self._lock:
+            entry = self._entries.get(instance_id)
+            return None if entry is None else entry[1]
+
+    def get_search(self, tags):
+        '''
+        Get the cached values of all instances that contain the given list of tags.
+        
+        @param tags: the list of tags to search for
+        @type  tags: list
+        @return: the cached values ordered by instance_id, or None if the search is not cached
+        @rtype: list
+        '''
+        key = frozenset(tags)
+        with self._lock:
+            if len(key) is 0 or key not in self._searches:
+                self._misses += 1
+                return None
+            self._hits += 1
+            self._searches[key] = self._searches.pop(key)
+            # intersect the instances of each tag, starting with the rarest
+            sets = sorted([self._index.get(t, set()) for t in key], key=len)
+            ids = set(sets[0])
+            for s in sets[1:]:
+                ids &= s
+            return [self._touch(i)[1] for i in sorted(ids)]
+
+    def put_search(self, tags, instances, version):
+        '''
+        Remember the complete result of a tag search. The result is dropped if the cache changed
+        since the given version, or if it does not fit in the cache.
+        
+        @param tags: the list of tags that were searched for
+        @type  tags: list
+        @param instances: a (instance_id, tags, value) tuple for each instance found
+        @type  instances: list
+        @param version: the version of the cache read before searching the database
+        @type  version: int
+        '''
+        key = frozenset(tags)
+        with self._lock:
+            if len(key) is 0 or version != self._version or len(instances) > self._max_size:
+                return
+            for i in instances:
+                self._set(i[0], i[1], i[2])
+            # a search is only complete if none of its instances were evicted while adding it
+            for i in instances:
+                if i[0] not in self._entries:
+                    return
+            self._searches.pop(key, None)
+            self._searches[key] = True
+            while len(self._searches) > self._max_searches:
+                self._searches.popitem(last=False)
+
+    def put(self, instance_id, tags, value, version=None):
+        '''
+        Add or replace an instance in the cache after it was read from the database. If a version
+        is given and the cache changed since, the value may already be stale, so the instance is
+        evicted instead.
+        
+        @param instance_id: the instance_id of the instance
+        @type  instance_id: int
+        @param tags: the tags of the instance
+        @type  tags: list
+        @param value: the value to cache
+        @type  value: object
+        @param version: the version of the cache read before reading the instance (None to always
+                        add the instance)
+        @type  version: int
+        @return: the new version of the cache to put further instances of the same read with, or
+                 -1 if the instance was evicted (so that they are evicted as well)
+        @rtype:  int
+        '''
+        with self._lock:
+            stale = version is not None and version != self._version
+            if stale:
+                self._evict(instance_id, tags)
+            else:
+                self._set(instance_id, tags, value)
+            self._version += 1
+            return -1 if stale else self._version
+
+    def evict(self, instance_id, tags):
+        '''
+        Remove an instance from the cache after it was updated in the database, along with the
+        complete searches it belonged to before or may belong to now.
+        
+        @param instance_id: the instance_id of the instance
+        @type  instance_id: int
+        @param tags: the new tags of the instance, if known
+        @type  tags: list
+        '''
+        with self._lock:
+            self._version += 1
+            self._evict(instance_id, tags)
+
+    def remove(self, instance_id):
+        '''
+        Remove an instance from the cache after it was removed from the database.
+        
+        @param instance_id: the instance_id of the instance
+        @type  instance_id: int
+        '''
+        with self._lock:
+            self._version += 1
+            self._unindex(instance_id)
+
+    def clear(self):
+        '''
+        Remove everything from the cache.
+        '''
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+            self._index.clear()
+            self._searches.clear()
+
+    def stats(self):
+        '''
+        Get the counters of the cache.
+        
+        @return: the hits, misses, evictions, number of instances and number of complete searches
+        @rtype: dict
+        '''
+        with self._lock:
+            return {'hits' : self._hits, 'misses' : self._misses, 'evictions' : self._evictions,
+                    'size' : len(self._entries), 'searches' : len(self._searches)}
+
+    def _touch(self, instance_id):
+        '''
+        Mark an instance as most recently used. The lock must be held.
+        
+        @param instance_id: the instance_id of the instance
+        @type  instance_id: int
+        @return: the (tags, value) entry of the instance
+        @rtype: tuple
+        '''
+        entry = self._entries.pop(instance_id)
+        self._entries[instance_id] = entry
+        return entry
+
+    def _set(self, instance_id, tags, value):
+        '''
+        Add or replace an instance and evict the least recently used instances beyond the size
+        bound. The lock must be held.
+        
+        @param instance_id: the instance_id of the instance
+        @type  instance_id: int
+        @param tags: the tags of the instance
+        @type  tags: list
+        @param value: the value to cache
+        @type  value: object
+        '''
+        tags = frozenset(tags if tags is not None else [])
+        self._unindex(instance_id)
+        self._entries[instance_id] = (tags, value)
+        for t in tags:
+            self._index.setdefault(t, set()).add(instance_id)
+        while len(self._entries) > self._max_size:
+            evicted = next(iter(self._entries))
+            # searches the evicted instance belongs to can no longer be answered from memory
+            self._drop_searches(self._entries[evicted][0])
+            self._unindex(evicted)
+            self._evictions += 1
+
+    def _unindex(self, instance_id):
+        '''
+        Remove an instance and its tags from the cache, if it is cached. The lock must be held.
+        
+        @param instance_id: the instance_id of the instance
+        @type  instance_id: int
+        '''
+        entry = self._entries.pop(instance_id, None)
+        if entry is not None:
+            for t in entry[0]:
+                ids = self._index[t]
+                ids.discard(instance_id)
+                if len(ids) is 0:
+                    del self._index[t]
+
+    def _evict(self, instance_id, tags):
+        '''
+        Remove an instance and every complete search it matches, either with its cached tags or
+        with the given tags. The lock must be held.
+        
+        @param instance_id: the instance_id of the instance
+        @type  instance_id: int
+        @param tags: the tags the instance may have now
+        @type  tags: list
+        '''
+        entry = self._entries.get(instance_id)
+        if entry is not None:
+            self._drop_searches(entry[0])
+        self._drop_searches(tags)
+        self._unindex(instance_id)
+
+    def _drop_searches(self, tags):
+        '''
+        Forget every complete search that an instance with the given tags matches. The lock must
+        be held.
+        
+        @param tags: the tags of the instance
+        @type  tags: list
+        '''
+        tags = frozenset(tags if tags is not None else [])
+        for key in [k for k in self._searches if k <= tags]:
+            del self._searches[key]
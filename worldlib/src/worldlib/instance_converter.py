@@ -0,0 +1,154 @@
+# Software License Agreement (BSD License)
+#
+# Copyright (c) 2013, Willow Garage, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above
+# copyright notice, this list of conditions and the following
+# disclaimer in the documentation and/or other materials provided
+# with the distribution.
+# * Neither the name of Willow Garage, Inc. nor the names of its
+# contributors may be used to endorse or promote products derived
+# from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Functions to convert directly between WorldObjectInstance messages and the rows of the World 
+Model database. Messages are built field by field from the named columns of a row, and rows from 
+the fields of a message, without going through nested dictionaries and the reflection of 
+rospy_message_converter. Timestamps are expected as unix time, as selected by 
+WorldObjectInstanceConnection.
+
+@author:  Jihoon Lee
+@version: October 16, 2026
+'''
+
+from rospy import Time, Duration
+from std_msgs.msg import Header
+from geometry_msgs.msg import PoseWithCovarianceStamped, PoseWithCovariance, Pose, Point, Quaternion
+from world_msgs.msg import WorldObjectInstance, Source
+
+# fields of a message that are stored as unix time
+_TIMES = ('creation', 'update', 'expected_ttl', 'perceived_end')
+
+def row_to_msg(row):
+    '''
+    Convert a row from the World Model database to a WorldObjectInstance message.
+    
+    @param row: the row from the database, keyed by column name
+    @type  row: dict
+    @return: the WorldObjectInstance message 
+    @rtype: WorldObjectInstance
+    '''
+    pos = row['pose_position']
+    ori = row['pose_orientation']
+    cov = row['pose_covariance']
+    header = Header(seq=row['pose_seq'] or 0, stamp=_to_time(row['pose_stamp']), 
+                    frame_id=row['pose_frame_id'] or '')
+    pose = Pose(Point() if pos is None else Point(*pos), 
+                Quaternion() if ori is None else Quaternion(*ori))
+    return WorldObjectInstance(instance_id=row['instance_id'] or 0,
+                               name=row['name'] or '',
+                               creation=_to_time(row['creation']),
+                               update=_to_time(row['update']),
+                               expected_ttl=_to_duration(row['expected_ttl']),
+                               perceived_end=_to_time(row['perceived_end']),
+                               source=Source(origin=row['source_origin'] or '', 
+                                             creator=row['source_creator'] or ''),
+                               pose=PoseWithCovarianceStamped(header=header, 
+                                    pose=PoseWithCovariance(pose=pose, 
+                                                            covariance=cov or [0.0] * 36)),
+                               description_id=row['description_id'] or 0,
+                               properties=row['properties'] or [],
+                               tags=row['tags'] or [])
+
+def msg_to_row(msg):
+    '''
+    Convert a WorldObjectInstance message to a row that can be inserted into the World Model 
+    database. Unset fields are left out so that they keep their value on updates.
+    
+    @param msg: the WorldObjectInstance message 
+    @type  msg: WorldObjectInstance
+    @return: the row, keyed by column name
+    @rtype: dict
+    '''
+    row = {}
+    if msg.instance_id > 0:
+        row['instance_id'] = msg.instance_id
+    if len(msg.name) > 0:
+        row['name'] = msg.name
+    for k in _TIMES:
+        t = getattr(msg, k)
+        if t.secs + t.nsecs > 0:
+            row[k] = t.secs + (t.nsecs / 1000000000.0)
+    # check each part of the source
+    if len(msg.source.origin) > 0:
+        row['source_origin'] = msg.source.origin
+    if len(msg.source.creator) > 0:
+        row['source_creator'] = msg.source.creator
+    # the header of the pose
+    header = msg.pose.header
+    row['pose_seq'] = header.seq
+    if header.stamp.secs + header.stamp.nsecs > 0:
+        row['pose_stamp'] = header.stamp.secs + (header.stamp.nsecs / 1000000000.0)
+    if len(header.frame_id) > 0:
+        row['pose_frame_id'] = header.frame_id
+    # the pose itself, as lists since psycopg2 only adapts lists to arrays
+    pos = msg.pose.pose.pose.position
+    ori = msg.pose.pose.pose.orientation
+    row['pose_position'] = [pos.x, pos.y, pos.z]
+    row['pose_orientation'] = [ori.x, ori.y, ori.z, ori.w]
+    row['pose_covariance'] = list(msg.pose.pose.covariance)
+    if msg.description_id > 0:
+        row['description_id'] = msg.description_id
+    if len(msg.properties) > 0:
+        row['properties'] = list(msg.properties)
+    if len(msg.tags) > 0:
+        row['tags'] = list(msg.tags)
+    return row
+
+def _to_time(t):
+    '''
+    Convert the given unix time into a ROS time.
+    
+    @param t: the unix time
+    @type  t: float
+    @return: the ROS time, or zero if t is not set
+    @rtype: Time
+    '''
+    if t is not None and t > 0:
+        secs = int(t)
+        return Time(secs, int((t - secs) * 1000000000.0))
+    return Time()
+
+def _to_duration(t):
+    '''
+    Convert the given number of seconds into a ROS duration.
+    
+    @param t: the number of seconds
+    @type  t: float
+    @return: the ROS duration, or zero if t is not set
+    @rtype: Duration
+    '''
+    if t is not None and t > 0:
+        secs = int(t)
+        return Duration(secs, int((t - secs) * 1000000000.0))
+    return Duration()
@@ -0,0 +1,374 @@
+# Software License Agreement (BSD License)
+#
+# Copyright (c) 2013, Willow Garage, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above
+# copyright notice, this list of conditions and the following
+# disclaimer in the documentation and/or other materials provided
+# with the distribution.
+# * Neither the name of Willow Garage, Inc. nor the names of its
+# contributors may be used to endorse or promote products derived
+# from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+'''
+The Metrics class collects latency histograms, counters and gauges for the hot paths of the World
+Model: action goals, SQL statements, connection pool waits, Large Object I/O and message
+conversion. Statements are timed by a cursor class given to the connections of a ConnectionPool,
+and statements slower than a threshold can be logged.
+
+@author:  Jihoon Lee
+@version: October 16, 2026
+'''
+
+import bisect
+import psycopg2.extensions
+import re
+import rospy
+import threading
+import time
+from contextlib import contextmanager
+
+# first table named by a statement
+_table = re.compile(r'\b(?:FROM|INTO|UPDATE)\s+([A-Za-z_][A-Za-z0-9_]*)', re.IGNORECASE)
+# first word after the command of a statement without a table (e.g., a function)
+_word = re.compile(r'^\s*\w+\s+([A-Za-z_][A-Za-z0-9_]*)')
+# number suffix of the names of prepared statements
+_suffix = re.compile(r'_\d+$')
+
+class Histogram(object):
+    '''
+    A latency histogram with fixed buckets, along with the rows and bytes of the timed calls.
+    '''
+
+    # upper bounds of the buckets in seconds, from 0.1 ms to 10 s
+    BOUNDS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+              1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self):
+        '''
+        Creates an empty Histogram object.
+        '''
+        # the last bucket counts everything above the last bound
+        self.buckets = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.bytes = 0
+
+    def observe(self, seconds, rows=0, bytes=0):
+        '''
+        Add a timed call to the histogram.
+
+        @param seconds: the duration of the call
+        @type  seconds: float
+        @param rows: the number of rows of the call
+        @type  rows: int
+        @param bytes: the number of bytes of the call
+        @type  bytes: int
+        '''
+        self.buckets[bisect.bisect_left(self.BOUNDS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+        self.rows += rows
+        self.bytes += bytes
+
+    def percentile(self, p):
+        '''
+        Estimate a percentile as the upper bound of the bucket it falls in.
+
+        @param p: the percentile
+        @type  p: float
+        @return: the estimated duration in seconds, or 0 if the histogram is empty
+        @rtype: float
+        '''
+        rank = p / 100.0 * self.count
+        seen = 0
+        for i in range(len(self.buckets)):
+            seen += self.buckets[i]
+            if seen >= rank and seen > 0:
+                return min(self.BOUNDS[i], self.max) if i < len(self.BOUNDS) else self.max
+        return 0.0
+
+    def to_dict(self):
+        '''
+        Summarize the histogram.
+
+        @return: the counts, the mean, percentiles and maximum in milliseconds, and the buckets
+        @rtype: dict
+        '''
+        return {'count' : self.count, 'rows' : self.rows, 'bytes' : self.bytes,
+                'mean_ms' : 1000.0 * self.sum / self.count if self.count > 0 else 0.0,
+                'p50_ms' : 1000.0 * self.percentile(50), 'p95_ms' : 1000.0 * self.percentile(95),
+                'p99_ms' : 1000.0 * self.percentile(99), 'max_ms' : 1000.0 * self.max,
+                'buckets' : list(self.buckets)}
+
+class Metrics(object):
+    '''
+    The main Metrics object which holds the named histograms, counters and gauges. It is safe to
+    use from any thread.
+    '''
+
+    def __init__(self, slow_query_threshold=0.0):
+        '''
+        Creates the Metrics object.
+
+        @param slow_query_threshold: statements taking at least this many seconds are logged (0
+                                     to disable)
+        @type  slow_query_threshold: float
+        '''
+        self.slow_query_threshold = slow_query_threshold
+        self._histograms = {}
+        self._counters = {}
+        self._gauges = {}
+        # guards the histograms and counters
+        self._lock = threading.Lock()
+        # cursor class which times the statements of the connections it is given to
+        self.cursor_factory = type('InstrumentedCursor', (InstrumentedCursor,), {'metrics' : self})
+
+    def observe(self, name, seconds, rows=0, bytes=0):
+        '''
+        Add a timed call to the named histogram.
+
+        @param name: the name of the histogram (e.g., 'query.SELECT world_object_instances')
+        @type  name: string
+        @param seconds: the duration of the call
+        @type  seconds: float
+        @param rows: the number of rows of the call
+        @type  rows: int
+        @param bytes: the number of bytes of the call
+        @type  bytes: int
+        '''
+        with self._lock:
+            h = self._histograms.get(name)
+            if h is None:
+                h = self._histograms[name] = Histogram()
+            h.observe(seconds, rows, bytes)
+
+    def add_bytes(self, name, bytes):
+        '''
+        Add to the bytes of the named histogram without timing a call, e.g., for rows fetched
+        after a statement was timed.
+
+        @param name: the name of the histogram
+        @type  name: string
+        @param bytes: the number of bytes
+        @type  bytes: int
+        '''
+        with self._lock:
+            h = self._histograms.get(name)
+            if h is not None:
+                h.bytes += bytes
+
+    def count(self, name, n=1):
+        '''
+        Add to the named counter.
+
+        @param name: the name of the counter
+        @type  name: string
+        @param n: the amount to add
+        @type  n: int
+        '''
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def gauge(self, name, fn):
+        '''
+        Register a gauge, whose value is read by calling the given function when a snapshot is
+        taken.
+
+        @param name: the name of the gauge
+        @type  name: string
+        @param fn: the function returning the current value
+        @type  fn: function
+        '''
+        with self._lock:
+            self._gauges[name] = fn
+
+    @contextmanager
+    def timer(self, name):
+        '''
+        Context manager which adds the duration of the block to the named histogram.
+
+        @param name: the name of the histogram
+        @type  name: string
+        '''
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.observe(name, time.time() - start)
+
+    def timed(self, name, fn):
+        '''
+        Wrap the given function so that each call is added to the named histogram.
+
+        @param name: the name of the histogram
+        @type  name: string
+        @param fn: the function to wrap
+        @type  fn: function
+        @return: the wrapped function
+        @rtype: function
+        '''
+        def wrapper(*args, **kwargs):
+            start = time.time()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.observe(name, time.time() - start)
+        return wrapper
+
+    def query(self, sql, seconds, rows):
+        '''
+        Add an executed statement to the histogram of its label, and log it if it was slow.
+
+        @param sql: the statement
+        @type  sql: string
+        @param seconds: the duration of the statement
+        @type  seconds: float
+        @param rows: the number of rows returned or affected
+        @type  rows: int
+        @return: the name of the histogram of the statement
+        @rtype: string
+        '''
+        name = 'query.' + query_label(sql)
+        self.observe(name, seconds, max(rows, 0))
+        if self.slow_query_threshold > 0 and seconds >= self.slow_query_threshold:
+            self.count('query.slow')
+            rospy.logwarn('Slow world model query (%.3f s): %s' % (seconds, sql[:1000]))
+        return name
+
+    def snapshot(self, reset=False):
+        '''
+        Get the current value of every histogram, counter and gauge.
+
+        @param reset: if the histograms and counters should be cleared afterwards
+        @type  reset: bool
+        @return: the histograms (see Histogram.to_dict), counters and gauges by name
+        @rtype: dict
+        '''
+        with self._lock:
+            histograms = dict([(k, v.to_dict()) for k, v in self._histograms.items()])
+            counters = dict(self._counters)
+            gauges = self._gauges.items()
+            if reset:
+                self._histograms = {}
+                self._counters = {}
+        values = {}
+        for name, fn in gauges:
+            try:
+                values[name] = fn()
+            except Exception:
+                values[name] = None
+        return {'histograms' : histograms, 'counters' : counters, 'gauges' : values}
+
+class InstrumentedCursor(psycopg2.extensions.cursor):
+    '''
+    A cursor which times each statement and counts the rows and (approximate) bytes fetched. The
+    Metrics object is set on the subclass made by Metrics.
+    '''
+
+    metrics = None
+
+    def execute(self, query, vars=None):
+        '''
+        Execute and time a statement.
+        '''
+        start = time.time()
+        try:
+            return super(InstrumentedCursor, self).execute(query, vars)
+        finally:
+            self._histogram = self.metrics.query(query, time.time() - start, self.rowcount)
+
+    def fetchone(self):
+        '''
+        Fetch the next row and count its bytes.
+        '''
+        row = super(InstrumentedCursor, self).fetchone()
+        if row is not None:
+            self.metrics.add_bytes(self._histogram, _size(row))
+        return row
+
+    def fetchmany(self, size=None):
+        '''
+        Fetch the next rows and count their bytes.
+        '''
+        if size is None:
+            rows = super(InstrumentedCursor, self).fetchmany()
+        else:
+            rows = super(InstrumentedCursor, self).fetchmany(size)
+        self.metrics.add_bytes(self._histogram, sum([_size(r) for r in rows]))
+        return rows
+
+    def fetchall(self):
+        '''
+        Fetch the remaining rows and count their bytes.
+        '''
+        rows = super(InstrumentedCursor, self).fetchall()
+        self.metrics.add_bytes(self._histogram, sum([_size(r) for r in rows]))
+        return rows
+
+def query_label(sql):
+    '''
+    Get a short label for a statement from its command and first table, so that executions of the
+    same statement share a histogram.
+
+    @param sql: the statement
+    @type  sql: string
+    @return: the label (e.g., 'SELECT world_object_instance_view')
+    @rtype: string
+    '''
+    words = sql.split(None, 2)
+    if not words:
+        return ''
+    command = words[0].upper()
+    if command in ['EXECUTE', 'PREPARE', 'DEALLOCATE'] and len(words) > 1:
+        # prepared statements are named after their table and operation
+        return command + ' ' + _suffix.sub('', words[1].rstrip(';'))
+    match = _table.search(sql)
+    if match is None:
+        match = _word.search(sql)
+    return command if match is None else command + ' ' + match.group(1)
+
+def _size(row):
+    '''
+    Approximate the number of bytes of a row: strings and buffers count their length, and every
+    other value (including each element of an array) counts as 8 bytes.
+
+    @param row: the row
+    @type  row: tuple
+    @return: the number of bytes
+    @rtype: int
+    '''
+    size = 0
+    for v in row:
+        if v is None:
+            continue
+        elif isinstance(v, (basestring, buffer, bytearray)):
+            size += len(v)
+        elif isinstance(v, list):
+            size += 8 * len(v)
+        else:
+            size += 8
+    return size
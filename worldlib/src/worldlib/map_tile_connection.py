@@ -0,0 +1,335 @@
+# Software License Agreement (BSD License)
+#
+# Copyright (c) 2013, Willow Garage, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above
+# copyright notice, this list of conditions and the following
+# disclaimer in the documentation and/or other materials provided
+# with the distribution.
+# * Neither the name of Willow Garage, Inc. nor the names of its
+# contributors may be used to endorse or promote products derived
+# from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+'''
+The MapTileConnection class provides functions to natively communicate with a PostgreSQL World
+Model database for the map tile tables. Occupancy grids are split into fixed size tiles which are
+stored once by their content digest, so unchanged areas are shared between versions of a map. Any
+rectangular region of a grid can be assembled from only the tiles it covers.
+
+@author:  Jihoon Lee
+@version: October 16, 2026
+'''
+
+import hashlib
+import psycopg2
+from psycopg2.extras import execute_values
+from worldlib.connection_pool import ConnectionPool
+
+class MapTileConnection(object):
+    '''
+    The main MapTileConnection object which communicates with the PostgreSQL World Model database.
+    '''
+
+    # the encoding of descriptors whose grid data is stored as tiles
+    ENCODING = 'tiles'
+
+    def __init__(self, user, pwd, host='localhost', pool=None, tile_size=64):
+        '''
+        Creates the MapTileConnection object and connects to the map tile tables.
+
+        @param user: the database username
+        @type  user: string
+        @param pwd: the database password
+        @type  pwd: string
+        @param host: the database hostname
+        @type  host: string
+        @param pool: a shared connection pool to use instead of creating a private one
+        @type  pool: ConnectionPool
+        @param tile_size: the width and height (in cells) of new tiles
+        @type  tile_size: int
+        '''
+        if tile_size < 1:
+            raise ValueError('Invalid tile size: ' + str(tile_size))
+        # name of the content addressed map tiles table
+        self._tiles = 'map_tiles'
+        # name of the table linking descriptors to their tiles
+        self._descriptor_tiles = 'descriptor_tiles'
+        self.tile_size = tile_size
+        # connect to the world model database
+        self._pool = pool if pool is not None else ConnectionPool(user, pwd, host)
+
+    def insert_descriptors(self, descriptors, entities, grids):
+        '''
+        Insert the given descriptors and the tiles of their grids in one transaction, so that a
+        tiled descriptor is never seen without its tiles, and is not stored at all if its tiles
+        cannot be.
+
+        @param descriptors: the descriptor connection to insert with, which must share this pool
+        @type  descriptors: DescriptorConnection
+        @param entities: the descriptor entities to insert
+        @type  entities: list
+        @param grids: the grids to tile as (index, width, height, data) tuples, where index is the
+                      position of the descriptor of the grid in entities
+        @type  grids: list
+        @return: the descriptor_ids, in the same order as the entities
+        @rtype:  list
+        '''
+        with self._pool.connection() as conn:
+            descriptor_ids = descriptors.insert_many(entities, conn)
+            for i, width, height, data in grids:
+                self.insert_grid(descriptor_ids[i], width, height, data, conn)
+            conn.commit()
+        return descriptor_ids
+
+    def insert_grid(self, descriptor_id, width, height, data, conn=None):
+        '''
+        Split the given grid into tiles and store them for the given descriptor. Only tiles whose
+        contents are not already in the database are sent. If a connection is given, the tiles
+        are stored with it and the caller is responsible for committing them.
+
+        @param descriptor_id: the descriptor_id the grid belongs to
+        @type  descriptor_id: int
+        @param width: the width of the grid in cells
+        @type  width: int
+        @param height: the height of the grid in cells
+        @type  height: int
+        @param data: the row-major grid data, one byte per cell
+        @type  data: string
+        @param conn: a checked out connection to store the tiles with
+        @type  conn: connection
+        @return: the number of new tiles which were stored
+        @rtype:  int
+        '''
+        if len(data) != width * height:
+            raise ValueError('Grid data does not match its size (' + str(width) + 'x' + 
+                             str(height) + ').')
+        # split the grid into tiles
+        tiles = []
+        for y in range(0, height, self.tile_size):
+            h = min(self.tile_size, height - y)
+            for x in range(0, width, self.tile_size):
+                w = min(self.tile_size, width - x)
+                rows = [data[(y + i) * width + x:(y + i) * width + x + w] for i in range(h)]
+                tiles.append((x, y, w, h, ''.join(rows)))
+        return self.insert_tiles(descriptor_id, tiles, conn)
+
+    def insert_tiles(self, descriptor_id, tiles, conn=None):
+        '''
+        Store the given tiles for the given descriptor. Only tiles whose contents are not already in
+        the database are sent. If a connection is given, the tiles are stored with it and the
+        caller is responsible for committing them.
+
+        @param descriptor_id: the descriptor_id the tiles belong to
+        @type  descriptor_id: int
+        @param tiles: the tiles as (x, y, width, height, data) tuples
+        @type  tiles: list
+        @param conn: a checked out connection to store the tiles with
+        @type  conn: connection
+        @return: the number of new tiles which were stored
+        @rtype:  int
+        '''
+        if len(tiles) is 0:
+            return 0
+        if conn is None:
+            with self._pool.connection() as conn:
+                stored = self.insert_tiles(descriptor_id, tiles, conn)
+                conn.commit()
+            return stored
+        contents = {}
+        links = []
+        for x, y, w, h, tile in tiles:
+            tile = str(tile)
+            digest = self._digest(w, h, tile)
+            contents[digest] = tile
+            links.append((descriptor_id, x, y, w, h, digest))
+        # create a cursor
+        cur = conn.cursor()
+        # check which tiles are already stored, and keep them from being removed as orphans
+        cur.execute("""SELECT digest FROM """ + self._tiles + """ WHERE digest = ANY (%s) 
+                    FOR KEY SHARE""", (contents.keys(),))
+        for r in cur.fetchall():
+            del contents[r[0]]
+        if len(contents) > 0:
+            execute_values(cur, """INSERT INTO """ + self._tiles + """ (digest, data) 
+                           VALUES %s ON CONFLICT DO NOTHING""", 
+                           [(k, psycopg2.Binary(v)) for k, v in contents.items()])
+        execute_values(cur, """INSERT INTO """ + self._descriptor_tiles + """ 
+                       (descriptor_id, x, y, width, height, digest) VALUES %s""", links)
+        cur.close()
+        return len(contents)
+
+    def remove_orphaned_tiles(self, limit):
+        '''
+        Remove up to the given number of tiles which no descriptor uses anymore (e.g., those of
+        replaced or removed maps). Tiles which are being linked to a new descriptor are skipped.
+
+        @param limit: the maximum number of tiles to remove
+        @type  limit: int
+        @return: the number of tiles removed
+        @rtype:  int
+        '''
+        with self._pool.connection() as conn:
+            # create a cursor
+            cur = conn.cursor()
+            cur.execute("""DELETE FROM """ + self._tiles + """ WHERE digest IN (SELECT m.digest 
+                        FROM """ + self._tiles + """ m WHERE NOT EXISTS (SELECT 1 FROM """ + 
+                        self._descriptor_tiles + """ t WHERE t.digest = m.digest) LIMIT %s 
+                        FOR UPDATE SKIP LOCKED)""", (limit,))
+            removed = cur.rowcount
+            conn.commit()
+            cur.close()
+        return removed
+
+    def search_tiles(self, descriptor_ids):
+        '''
+        Search for the raw tiles of the given descriptors without assembling them.
+
+        @param descriptor_ids: the descriptor_ids to search for
+        @type  descriptor_ids: list
+        @return: the tiles as (x, y, width, height, data) tuples, keyed by descriptor_id
+        @rtype:  dict
+        '''
+        final = {}
+        # do not search empty arrays
+        if len(descriptor_ids) > 0:
+            with self._pool.connection(False) as conn:
+                # create a cursor
+                cur = conn.cursor()
+                cur.execute("""SELECT t.descriptor_id, t.x, t.y, t.width, t.height, m.data FROM """ + 
+                            self._descriptor_tiles + """ t JOIN """ + self._tiles + """ m 
+                            ON t.digest = m.digest WHERE t.descriptor_id = ANY (%s) 
+                            ORDER BY t.descriptor_id, t.y, t.x""", (list(descriptor_ids),))
+                results = cur.fetchall()
+                cur.close()
+            for r in results:
+                final.setdefault(r[0], []).append((r[1], r[2], r[3], r[4], str(r[5])))
+        return final
+
+    def search_grids(self, grids):
+        '''
+        Assemble the full grids for the given descriptors from their tiles with a single query.
+
+        @param grids: the width and height of each grid, keyed by descriptor_id
+        @type  grids: dict
+        @return: the row-major grid data, keyed by descriptor_id
+        @rtype:  dict
+        '''
+        final = {}
+        # do not search empty arrays
+        if len(grids) > 0:
+            with self._pool.connection(False) as conn:
+                # create a cursor
+                cur = conn.cursor()
+                cur.execute("""SELECT t.descriptor_id, t.x, t.y, t.width, t.height, m.data FROM """ + 
+                            self._descriptor_tiles + """ t JOIN """ + self._tiles + """ m 
+                            ON t.digest = m.digest WHERE t.descriptor_id = ANY (%s)""", 
+                            (grids.keys(),))
+                results = cur.fetchall()
+                cur.close()
+            tiles = {}
+            for r in results:
+                tiles.setdefault(r[0], []).append(r[1:])
+            for descriptor_id in grids.keys():
+                width, height = grids[descriptor_id]
+                final[descriptor_id] = self.assemble(tiles.get(descriptor_id, []), 0, 0, width, 
+                                                      height)
+        return final
+
+    def search_region(self, descriptor_id, x, y, width, height):
+        '''
+        Assemble a rectangular region of the grid for the given descriptor. Only the tiles which
+        overlap the region are loaded. Cells which are not covered by any tile are set to -1
+        (unknown).
+
+        @param descriptor_id: the descriptor_id of the grid
+        @type  descriptor_id: int
+        @param x: the column of the first cell of the region
+        @type  x: int
+        @param y: the row of the first cell of the region
+        @type  y: int
+        @param width: the width of the region in cells
+        @type  width: int
+        @param height: the height of the region in cells
+        @type  height: int
+        @return: the row-major region data, one byte per cell
+        @rtype:  string
+        '''
+        with self._pool.connection(False) as conn:
+            # create a cursor
+            cur = conn.cursor()
+            cur.execute("""SELECT t.x, t.y, t.width, t.height, m.data FROM """ + 
+                        self._descriptor_tiles + """ t JOIN """ + self._tiles + """ m 
+                        ON t.digest = m.digest WHERE t.descriptor_id = %s AND t.x < %s 
+                        AND t.x + t.width > %s AND t.y < %s AND t.y + t.height > %s""", 
+                        (descriptor_id, x + width, x, y + height, y))
+            results = cur.fetchall()
+            cur.close()
+        return self.assemble(results, x, y, width, height)
+
+    @staticmethod
+    def assemble(tiles, x, y, width, height):
+        '''
+        Copy the overlapping parts of the given tiles into a region.
+
+        @param tiles: the tiles as (x, y, width, height, data) tuples
+        @type  tiles: list
+        @param x: the column of the first cell of the region
+        @type  x: int
+        @param y: the row of the first cell of the region
+        @type  y: int
+        @param width: the width of the region in cells
+        @type  width: int
+        @param height: the height of the region in cells
+        @type  height: int
+        @return: the row-major region data, one byte per cell
+        @rtype:  string
+        '''
+        # unknown cells are -1
+        region = bytearray('\xff' * (width * height))
+        for tx, ty, tw, th, data in tiles:
+            data = str(data)
+            # the overlap of the tile and the region
+            x0 = max(tx, x)
+            x1 = min(tx + tw, x + width)
+            if x1 <= x0:
+                continue
+            for row in range(max(ty, y), min(ty + th, y + height)):
+                src = (row - ty) * tw + (x0 - tx)
+                dst = (row - y) * width + (x0 - x)
+                region[dst:dst + x1 - x0] = data[src:src + x1 - x0]
+        return str(region)
+
+    def _digest(self, width, height, data):
+        '''
+        Compute the content digest of a tile.
+
+        @param width: the width of the tile in cells
+        @type  width: int
+        @param height: the height of the tile in cells
+        @type  height: int
+        @param data: the row-major tile data
+        @type  data: string
+        @return: the hex encoded SHA-1 digest
+        @rtype:  string
+        '''
+        return hashlib.sha1(str(width) + 'x' + str(height) + ':' + data).hexdigest()
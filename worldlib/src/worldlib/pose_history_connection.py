@@ -0,0 +1,211 @@
+# Software License Agreement (BSD License)
+#
+# Copyright (c) 2013, Willow Garage, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above
+# copyright notice, this list of conditions and the following
+# disclaimer in the documentation and/or other materials provided
+# with the distribution.
+# * Neither the name of Willow Garage, Inc. nor the names of its
+# contributors may be used to endorse or promote products derived
+# from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+'''
+The PoseHistoryConnection class provides functions to natively communicate with a PostgreSQL World
+Model database for the pose history table. Every pose written to an instance can be appended to
+the history, which is partitioned by time so that old poses are removed by dropping whole
+partitions. Trajectories are read back over a time window and can be downsampled by the database.
+
+@author:  Jihoon Lee
+@version: October 16, 2026
+'''
+
+import datetime
+import threading
+from psycopg2.extras import execute_values
+from worldlib.connection_pool import ConnectionPool
+
+class PoseHistoryConnection(object):
+    '''
+    The main PoseHistoryConnection object which communicates with the PostgreSQL World Model 
+    database.
+    '''
+
+    def __init__(self, user, pwd, host='localhost', pool=None, partition_days=1):
+        '''
+        Creates the PoseHistoryConnection object and connects to the pose history table.
+
+        @param user: the database username
+        @type  user: string
+        @param pwd: the database password
+        @type  pwd: string
+        @param host: the database hostname
+        @type  host: string
+        @param pool: a shared connection pool to use instead of creating a private one
+        @type  pool: ConnectionPool
+        @param partition_days: the number of days of poses in each new partition
+        @type  partition_days: int
+        '''
+        if partition_days < 1:
+            raise ValueError('Invalid partition size: ' + str(partition_days) + ' days')
+        # name of the partitioned pose history table
+        self._history = 'world_object_instance_pose_history'
+        # length of each partition in seconds
+        self._span = partition_days * 86400
+        # start times of the partitions known to exist
+        self._partitions = set()
+        # guards the known partitions
+        self._lock = threading.Lock()
+        # connect to the world model database
+        self._pool = pool if pool is not None else ConnectionPool(user, pwd, host)
+
+    def insert_many(self, entities):
+        '''
+        Append the given poses to the history with a single multi-row statement. The partitions
+        covering the poses are created first if needed.
+
+        @param entities: the poses to append, each with an instance_id, a unix time stamp, and
+                         optionally a pose_frame_id, pose_position and pose_orientation
+        @type  entities: list
+        '''
+        if len(entities) is 0:
+            return
+        starts = set([self._start(e['stamp']) for e in entities])
+        with self._pool.connection() as conn:
+            # create a cursor
+            cur = conn.cursor()
+            with self._lock:
+                missing = starts - self._partitions
+            for start in sorted(missing):
+                self._create_partition(cur, start)
+            values = [(e['instance_id'], e['stamp'], e.get('pose_frame_id'), 
+                       e.get('pose_position'), e.get('pose_orientation')) for e in entities]
+            execute_values(cur, """INSERT INTO """ + self._history + """ (instance_id, stamp, 
+                           pose_frame_id, pose_position, pose_orientation) VALUES %s""", values, 
+                           """(%s, to_timestamp(%s), %s, %s::double precision[], 
+                           %s::double precision[])""", len(values))
+            conn.commit()
+            cur.close()
+        with self._lock:
+            self._partitions.update(missing)
+
+    def search_trajectory(self, instance_id, start, end, max_points=0):
+        '''
+        Search for the poses of the given instance within the given time window, oldest first. If
+        there are more poses than the maximum, the window is split into that many equal intervals
+        and only the first pose of each interval is returned.
+
+        @param instance_id: the instance_id of the instance
+        @type  instance_id: int
+        @param start: the unix time of the start of the window
+        @type  start: float
+        @param end: the unix time of the end of the window
+        @type  end: float
+        @param max_points: the maximum number of poses to return (0 for no limit)
+        @type  max_points: int
+        @return: the poses found, with the stamp as unix time
+        @rtype: list
+        '''
+        # only the partitions overlapping the window are scanned
+        where = (""" FROM """ + self._history + """ WHERE instance_id = %s 
+                 AND stamp BETWEEN to_timestamp(%s) AND to_timestamp(%s)""")
+        values = (instance_id, start, end)
+        cols = """date_part('epoch', stamp), pose_frame_id, pose_position, pose_orientation"""
+        if max_points > 0 and end > start:
+            sql = ("""SELECT * FROM (SELECT DISTINCT ON (bucket) """ + cols + """ FROM 
+                   (SELECT *, least(width_bucket(date_part('epoch', stamp), %s, %s, %s), %s) 
+                   AS bucket""" + where + """) AS w ORDER BY bucket, stamp) AS d 
+                   ORDER BY 1""")
+            values = (start, end, max_points, max_points) + values
+        else:
+            sql = """SELECT """ + cols + where + """ ORDER BY stamp"""
+            if max_points > 0:
+                sql += """ LIMIT %s"""
+                values += (max_points,)
+        with self._pool.connection(False) as conn:
+            # create a cursor
+            cur = conn.cursor()
+            cur.execute(sql, values)
+            rows = cur.fetchall()
+            conn.commit()
+            cur.close()
+        return [{'stamp' : r[0], 'pose_frame_id' : r[1], 'pose_position' : r[2], 
+                 'pose_orientation' : r[3]} for r in rows]
+
+    def drop_before(self, t):
+        '''
+        Drop the partitions of the history which only hold poses older than the given time.
+
+        @param t: the unix time before which poses are no longer needed
+        @type  t: float
+        @return: the names of the dropped partitions
+        @rtype: list
+        '''
+        with self._pool.connection() as conn:
+            # create a cursor
+            cur = conn.cursor()
+            # the upper bound of each partition is read from its definition
+            cur.execute("""SELECT c.relname FROM pg_inherits AS i 
+                        JOIN pg_class AS c ON c.oid = i.inhrelid 
+                        WHERE i.inhparent = %s::regclass AND substring(pg_get_expr(c.relpartbound, 
+                        c.oid) from 'TO \\(''([^'']+)''\\)')::timestamp with time zone 
+                        <= to_timestamp(%s)""", (self._history, t))
+            dropped = [r[0] for r in cur.fetchall()]
+            for name in dropped:
+                cur.execute("""DROP TABLE """ + name)
+            conn.commit()
+            cur.close()
+        with self._lock:
+            self._partitions.clear()
+        return dropped
+
+    def _start(self, stamp):
+        '''
+        Get the start of the partition the given time belongs to.
+
+        @param stamp: the unix time
+        @type  stamp: float
+        @return: the unix time of the start of the partition
+        @rtype: int
+        '''
+        return int(stamp // self._span) * self._span
+
+    def _create_partition(self, cur, start):
+        '''
+        Create the partition starting at the given time with the given cursor, if it does not
+        already exist.
+
+        @param cur: the cursor of the transaction to create the partition in
+        @type  cur: Cursor
+        @param start: the unix time of the start of the partition
+        @type  start: int
+        '''
+        begin = datetime.datetime.utcfromtimestamp(start)
+        name = self._history + '_' + begin.strftime('%Y%m%d')
+        # the bounds must be literals
+        bounds = tuple([d.strftime('%Y-%m-%d %H:%M:%S+00') for d in 
+                        (begin, begin + datetime.timedelta(seconds=self._span))])
+        # serialize creators, so that only one of them creates each partition
+        cur.execute("""SELECT pg_advisory_xact_lock(hashtext(%s))""", (name,))
+        cur.execute("""CREATE TABLE IF NOT EXISTS """ + name + """ PARTITION OF """ + 
+                    self._history + """ FOR VALUES FROM (%s) TO (%s)""", bounds)
@@ -0,0 +1,146 @@
+# Software License Agreement (BSD License)
+#
+# Copyright (c) 2013, Willow Garage, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above
+# copyright notice, this list of conditions and the following
+# disclaimer in the documentation and/or other materials provided
+# with the distribution.
+# * Neither the name of Willow Garage, Inc. nor the names of its
+# contributors may be used to endorse or promote products derived
+# from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+'''
+The PoseHistoryWriter class buffers the poses appended to the pose history and writes them in
+batches on a background thread, so that writers of instances never wait on the history.
+
+@author:  Jihoon Lee
+@version: October 16, 2026
+'''
+
+import rospy
+import threading
+import time
+
+class PoseHistoryWriter(object):
+    '''
+    The main PoseHistoryWriter object which writes buffered poses on a background thread.
+    '''
+
+    def __init__(self, connection, flush_interval=1.0, batch_size=500, max_pending=10000):
+        '''
+        Creates the PoseHistoryWriter object and starts the writer thread.
+
+        @param connection: the connection to the pose history table
+        @type  connection: PoseHistoryConnection
+        @param flush_interval: the maximum number of seconds a pose is buffered
+        @type  flush_interval: float
+        @param batch_size: the number of buffered poses which are written without waiting
+        @type  batch_size: int
+        @param max_pending: the number of buffered poses after which the oldest are dropped
+        @type  max_pending: int
+        '''
+        self._connection = connection
+        self._flush_interval = flush_interval
+        self._batch_size = batch_size
+        self._max_pending = max_pending
+        # poses waiting to be written
+        self._pending = []
+        self._written = 0
+        self._dropped = 0
+        self._running = True
+        # guards the pending poses and counters, and wakes up the writer thread
+        self._cond = threading.Condition(threading.Lock())
+        self._thread = threading.Thread(target=self._run, name='pose_history_writer')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def add(self, entity):
+        '''
+        Buffer a pose to append to the history.
+
+        @param entity: the pose, with an instance_id, a unix time stamp, and optionally a
+                       pose_frame_id, pose_position and pose_orientation
+        @type  entity: dict
+        '''
+        with self._cond:
+            self._pending.append(entity)
+            self._trim()
+            if len(self._pending) >= self._batch_size:
+                self._cond.notify()
+
+    def stop(self):
+        '''
+        Write any buffered poses and stop the writer thread.
+        '''
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        self._thread.join()
+
+    def stats(self):
+        '''
+        Get the counters of the writer.
+
+        @return: the number of poses written, dropped and currently buffered
+        @rtype: dict
+        '''
+        with self._cond:
+            return {'written' : self._written, 'dropped' : self._dropped, 
+                    'pending' : len(self._pending)}
+
+    def _run(self):
+        '''
+        The main loop of the writer thread. Poses which could not be written are kept and retried
+        on the next flush.
+        '''
+        while True:
+            with self._cond:
+                if self._running and len(self._pending) < self._batch_size:
+                    self._cond.wait(self._flush_interval)
+                batch = self._pending
+                self._pending = []
+                running = self._running
+            if len(batch) > 0:
+                try:
+                    self._connection.insert_many(batch)
+                    with self._cond:
+                        self._written += len(batch)
+                except Exception as e:
+                    rospy.logwarn('Could not write the pose history: ' + str(e))
+                    with self._cond:
+                        self._pending = batch + self._pending
+                        self._trim()
+                    if running:
+                        time.sleep(self._flush_interval)
+            if not running:
+                return
+
+    def _trim(self):
+        '''
+        Drop the oldest buffered poses beyond the maximum. The lock must be held.
+        '''
+        extra = len(self._pending) - self._max_pending
+        if extra > 0:
+            del self._pending[:extra]
+            self._dropped += extra
@@ -0,0 +1,313 @@
+# Software License Agreement (BSD License)
+#
+# Copyright (c) 2013, Willow Garage, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above
+# copyright notice, this list of conditions and the following
+# disclaimer in the documentation and/or other materials provided
+# with the distribution.
+# * Neither the name of Willow Garage, Inc. nor the names of its
+# contributors may be used to endorse or promote products derived
+# from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+'''
+The ReplicatedPool class routes the connections of the worldlib connection classes between a
+primary PostgreSQL World Model database and its streaming read replicas. Blocks which may write
+always run on the primary, while searches and gets are spread over the replicas. A replica which
+cannot be reached is skipped for a while, and reads fall back to the primary if no replica is
+available.
+
+With read-your-writes, the position in the write-ahead log of the last write made through the pool
+is remembered, and a replica is only used once it has replayed up to that position. Otherwise the
+read runs on the primary, so a search never misses an instance which was just created. While every
+replica is being skipped, writes do not look up their position; the position of the primary is
+looked up once by the next read which could use a replica instead.
+
+@author:  Jihoon Lee
+@version: October 16, 2026
+'''
+
+import itertools
+import psycopg2
+import threading
+import time
+from contextlib import contextmanager
+from worldlib.connection_pool import PoolTimeoutError
+
+class ReplicatedPool(object):
+    '''
+    The main ReplicatedPool object which holds the ConnectionPool of the primary and of each
+    replica.
+    '''
+
+    def __init__(self, primary, replicas, read_your_writes=True, retry_interval=5.0):
+        '''
+        Creates the ReplicatedPool object.
+
+        @param primary: the pool of the primary database
+        @type  primary: ConnectionPool
+        @param replicas: the pools of the read replicas
+        @type  replicas: list
+        @param read_your_writes: if reads should only use replicas which have replayed the last
+                                 write made through this pool
+        @type  read_your_writes: bool
+        @param retry_interval: the number of seconds an unreachable replica is skipped for
+        @type  retry_interval: float
+        '''
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.read_your_writes = read_your_writes
+        self.retry_interval = retry_interval
+        # statements are only run by writes, which always use the primary
+        self.statements = primary.statements
+        self.metrics = primary.metrics
+        # the log position of the last write, and the last position replayed by each replica
+        self._written = 0
+        # if writes were made without looking up their position
+        self._unknown = False
+        self._replayed = [0] * len(self.replicas)
+        # the time until which each replica is skipped
+        self._down = [0.0] * len(self.replicas)
+        # spreads the reads over the replicas
+        self._next = itertools.count()
+        # guards the log positions and the down times
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self, write=True):
+        '''
+        Context manager which checks out a connection for the duration of the block, as in
+        ConnectionPool. Blocks which may write use the primary; other blocks use the first
+        available replica which is up to date.
+
+        @param write: if the block may write
+        @type  write: bool
+        @return: the checked out connection
+        @rtype:  connection
+        '''
+        if write:
+            with self.primary.connection() as conn:
+                yield conn
+                if self.read_your_writes:
+                    self._wrote(conn)
+            return
+        start = time.time()
+        for index in self._candidates():
+            replica = self.replicas[index]
+            try:
+                conn = replica.getconn()
+            except PoolTimeoutError:
+                # the replica is busy but reachable, try the next replica
+                self._count('replica.busy')
+                continue
+            except psycopg2.OperationalError:
+                # the connection could not be opened, try the next replica
+                self._fail(index)
+                continue
+            try:
+                current = self._is_current(index, conn)
+            except:
+                broken = conn.closed
+                replica.putconn(conn, discard=True)
+                if not broken:
+                    raise
+                # the connection was lost, try the next replica
+                self._fail(index)
+                continue
+            if not current:
+                # the replica has not replayed the last write yet, try the next replica
+                replica.putconn(conn)
+                self._count('replica.behind')
+                continue
+            if self.metrics is not None:
+                self.metrics.observe('pool.wait', time.time() - start)
+            with replica.hold(conn) as conn:
+                try:
+                    yield conn
+                except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                    # only a lost connection means the replica is down (not, e.g., a cancelled
+                    # query or a recovery conflict)
+                    if conn.closed:
+                        self._fail(index)
+                    raise
+            return
+        # no replica can serve the read, or none of them is up to date
+        with self.primary.connection() as conn:
+            yield conn
+
+    def close(self):
+        '''
+        Close the pools of the primary and of each replica.
+        '''
+        self.primary.close()
+        for replica in self.replicas:
+            replica.close()
+
+    def stats(self):
+        '''
+        Get the number of open and idle connections of all pools, and the number of replicas which
+        are not being skipped.
+
+        @return: the number of connections as 'size' and 'idle', and of replicas as 'replicas'
+        @rtype: dict
+        '''
+        final = self.primary.stats()
+        for replica in self.replicas:
+            stats = replica.stats()
+            final['size'] += stats['size']
+            final['idle'] += stats['idle']
+        now = time.time()
+        with self._lock:
+            final['replicas'] = len([d for d in self._down if d <= now])
+        return final
+
+    def _candidates(self):
+        '''
+        Get the replicas to try for a read, in turn starting from the next replica. Replicas which
+        recently could not be reached are left out.
+
+        @return: the indexes of the replicas
+        @rtype:  list
+        '''
+        n = len(self.replicas)
+        if n is 0:
+            return []
+        first = self._next.next() % n
+        now = time.time()
+        with self._lock:
+            return [i % n for i in range(first, first + n) if self._down[i % n] <= now]
+
+    def _is_current(self, index, conn):
+        '''
+        Check if the given replica has replayed the last write made through this pool. The log
+        position of the replica is only queried if the last position it was seen at is older.
+
+        @param index: the index of the replica
+        @type  index: int
+        @param conn: a connection to the replica
+        @type  conn: connection
+        @return: if the replica is up to date
+        @rtype:  bool
+        '''
+        if not self.read_your_writes:
+            return True
+        with self._lock:
+            unknown = self._unknown
+            self._unknown = False
+        if unknown:
+            try:
+                with self.primary.connection() as primary:
+                    written = self._position(primary)
+            except:
+                with self._lock:
+                    self._unknown = True
+                raise
+            with self._lock:
+                self._written = max(self._written, written)
+        with self._lock:
+            written = self._written
+            if self._replayed[index] >= written:
+                return True
+        cur = conn.cursor()
+        cur.execute("""SELECT pg_last_wal_replay_lsn()::text""")
+        replayed = _lsn(cur.fetchone()[0])
+        cur.close()
+        conn.rollback()
+        with self._lock:
+            self._replayed[index] = max(self._replayed[index], replayed)
+        return replayed >= written
+
+    def _wrote(self, conn):
+        '''
+        Remember the current log position of the primary after a write. The position is looked up
+        after the write was committed, since a replica has to replay the commit for the write to
+        be seen. While no replica can be used, the lookup is left to the next read instead.
+
+        @param conn: the connection the write was made with
+        @type  conn: connection
+        '''
+        now = time.time()
+        with self._lock:
+            if all([d > now for d in self._down]):
+                self._unknown = True
+                return
+        written = self._position(conn)
+        with self._lock:
+            self._written = max(self._written, written)
+
+    def _position(self, conn):
+        '''
+        Get the current log position of the primary. The query runs outside of a transaction, so
+        it takes a single round trip.
+
+        @param conn: a connection to the primary
+        @type  conn: connection
+        @return: the log position
+        @rtype:  int
+        '''
+        # discards anything left uncommitted, which is only sent if a transaction is open
+        conn.rollback()
+        conn.autocommit = True
+        try:
+            cur = conn.cursor()
+            cur.execute("""SELECT pg_current_wal_lsn()::text""")
+            position = _lsn(cur.fetchone()[0])
+            cur.close()
+        finally:
+            conn.autocommit = False
+        return position
+
+    def _fail(self, index):
+        '''
+        Skip the given replica for the retry interval.
+
+        @param index: the index of the replica
+        @type  index: int
+        '''
+        with self._lock:
+            self._down[index] = time.time() + self.retry_interval
+        self._count('replica.failover')
+
+    def _count(self, name):
+        '''
+        Add to the named counter, if measurements are enabled.
+
+        @param name: the name of the counter
+        @type  name: string
+        '''
+        if self.metrics is not None:
+            self.metrics.count(name)
+
+def _lsn(text):
+    '''
+    Convert a textual log position (e.g., '0/16B3748') to an int which can be compared.
+
+    @param text: the log position (None if the server is not replaying a log)
+    @type  text: string
+    @return: the log position, or 0 if it is not known
+    @rtype:  int
+    '''
+    if text is None:
+        return 0
+    high, low = text.split('/')
+    return (int(high, 16) << 32) + int(low, 16)
@@ -0,0 +1,398 @@
+# Software License Agreement (BSD License)
+#
+# Copyright (c) 2013, Willow Garage, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above
+# copyright notice, this list of conditions and the following
+# disclaimer in the documentation and/or other materials provided
+# with the distribution.
+# * Neither the name of Willow Garage, Inc. nor the names of its
+# contributors may be used to endorse or promote products derived
+# from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Functions to export the World Model to a compact binary snapshot file and to load it back, e.g.,
+to warm start a new database or as a backup. The file starts with a magic string and a format
+version byte, followed by a sequence of records, each a kind byte, a 4 byte length and a zlib
+compressed body holding a chunk of rows, so both directions stream through the file one chunk at
+a time. Rows are encoded as JSON; the binary data of descriptors and tiles follows them as length
+prefixed blobs. The ids of the rows are reassigned by the database they are loaded into;
+references between them are remapped while loading.
+
+@author:  Jihoon Lee
+@version: October 16, 2026
+'''
+
+import json
+import struct
+import time
+import zlib
+from worldlib.map_tile_connection import MapTileConnection
+from worldlib.storage import Storage
+
+# the first bytes of every snapshot file
+MAGIC = 'WMSNAP'
+# the version of the file format
+FORMAT = 2
+
+# the header of the snapshot
+HEADER = 'H'
+# a chunk of world object descriptions
+DESCRIPTIONS = 'D'
+# a chunk of descriptors, followed by their data
+DESCRIPTORS = 'R'
+# a chunk of map tiles, each with the descriptor it belongs to
+TILES = 'T'
+# a chunk of world object instances
+INSTANCES = 'I'
+# the number of rows of each kind written, which marks the end of a complete snapshot
+END = 'E'
+
+# the kinds of rows counted in a snapshot
+KINDS = {DESCRIPTIONS : 'descriptions', DESCRIPTORS : 'descriptors', TILES : 'tiles', 
+         INSTANCES : 'instances'}
+
+# the length of a blob
+_LENGTH = struct.Struct('>I')
+# the descriptor_id, x, y, width and height of a tile, and the length of its data
+_TILE = struct.Struct('>qiiiiI')
+# the length of a string or array in a ROS serialized message
+_ROS_LENGTH = struct.Struct('<I')
+
+def export_snapshot(storage, f, tags=None, start=None, end=None, maps=None, chunk_size=1000):
+    '''
+    Write a snapshot of the World Model to the given file. If tags or a time range are given, only
+    the matching instances and the descriptions (and descriptors) they reference are exported.
+
+    @param storage: the storage to export
+    @type  storage: Storage
+    @param f: the file to write to, opened in binary mode
+    @type  f: file
+    @param tags: if given, only export instances that contain all of these tags
+    @type  tags: list
+    @param start: if given, the earliest update time (unix time) of the instances exported
+    @type  start: float
+    @param end: if given, the latest update time (unix time) of the instances exported
+    @type  end: float
+    @param maps: if given, the connection to export the tiles of tiled maps from
+    @type  maps: MapTileConnection
+    @param chunk_size: the maximum number of rows in each record
+    @type  chunk_size: int
+    @return: the number of rows exported, keyed by kind (e.g., 'instances')
+    @rtype:  dict
+    '''
+    counts = dict([(k, 0) for k in KINDS.keys()])
+    f.write(MAGIC + chr(FORMAT))
+    _write(f, HEADER, {'created' : time.time(), 'tags' : tags, 'start' : start, 'end' : end})
+    # only the descriptions referenced by the exported instances are needed if they are filtered
+    referenced = None
+    if tags or start is not None or end is not None:
+        referenced = set()
+        for chunk in storage.instances.stream(chunk_size, tags, start, end):
+            referenced.update([e['description_id'] for e in chunk])
+    for chunk in storage.descriptions.stream(chunk_size):
+        if referenced is not None:
+            chunk = [e for e in chunk if e['description_id'] in referenced]
+        if len(chunk) is 0:
+            continue
+        _write(f, DESCRIPTIONS, chunk)
+        counts[DESCRIPTIONS] += len(chunk)
+        # descriptors can be large, so only those of a few descriptions are loaded at once
+        description_ids = [e['description_id'] for e in chunk]
+        for i in range(0, len(description_ids), 16):
+            found = storage.descriptors.search_by_description_ids(description_ids[i:i + 16])
+            descriptors = [d for ds in found.values() for d in ds]
+            if len(descriptors) is 0:
+                continue
+            _write(f, DESCRIPTORS, descriptors)
+            counts[DESCRIPTORS] += len(descriptors)
+            # the grids of tiled maps are not part of the descriptors
+            tiled = [d['descriptor_id'] for d in descriptors 
+                     if d['encoding'] == MapTileConnection.ENCODING]
+            if maps is not None and len(tiled) > 0:
+                tiles = maps.search_tiles(tiled).items()
+                _write(f, TILES, tiles)
+                counts[TILES] += sum([len(t) for d, t in tiles])
+    for chunk in storage.instances.stream(chunk_size, tags, start, end):
+        _write(f, INSTANCES, chunk)
+        counts[INSTANCES] += len(chunk)
+    _write(f, END, dict([(KINDS[k], v) for k, v in counts.items()]))
+    return dict([(KINDS[k], v) for k, v in counts.items()])
+
+def import_snapshot(storage, f, maps=None):
+    '''
+    Load a snapshot into the World Model. Every row is inserted as a new row, with the references
+    to the descriptions and descriptors of the snapshot remapped to their new ids. Backends which
+    support it load each chunk with COPY. The load is not atomic: each chunk is committed as it is
+    inserted, so if an error is raised part way through, the rows loaded before it remain in the
+    World Model.
+
+    @param storage: the storage to load the snapshot into
+    @type  storage: Storage
+    @param f: the file to read from, opened in binary mode
+    @type  f: file
+    @param maps: if given, the connection to store the tiles of tiled maps with (otherwise tiled
+                 grids are assembled and loaded as plain ROS serialized grids)
+    @type  maps: MapTileConnection
+    @return: the number of rows loaded, keyed by kind (e.g., 'instances'), and the number of
+             tiles which were assembled into plain grids as 'merged_tiles'
+    @rtype:  dict
+    '''
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError('Not a World Model snapshot.')
+    version = ord(f.read(1) or '\x00')
+    if version != FORMAT:
+        raise ValueError('Unsupported snapshot format ' + str(version) + '.')
+    counts = dict([(k, 0) for k in KINDS.values()])
+    counts['merged_tiles'] = 0
+    copy = storage.supports(Storage.COPY)
+    def insert(connection, rows):
+        return connection.copy_many(rows) if copy else connection.insert_many(rows)
+    # the new ids of the rows of the snapshot
+    descriptions = {}
+    descriptors = {}
+    # without a map connection, tiled descriptors are held back until their tiles were read
+    held = []
+    merged = {}
+    while True:
+        kind, payload = _read(f)
+        if kind is None:
+            raise ValueError('Snapshot is truncated.')
+        # the tiles of a chunk of descriptors directly follow it
+        if kind != TILES and len(held) > 0:
+            for e in held:
+                e['data'] = _untile(e['data'], merged.get(e['descriptor_id'], []))
+                e['encoding'] = 'ros'
+            old = [e.pop('descriptor_id') for e in held]
+            descriptors.update(zip(old, insert(storage.descriptors, held)))
+            counts[KINDS[DESCRIPTORS]] += len(held)
+            held = []
+            merged = {}
+        if kind == HEADER:
+            continue
+        elif kind == DESCRIPTIONS:
+            old = [e['description_id'] for e in payload]
+            descriptions.update(zip(old, insert(storage.descriptions, payload)))
+        elif kind == DESCRIPTORS:
+            old = [e['descriptor_id'] for e in payload]
+            for e in payload:
+                e['description_id'] = descriptions.get(e['description_id'])
+                # the data of descriptors without any is left unset
+                if e['data'] is None:
+                    del e['data']
+            if maps is None:
+                tiled = [e['encoding'] == MapTileConnection.ENCODING and 'data' in e 
+                         for e in payload]
+                held = [e for e, t in zip(payload, tiled) if t]
+                payload = [e for e, t in zip(payload, tiled) if not t]
+                old = [e['descriptor_id'] for e in payload]
+            descriptors.update(zip(old, insert(storage.descriptors, payload)))
+        elif kind == TILES:
+            for descriptor_id, tiles in payload:
+                if maps is None:
+                    merged.setdefault(descriptor_id, []).extend(tiles)
+                    counts['merged_tiles'] += len(tiles)
+                else:
+                    maps.insert_tiles(descriptors[descriptor_id], tiles)
+                    counts[KINDS[kind]] += len(tiles)
+            continue
+        elif kind == INSTANCES:
+            for e in payload:
+                e['description_id'] = descriptions.get(e['description_id'])
+            insert(storage.instances, payload)
+        elif kind == END:
+            # every row of the snapshot must have been seen
+            expected = dict(payload)
+            expected[KINDS[TILES]] -= counts['merged_tiles']
+            for k in KINDS.values():
+                if expected[k] != counts[k]:
+                    raise ValueError('Snapshot is corrupt: expected ' + str(expected[k]) + ' ' + 
+                                     k + ' but found ' + str(counts[k]) + '.')
+            return counts
+        else:
+            raise ValueError('Unknown snapshot record: ' + repr(kind))
+        counts[KINDS[kind]] += len(payload)
+
+def _untile(data, tiles):
+    '''
+    Assemble a tiled grid into a plain ROS serialized grid.
+
+    @param data: the ROS serialized OccupancyGrid of the descriptor, without its cells
+    @type  data: string
+    @param tiles: the tiles of the grid as (x, y, width, height, data) tuples
+    @type  tiles: list
+    @return: the ROS serialized OccupancyGrid with its cells
+    @rtype:  string
+    '''
+    # the info follows the sequence number, stamp and frame ID of the header, and its width and
+    # height follow the load time and resolution; the (empty) cells follow the origin pose
+    try:
+        info = 16 + _ROS_LENGTH.unpack_from(data, 12)[0]
+        width, height = struct.unpack_from('<II', data, info + 12)
+    except struct.error:
+        raise ValueError('Snapshot is corrupt: a tiled grid has no valid info.')
+    cells = info + 20 + 7 * 8
+    if len(data) != cells + 4 or data[cells:] != '\x00' * 4:
+        raise ValueError('Snapshot is corrupt: a tiled grid has cells of its own.')
+    return (data[:cells] + _ROS_LENGTH.pack(width * height) + 
+            MapTileConnection.assemble(tiles, 0, 0, width, height))
+
+def _write(f, kind, payload):
+    '''
+    Write a record to a snapshot.
+
+    @param f: the file to write to
+    @type  f: file
+    @param kind: the kind of the record (e.g., INSTANCES)
+    @type  kind: string
+    @param payload: the rows of the record
+    @type  payload: object
+    '''
+    data = zlib.compress(_encode(kind, payload), 1)
+    f.write(kind + _LENGTH.pack(len(data)) + data)
+
+def _read(f):
+    '''
+    Read the next record of a snapshot.
+
+    @param f: the file to read from
+    @type  f: file
+    @return: the kind and rows of the record, or (None, None) at the end of the file
+    @rtype:  tuple
+    '''
+    head = f.read(1 + _LENGTH.size)
+    if len(head) < 1 + _LENGTH.size:
+        return (None, None)
+    length = _LENGTH.unpack(head[1:])[0]
+    data = f.read(length)
+    if len(data) < length:
+        return (None, None)
+    try:
+        return (head[0], _decode(head[0], zlib.decompress(data)))
+    except (zlib.error, struct.error, ValueError, TypeError) as e:
+        raise ValueError('Snapshot is corrupt: ' + str(e))
+
+def _encode(kind, payload):
+    '''
+    Encode the rows of a record. Descriptors are a length prefixed JSON list, with their data
+    replaced by a flag, followed by the data of those which have any as length prefixed blobs.
+    Tiles are fixed size fields followed by their data. Every other record is plain JSON.
+
+    @param kind: the kind of the record
+    @type  kind: string
+    @param payload: the rows of the record
+    @type  payload: object
+    @return: the encoded rows
+    @rtype:  string
+    '''
+    if kind == DESCRIPTORS:
+        rows = [dict(d, data=d['data'] is not None) for d in payload]
+        parts = [_blob(json.dumps(rows))]
+        parts.extend([_blob(str(d['data'])) for d in payload if d['data'] is not None])
+        return ''.join(parts)
+    elif kind == TILES:
+        return ''.join([_TILE.pack(descriptor_id, x, y, w, h, len(data)) + str(data) 
+                        for descriptor_id, tiles in payload for x, y, w, h, data in tiles])
+    return json.dumps(payload)
+
+def _decode(kind, data):
+    '''
+    Decode the rows of a record written by _encode.
+
+    @param kind: the kind of the record
+    @type  kind: string
+    @param data: the encoded rows
+    @type  data: string
+    @return: the rows of the record
+    @rtype:  object
+    '''
+    if kind == DESCRIPTORS:
+        rows, offset = _unblob(data, 0)
+        rows = _strings(json.loads(rows))
+        for d in rows:
+            if d['data']:
+                d['data'], offset = _unblob(data, offset)
+            else:
+                d['data'] = None
+        return rows
+    elif kind == TILES:
+        # tiles of the same descriptor are written next to each other
+        tiles = []
+        offset = 0
+        while offset < len(data):
+            descriptor_id, x, y, w, h, length = _TILE.unpack_from(data, offset)
+            offset += _TILE.size
+            if len(tiles) is 0 or tiles[-1][0] != descriptor_id:
+                tiles.append((descriptor_id, []))
+            tiles[-1][1].append((x, y, w, h, data[offset:offset + length]))
+            offset += length
+        if offset != len(data):
+            raise ValueError('tile data is truncated')
+        return tiles
+    return _strings(json.loads(data))
+
+def _blob(data):
+    '''
+    Prefix binary data with its length.
+
+    @param data: the data
+    @type  data: string
+    @return: the length prefixed data
+    @rtype:  string
+    '''
+    return _LENGTH.pack(len(data)) + data
+
+def _unblob(data, offset):
+    '''
+    Read length prefixed binary data.
+
+    @param data: the data to read from
+    @type  data: string
+    @param offset: the offset of the length prefix
+    @type  offset: int
+    @return: the binary data and the offset after it
+    @rtype:  tuple
+    '''
+    length = _LENGTH.unpack_from(data, offset)[0]
+    offset += _LENGTH.size
+    if offset + length > len(data):
+        raise ValueError('blob is truncated')
+    return (data[offset:offset + length], offset + length)
+
+def _strings(value):
+    '''
+    Convert the unicode strings decoded from JSON back to UTF-8 encoded strings, as they were
+    read from the database.
+
+    @param value: the decoded JSON value
+    @type  value: object
+    @return: the value with UTF-8 encoded strings
+    @rtype:  object
+    '''
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+    elif isinstance(value, list):
+        return [_strings(v) for v in value]
+    elif isinstance(value, dict):
+        return dict([(_strings(k), _strings(v)) for k, v in value.items()])
+    return value
@@ -0,0 +1,267 @@
+# Software License Agreement (BSD License)
+#
+# Copyright (c) 2013, Willow Garage, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above
+# copyright notice, this list of conditions and the following
+# disclaimer in the documentation and/or other materials provided
+# with the distribution.
+# * Neither the name of Willow Garage, Inc. nor the names of its
+# contributors may be used to endorse or promote products derived
+# from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+'''
+The SqliteDescriptorConnection class provides the functions of the DescriptorConnection for an
+embedded SQLite World Model database. Descriptor data is compressed as it is for PostgreSQL and
+stored in its own table, so that metadata searches never read it.
+
+@author:  Jihoon Lee
+@version: October 16, 2026
+'''
+
+import sqlite3
+from worldlib.sqlite_pool import SqlitePool
+from worldlib.sqlite_schema import to_array, from_array
+from worldlib.descriptor_digest import compute_digest
+from worldlib import descriptor_codec
+
+class SqliteDescriptorConnection(object):
+    '''
+    The main SqliteDescriptorConnection object which communicates with the SQLite World Model
+    database.
+    '''
+
+    def __init__(self, path, pool=None, codec=descriptor_codec.ZLIB):
+        '''
+        Creates the SqliteDescriptorConnection object.
+        
+        @param path: the path of the database file
+        @type  path: string
+        @param pool: a shared connection pool to use instead of creating a private one
+        @type  pool: SqlitePool
+        @param codec: the codec used to compress new data (see descriptor_codec)
+        @type  codec: string
+        '''
+        # name of the descriptors table
+        self._descriptors = 'descriptors'
+        # name of the table holding the data of the descriptors
+        self._data = 'descriptor_data'
+        # columns in the order expected by _db_to_dict, with a place holder for the data
+        self._columns = ('d.descriptor_id, d.description_id, d.type, %s, d.ref, d.tags, '
+                         'd.digest, d.codec, d.encoding')
+        # make sure the codec exists before anything is written with it
+        if codec not in descriptor_codec.available_codecs():
+            raise ValueError('Unknown or unavailable descriptor codec "' + str(codec) + '".')
+        self._codec = codec
+        # maximum number of values bound to one statement
+        self._max_variables = 500
+        # connect to the world model database
+        self._pool = pool if pool is not None else SqlitePool(path)
+
+    def insert(self, entity):
+        '''
+        Insert the given entity into the descriptors table. This will create a new descriptor. The 
+        descriptor_id will be set to a unique value and returned. The content digest of the
+        descriptor is computed and stored with it (unless one is given), and the data is
+        compressed with the codec of this connection.
+        
+        @param entity: the entity to insert with the correct keys for the columns
+        @type  entity: dict
+        @return: the descriptor_id
+        @rtype: integer
+        '''
+        return self.insert_many([entity])[0]
+
+    def insert_many(self, entities):
+        '''
+        Insert the given entities into the descriptors table in one transaction. Data is stored
+        and compressed as in insert. A unique descriptor_id will be set for each and returned.
+        
+        @param entities: the entities to insert with the correct keys for the columns
+        @type  entities: list
+        @return: the descriptor_ids, in the same order as the entities
+        @rtype: list
+        '''
+        descriptor_ids = []
+        with self._pool.connection() as conn:
+            for entity in entities:
+                self._prepare(conn, entity)
+                cols = sorted(entity.keys())
+                values = [to_array(entity[c]) if c == 'tags' else entity[c] for c in cols]
+                if len(cols) is 0:
+                    cur = conn.execute("""INSERT INTO """ + self._descriptors + 
+                                       """ DEFAULT VALUES""")
+                else:
+                    cur = conn.execute("""INSERT INTO """ + self._descriptors + """ (""" + 
+                                       ', '.join(cols) + """) VALUES (""" + 
+                                       ', '.join(['?'] * len(cols)) + """)""", values)
+                descriptor_ids.append(cur.lastrowid)
+            conn.commit()
+        return descriptor_ids
+
+    def search_by_description_id(self, description_id, include_data=True):
+        '''
+        Search for and return all entities in the descriptors table with the given description_id, 
+        if any.
+        
+        @param description_id: the description_id to search for
+        @type  description_id: int
+        @param include_data: if the contents of the data field should be loaded
+        @type  include_data: bool
+        @return: the entities found
+        @rtype:  list
+        '''
+        return self.search_by_description_ids([description_id], include_data).get(description_id, 
+                                                                                  [])
+
+    def search_by_description_ids(self, description_ids, include_data=True):
+        '''
+        Search for and return all entities in the descriptors table which belong to any of the
+        given description_ids. If include_data is False, only the metadata is loaded and the data
+        field will be None.
+        
+        @param description_ids: the description_ids to search for
+        @type  description_ids: list
+        @param include_data: if the contents of the data field should be loaded
+        @type  include_data: bool
+        @return: the entities found, keyed by description_id
+        @rtype:  dict
+        '''
+        final = {}
+        description_ids = list(description_ids)
+        with self._pool.connection(False) as conn:
+            for i in range(0, len(description_ids), self._max_variables):
+                chunk = description_ids[i:i + self._max_variables]
+                cur = conn.execute(self._build_select(include_data) + 
+                                   """ WHERE d.description_id IN (""" + 
+                                   ', '.join(['?'] * len(chunk)) + 
+                                   """) ORDER BY d.descriptor_id""", chunk)
+                for r in cur.fetchall():
+                    entity = self._db_to_dict(r)
+                    final.setdefault(entity['description_id'], []).append(entity)
+        return final
+
+    def search_descriptor_id(self, descriptor_id, include_data=True):
+        '''
+        Search for and return the entity in the descriptors table with the given descriptor_id, if
+        one exists.
+        
+        @param descriptor_id: the descriptor_id to search for
+        @type  descriptor_id: int
+        @param include_data: if the contents of the data field should be loaded
+        @type  include_data: bool
+        @return: the entity found, or None if an invalid descriptor_id was given
+        @rtype:  dict
+        '''
+        with self._pool.connection(False) as conn:
+            result = conn.execute(self._build_select(include_data) + 
+                                  """ WHERE d.descriptor_id = ?""", (descriptor_id,)).fetchone()
+        return None if result is None else self._db_to_dict(result)
+
+    def search_digest(self, digest):
+        '''
+        Search for and return all entities in the descriptors table with the given content digest.
+        Only the metadata is loaded and the data field will be None.
+        
+        @param digest: the content digest to search for
+        @type  digest: string
+        @return: the entities found
+        @rtype:  list
+        '''
+        with self._pool.connection(False) as conn:
+            results = conn.execute(self._build_select(False) + """ WHERE d.digest = ? 
+                                   ORDER BY d.descriptor_id""", (digest,)).fetchall()
+        return [self._db_to_dict(r) for r in results]
+
+    def _build_select(self, include_data):
+        '''
+        Build the start of a descriptor search, which only joins the data table if the data is
+        needed.
+        
+        @param include_data: if the contents of the data field should be loaded
+        @type  include_data: bool
+        @return: the SQL up to the WHERE clause
+        @rtype: string
+        '''
+        if include_data:
+            return ("""SELECT """ + (self._columns % 'b.data') + """ FROM """ + 
+                    self._descriptors + """ AS d LEFT JOIN """ + self._data + 
+                    """ AS b ON b.data_id = d.data""")
+        return ("""SELECT """ + (self._columns % 'NULL') + """ FROM """ + self._descriptors + 
+                """ AS d""")
+
+    def _prepare(self, conn, entity):
+        '''
+        Prepare an entity for insertion. The descriptor_id is removed, the content digest is
+        computed (unless one is given), and any data is compressed and written to the data table
+        whose row ID takes the place of the data.
+        
+        @param conn: the connection the entity will be inserted with
+        @type  conn: Connection
+        @param entity: the entity to prepare
+        @type  entity: dict
+        '''
+        # ensure the descriptor ID does not get set by the user
+        if 'descriptor_id' in entity.keys():
+            del entity['descriptor_id']
+        # index the contents so duplicates can be found without reading the data
+        if 'digest' not in entity.keys():
+            entity['digest'] = compute_digest(entity.get('type'), entity.get('ref'), 
+                                              entity.get('data'))
+        # check if there is data
+        if 'data' in entity.keys():
+            data = descriptor_codec.encode(self._codec, entity['data'])
+            cur = conn.execute("""INSERT INTO """ + self._data + """ (data) VALUES (?)""", 
+                               (sqlite3.Binary(data),))
+            entity['data'] = cur.lastrowid
+            entity['codec'] = self._codec
+
+    def _db_to_dict(self, entity):
+        '''
+        Convert a database tuple to a dict. This function assumes the tuple is in the correct order
+        and that the contents of the data field have already been loaded. The data will be 
+        decompressed with the codec it was stored with.
+        
+        @param entity: the entity to build the dictionary for
+        @type  entity: tuple
+        @return: the dictionary containing the information from the database
+        @rtype: dict
+        '''
+        # decompress the data
+        if entity[3] is not None:
+            data = descriptor_codec.decode(entity[7], str(entity[3]))
+        else:
+            data = None
+        # convert each one assuming the ordering is correct
+        final = {
+                'descriptor_id' : entity[0],
+                'description_id' : entity[1],
+                'type' : entity[2],
+                'data' : data,
+                'ref' : entity[4],
+                'tags' : from_array(entity[5]),
+                'digest' : entity[6],
+                'codec' : entity[7],
+                'encoding' : entity[8],
+                }
+        return final
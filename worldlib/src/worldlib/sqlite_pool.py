@@ -0,0 +1,198 @@
+# Software License Agreement (BSD License)
+#
+# Copyright (c) 2013, Willow Garage, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above
+# copyright notice, this list of conditions and the following
+# disclaimer in the documentation and/or other materials provided
+# with the distribution.
+# * Neither the name of Willow Garage, Inc. nor the names of its
+# contributors may be used to endorse or promote products derived
+# from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+'''
+The SqlitePool class provides the connections to an embedded SQLite World Model database with the
+same interface as the ConnectionPool. Each thread uses its own connection, and the database is
+kept in WAL mode so that readers never wait for the writer. Writes are serialized by the pool, so
+a write transaction (e.g., an upsert) cannot be interleaved with another write of the process.
+
+@author:  Jihoon Lee
+@version: October 16, 2026
+'''
+
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+class SqlitePool(object):
+    '''
+    The main SqlitePool object which manages the connections to an SQLite World Model database.
+    '''
+
+    def __init__(self, path, timeout=30.0, metrics=None):
+        '''
+        Creates the SqlitePool object.
+
+        @param path: the path of the database file (':memory:' for a private in-memory database)
+        @type  path: string
+        @param timeout: the number of seconds to wait for another process to finish writing
+        @type  timeout: float
+        @param metrics: the Metrics object to time statements and write waits with (None to
+                        disable)
+        @type  metrics: Metrics
+        '''
+        self.path = path
+        self.timeout = timeout
+        self.metrics = metrics
+        # statements are prepared and cached by the sqlite3 module itself
+        self.statements = None
+        # an in-memory database only exists on one connection, which all threads share
+        self._shared = path == ':memory:'
+        self._factory = sqlite3.Connection
+        if metrics is not None:
+            self._factory = type('InstrumentedConnection', (InstrumentedConnection,), 
+                                 {'metrics' : metrics})
+        # connection of each thread
+        self._local = threading.local()
+        # every connection opened, so that they can be closed
+        self._connections = []
+        self._closed = False
+        # serializes writes (and all access to a shared connection)
+        self._lock = threading.RLock()
+        # guards the list of connections
+        self._connections_lock = threading.Lock()
+
+    @contextmanager
+    def connection(self, write=True):
+        '''
+        Context manager which provides the connection of the calling thread for the duration of
+        the block. Write blocks run in a transaction which holds the write lock of the database
+        from the start; it must be committed by the caller and is rolled back otherwise. Read
+        blocks run each statement on the latest committed state.
+
+        @param write: if the block may modify the database
+        @type  write: bool
+        @return: the connection
+        @rtype:  Connection
+        '''
+        locked = write or self._shared
+        start = time.time()
+        if locked:
+            self._lock.acquire()
+        acquired = time.time()
+        if self.metrics is not None:
+            self.metrics.observe('pool.wait', acquired - start)
+        try:
+            conn = self._connection()
+            if write:
+                conn.execute("""BEGIN IMMEDIATE""")
+            try:
+                yield conn
+            finally:
+                # a no-op if the block committed
+                conn.rollback()
+        finally:
+            if locked:
+                self._lock.release()
+            if self.metrics is not None:
+                self.metrics.observe('pool.hold', time.time() - acquired)
+
+    def stats(self):
+        '''
+        Get the number of open connections of the pool. Connections belong to threads, so none
+        are ever idle.
+
+        @return: the number of connections as 'size' and 'idle'
+        @rtype: dict
+        '''
+        with self._connections_lock:
+            return {'size' : len(self._connections), 'idle' : 0}
+
+    def close(self):
+        '''
+        Close all connections and prevent new ones from being opened.
+        '''
+        with self._connections_lock:
+            self._closed = True
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._connections = []
+
+    def _connection(self):
+        '''
+        Get the connection of the calling thread, opening it if needed.
+
+        @return: the connection
+        @rtype:  Connection
+        '''
+        conn = self._connections[0] if self._shared and self._connections else None
+        if not self._shared:
+            conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            return conn
+        with self._connections_lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError('connection pool is closed')
+            # transactions are started explicitly so that reads never hold one open
+            conn = sqlite3.connect(self.path, self.timeout, isolation_level=None, 
+                                   check_same_thread=not self._shared, factory=self._factory)
+            # strings are returned as UTF-8 byte strings, as they are by psycopg2
+            conn.text_factory = str
+            conn.execute("""PRAGMA foreign_keys = ON""")
+            if not self._shared:
+                # WAL only syncs at checkpoints, so a commit does not wait for the disk
+                conn.execute("""PRAGMA journal_mode = WAL""")
+                conn.execute("""PRAGMA synchronous = NORMAL""")
+            self._connections.append(conn)
+        self._local.conn = conn
+        return conn
+
+class InstrumentedConnection(sqlite3.Connection):
+    '''
+    A connection which times each statement. The Metrics object is set on the subclass made by
+    SqlitePool.
+    '''
+
+    metrics = None
+
+    def execute(self, sql, parameters=()):
+        '''
+        Execute and time a statement.
+        '''
+        start = time.time()
+        cur = sqlite3.Connection.execute(self, sql, parameters)
+        self.metrics.query(sql, time.time() - start, cur.rowcount)
+        return cur
+
+    def executemany(self, sql, parameters):
+        '''
+        Execute and time a statement for each set of parameters.
+        '''
+        start = time.time()
+        cur = sqlite3.Connection.executemany(self, sql, parameters)
+        self.metrics.query(sql, time.time() - start, cur.rowcount)
+        return cur
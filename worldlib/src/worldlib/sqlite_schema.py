@@ -0,0 +1,190 @@
+# Software License Agreement (BSD License)
+#
+# Copyright (c) 2013, Willow Garage, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above
+# copyright notice, this list of conditions and the following
+# disclaimer in the documentation and/or other materials provided
+# with the distribution.
+# * Neither the name of Willow Garage, Inc. nor the names of its
+# contributors may be used to endorse or promote products derived
+# from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+'''
+The schema of the embedded SQLite World Model database and the helpers for the values stored in
+it. The tables follow the PostgreSQL schema: identifiers are never reused, timestamps are unix
+time and arrays (e.g., tags) are JSON text. Each tag array is also kept as one row per tag in a
+side table, which takes the place of the GIN indexes for containment searches. Descriptor data is
+stored in its own table, as PostgreSQL stores it in Large Objects.
+
+@author:  Jihoon Lee
+@version: October 16, 2026
+'''
+
+import json
+
+# version of the PostgreSQL schema this schema matches
+VERSION = '0.0.10'
+# name of the main version table
+_version = 'version'
+
+# tables and indexes of the current version
+_schema = """
+    CREATE TABLE version (
+        version TEXT
+    );
+    CREATE TABLE world_object_descriptions (
+        description_id INTEGER PRIMARY KEY AUTOINCREMENT, 
+        name TEXT, 
+        tags TEXT
+    );
+    CREATE TABLE world_object_description_tags (
+        tag TEXT NOT NULL, 
+        description_id INTEGER NOT NULL 
+            REFERENCES world_object_descriptions (description_id) ON DELETE CASCADE, 
+        PRIMARY KEY (tag, description_id)
+    );
+    CREATE INDEX world_object_description_tags_description_id 
+        ON world_object_description_tags (description_id);
+    CREATE TABLE descriptor_data (
+        data_id INTEGER PRIMARY KEY AUTOINCREMENT, 
+        data BLOB NOT NULL
+    );
+    CREATE TABLE descriptors (
+        descriptor_id INTEGER PRIMARY KEY AUTOINCREMENT, 
+        description_id INTEGER REFERENCES world_object_descriptions (description_id), 
+        type TEXT, 
+        data INTEGER REFERENCES descriptor_data (data_id), 
+        ref TEXT, 
+        tags TEXT, 
+        digest TEXT, 
+        codec TEXT, 
+        encoding TEXT
+    );
+    CREATE INDEX descriptors_description_id ON descriptors (description_id);
+    CREATE INDEX descriptors_digest ON descriptors (digest);
+    CREATE TABLE world_object_instances (
+        instance_id INTEGER PRIMARY KEY AUTOINCREMENT, 
+        name TEXT, 
+        creation REAL, 
+        "update" REAL, 
+        expected_ttl INTEGER, 
+        perceived_end REAL, 
+        source_origin TEXT, 
+        source_creator TEXT, 
+        pose_seq INTEGER, 
+        pose_stamp REAL, 
+        pose_frame_id TEXT, 
+        pose_position TEXT, 
+        pose_orientation TEXT, 
+        pose_covariance TEXT, 
+        description_id INTEGER REFERENCES world_object_descriptions (description_id) 
+            ON UPDATE CASCADE ON DELETE SET NULL, 
+        properties TEXT, 
+        tags TEXT, 
+        pose_x REAL, 
+        pose_y REAL
+    );
+    CREATE INDEX world_object_instances_position ON world_object_instances (pose_x, pose_y);
+    CREATE INDEX world_object_instances_ttl ON world_object_instances (instance_id) 
+        WHERE expected_ttl > 0 AND perceived_end IS NULL;
+    CREATE INDEX world_object_instances_ended ON world_object_instances (instance_id) 
+        WHERE perceived_end IS NOT NULL;
+    CREATE TABLE world_object_instance_tags (
+        tag TEXT NOT NULL, 
+        instance_id INTEGER NOT NULL 
+            REFERENCES world_object_instances (instance_id) ON DELETE CASCADE, 
+        PRIMARY KEY (tag, instance_id)
+    );
+    CREATE INDEX world_object_instance_tags_instance_id 
+        ON world_object_instance_tags (instance_id);
+    CREATE TABLE world_object_instance_archive (
+        instance_id INTEGER PRIMARY KEY, 
+        name TEXT, 
+        creation REAL, 
+        "update" REAL, 
+        expected_ttl INTEGER, 
+        perceived_end REAL, 
+        source_origin TEXT, 
+        source_creator TEXT, 
+        pose_seq INTEGER, 
+        pose_stamp REAL, 
+        pose_frame_id TEXT, 
+        pose_position TEXT, 
+        pose_orientation TEXT, 
+        pose_covariance TEXT, 
+        description_id INTEGER, 
+        properties TEXT, 
+        tags TEXT, 
+        archived REAL NOT NULL
+    );
+"""
+
+def create(conn):
+    '''
+    Create the tables of the World Model in an empty SQLite database, in one transaction.
+    
+    @param conn: the SQLite connection
+    @type  conn: Connection
+    '''
+    conn.executescript("""BEGIN;""" + _schema + """INSERT INTO """ + _version + 
+                       """ (version) VALUES ('""" + VERSION + """'); COMMIT;""")
+
+def version(conn):
+    '''
+    Get the version of the World Model schema of an SQLite database.
+    
+    @param conn: the SQLite connection
+    @type  conn: Connection
+    @return: the version, or None if the database has no World Model schema
+    @rtype: string
+    '''
+    if conn.execute("""SELECT name FROM sqlite_master WHERE type = 'table' AND name = ?""", 
+                    (_version,)).fetchone() is None:
+        return None
+    return str(conn.execute("""SELECT version FROM """ + _version).fetchone()[0])
+
+def to_array(value):
+    '''
+    Convert a list to the JSON text an array column is stored as.
+    
+    @param value: the list, or None
+    @type  value: list
+    @return: the JSON text, or None
+    @rtype: string
+    '''
+    return None if value is None else json.dumps(list(value))
+
+def from_array(value):
+    '''
+    Convert the JSON text of an array column back to a list. Strings are returned as UTF-8 byte
+    strings, as they are by psycopg2.
+    
+    @param value: the JSON text, or None
+    @type  value: string
+    @return: the list, or None
+    @rtype: list
+    '''
+    if value is None:
+        return None
+    return [v.encode('utf-8') if isinstance(v, unicode) else v for v in json.loads(value)]
@@ -0,0 +1,239 @@
+# Software License Agreement (BSD License)
+#
+# Copyright (c) 2013, Willow Garage, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above
+# copyright notice, this list of conditions and the following
+# disclaimer in the documentation and/or other materials provided
+# with the distribution.
+# * Neither the name of Willow Garage, Inc. nor the names of its
+# contributors may be used to endorse or promote products derived
+# from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+'''
+The SqliteWorldObjectDescriptionConnection class provides the functions of the
+WorldObjectDescriptionConnection for an embedded SQLite World Model database.
+
+@author:  Jihoon Lee
+@version: October 16, 2026
+'''
+
+from worldlib.sqlite_pool import SqlitePool
+from worldlib.sqlite_schema import to_array, from_array
+
+class SqliteWorldObjectDescriptionConnection(object):
+    '''
+    The main SqliteWorldObjectDescriptionConnection object which communicates with the SQLite
+    World Model database.
+    '''
+    
+    def __init__(self, path, pool=None):
+        '''
+        Creates the SqliteWorldObjectDescriptionConnection object.
+        
+        @param path: the path of the database file
+        @type  path: string
+        @param pool: a shared connection pool to use instead of creating a private one
+        @type  pool: SqlitePool
+        '''
+        # name of the world object descriptions table
+        self._wod = 'world_object_descriptions'
+        # name of the table holding one row per tag of each description
+        self._tags = 'world_object_description_tags'
+        # connect to the world model database
+        self._pool = pool if pool is not None else SqlitePool(path)
+
+    def insert(self, entity):
+        '''
+        Insert the given entity into the world object description database. This will create a new 
+        description. The description_id will be set to a unique value and returned.
+        
+        @param entity: the entity to insert
+        @type  entity: dict
+        @return: the description_id
+        @rtype: int
+        '''
+        return self.insert_many([entity])[0]
+
+    def insert_many(self, entities):
+        '''
+        Insert the given entities into the world_object_descriptions table in one transaction. A
+        unique description_id will be set for each and returned.
+        
+        @param entities: the entities to insert
+        @type  entities: list
+        @return: the description_ids, in the same order as the entities
+        @rtype: list
+        '''
+        description_ids = []
+        with self._pool.connection() as conn:
+            for entity in entities:
+                # ensure the description ID does not get set by the user
+                if 'description_id' in entity.keys():
+                    del entity['description_id']
+                cols = sorted(entity.keys())
+                values = [to_array(entity[c]) if c == 'tags' else entity[c] for c in cols]
+                if len(cols) is 0:
+                    cur = conn.execute("""INSERT INTO """ + self._wod + """ DEFAULT VALUES""")
+                else:
+                    cur = conn.execute("""INSERT INTO """ + self._wod + """ (""" + 
+                                       ', '.join(cols) + """) VALUES (""" + 
+                                       ', '.join(['?'] * len(cols)) + """)""", values)
+                description_id = cur.lastrowid
+                if entity.get('tags') is not None:
+                    conn.executemany("""INSERT INTO """ + self._tags + 
+                                     """ (tag, description_id) VALUES (?, ?)""", 
+                                     [(t, description_id) for t in set(entity['tags'])])
+                description_ids.append(description_id)
+            conn.commit()
+        return description_ids
+
+    def search_description_id(self, description_id):
+        '''
+        Search for and return the entity in the world_object_descriptions table with the given 
+        description_id, if one exists.
+        
+        @param description_id: the description_id field of the entity to search for
+        @type  description_id: int
+        @return: the entity found, or None if an invalid description_id was given
+        @rtype:  dict
+        '''
+        with self._pool.connection(False) as conn:
+            result = conn.execute("""SELECT description_id, name, tags FROM """ + self._wod + 
+                                  """ WHERE description_id = ?""", (description_id,)).fetchone()
+        return None if result is None else self._db_to_dict(result)
+
+    def search_tags(self, tags, after_id=0, limit=0):
+        '''
+        Search for and return all entities in the world_object_descriptions table that contain the
+        given list of tags, ordered by description_id. Results can be paged by passing the last
+        description_id of the previous page as after_id.
+        
+        @param tags: the list of tags to search for
+        @type  tags: list
+        @param after_id: only return entities with a description_id greater than this
+        @type  after_id: int
+        @param limit: the maximum number of entities to return (0 for no limit)
+        @type  limit: int
+        @return: the entities found
+        @rtype: list
+        '''
+        final = []
+        # do not search empty arrays
+        if len(tags) > 0:
+            with self._pool.connection(False) as conn:
+                sql, values = self._build_tag_search(tags, after_id, limit)
+                final = [self._db_to_dict(r) for r in conn.execute(sql, values).fetchall()]
+        return final
+
+    def stream_tags(self, tags, chunk_size=100, after_id=0, limit=0):
+        '''
+        Search for all entities in the world_object_descriptions table that contain the given list
+        of tags, ordered by description_id, and yield them in lists of at most chunk_size. Rows are
+        stepped through as they are needed, so only one chunk is held in memory at a time.
+        
+        @param tags: the list of tags to search for
+        @type  tags: list
+        @param chunk_size: the maximum number of entities in each list
+        @type  chunk_size: int
+        @param after_id: only return entities with a description_id greater than this
+        @type  after_id: int
+        @param limit: the maximum number of entities to return (0 for no limit)
+        @type  limit: int
+        @return: a generator of lists of the entities found
+        @rtype: generator
+        '''
+        # do not search empty arrays
+        if len(tags) > 0:
+            with self._pool.connection(False) as conn:
+                sql, values = self._build_tag_search(tags, after_id, limit)
+                cur = conn.execute(sql, values)
+                while True:
+                    results = cur.fetchmany(chunk_size)
+                    if len(results) is 0:
+                        break
+                    yield [self._db_to_dict(r) for r in results]
+                cur.close()
+
+    def stream(self, chunk_size=100):
+        '''
+        Yield all entities in the world_object_descriptions table, ordered by description_id, in
+        lists of at most chunk_size. Rows are stepped through as they are needed, so only one
+        chunk is held in memory at a time.
+        
+        @param chunk_size: the maximum number of entities in each list
+        @type  chunk_size: int
+        @return: a generator of lists of the entities found
+        @rtype: generator
+        '''
+        with self._pool.connection(False) as conn:
+            cur = conn.execute("""SELECT description_id, name, tags FROM """ + self._wod + 
+                               """ ORDER BY description_id""")
+            while True:
+                results = cur.fetchmany(chunk_size)
+                if len(results) is 0:
+                    break
+                yield [self._db_to_dict(r) for r in results]
+            cur.close()
+
+    def _build_tag_search(self, tags, after_id, limit):
+        '''
+        Build the SQL and values of a tag search. The tag rows are counted per description, which
+        can be answered by the primary key of the tag table.
+        
+        @param tags: the list of tags to search for
+        @type  tags: list
+        @param after_id: only return entities with a description_id greater than this
+        @type  after_id: int
+        @param limit: the maximum number of entities to return (0 for no limit)
+        @type  limit: int
+        @return: the SQL and the values for the search
+        @rtype: tuple
+        '''
+        tags = tuple(sorted(set(tags)))
+        sql = ("""SELECT description_id, name, tags FROM """ + self._wod + 
+               """ WHERE description_id > ? AND description_id IN (SELECT description_id FROM """ + 
+               self._tags + """ WHERE tag IN (""" + ', '.join(['?'] * len(tags)) + """) 
+               GROUP BY description_id HAVING count(*) = ?) ORDER BY description_id""")
+        values = (after_id,) + tags + (len(tags),)
+        if limit > 0:
+            sql += """ LIMIT ?"""
+            values += (limit,)
+        return (sql, values)
+
+    def _db_to_dict(self, entity):
+        '''
+        Convert a database tuple to a dict. This function assumes the tuple is in the correct order.
+        
+        @param entity: the entity to build the dictionary for
+        @type  entity: tuple
+        @return: the dictionary containing the information from the database
+        @rtype: dict
+        '''
+        # convert each one assuming the ordering is correct
+        final = {
+                'description_id' : entity[0],
+                'name' : entity[1],
+                'tags' : from_array(entity[2]),
+                }
+        return final
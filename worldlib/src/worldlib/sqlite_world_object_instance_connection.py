@@ -0,0 +1,677 @@
+# Software License Agreement (BSD License)
+#
+# Copyright (c) 2013, Willow Garage, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above
+# copyright notice, this list of conditions and the following
+# disclaimer in the documentation and/or other materials provided
+# with the distribution.
+# * Neither the name of Willow Garage, Inc. nor the names of its
+# contributors may be used to endorse or promote products derived
+# from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+'''
+The SqliteWorldObjectInstanceConnection class provides the functions of the
+WorldObjectInstanceConnection for an embedded SQLite World Model database. Entities are the same
+dicts, with timestamps as unix time.
+
+@author:  Jihoon Lee
+@version: October 16, 2026
+'''
+
+import time
+from worldlib.sqlite_pool import SqlitePool
+from worldlib.sqlite_schema import to_array, from_array
+
+class SqliteWorldObjectInstanceConnection(object):
+    '''
+    The main SqliteWorldObjectInstanceConnection object which communicates with the SQLite World
+    Model database.
+    '''
+
+    def __init__(self, path, pool=None):
+        '''
+        Creates the SqliteWorldObjectInstanceConnection object.
+        
+        @param path: the path of the database file
+        @type  path: string
+        @param pool: a shared connection pool to use instead of creating a private one
+        @type  pool: SqlitePool
+        '''
+        # name of the world object instances table
+        self._woi = 'world_object_instances'
+        # name of the table holding one row per tag of each instance
+        self._tags = 'world_object_instance_tags'
+        # name of the table ended instances are moved to
+        self._archive = 'world_object_instance_archive'
+        # columns selected for full instances, which name the fields of the dicts returned
+        self._columns = ['instance_id', 'name', 'creation', 'update', 'expected_ttl', 
+                         'perceived_end', 'source_origin', 'source_creator', 'pose_seq', 
+                         'pose_stamp', 'pose_frame_id', 'pose_position', 'pose_orientation', 
+                         'pose_covariance', 'description_id', 'properties', 'tags']
+        # fields stored as JSON arrays
+        self._arrays = ['pose_position', 'pose_orientation', 'pose_covariance', 'properties', 
+                        'tags']
+        # select list for full instances ('update' is a keyword in SQLite)
+        self._select = ', '.join(['"' + c + '"' for c in self._columns])
+        # maximum number of values bound to one statement
+        self._max_variables = 500
+        # connect to the world model database
+        self._pool = pool if pool is not None else SqlitePool(path)
+
+    def insert(self, entity):
+        '''
+        Insert the given entity into the world_object_instances table. This will create a new 
+        instance. The instance_id will be set to a unique value and returned.
+        
+        @param entity: the entity to insert with the correct keys for the columns
+        @type  entity: dict
+        @return: the instance_id
+        @rtype: integer
+        '''
+        with self._pool.connection() as conn:
+            instance_id = self._insert(conn, entity)
+            conn.commit()
+        return instance_id
+
+    def insert_many(self, entities):
+        '''
+        Insert the given entities into the world_object_instances table in one transaction. A
+        unique instance_id will be set for each and returned.
+        
+        @param entities: the entities to insert with the correct keys for the columns
+        @type  entities: list
+        @return: the instance_ids, in the same order as the entities
+        @rtype: list
+        '''
+        if len(entities) is 0:
+            return []
+        with self._pool.connection() as conn:
+            instance_ids = [self._insert(conn, e) for e in entities]
+            conn.commit()
+        return instance_ids
+
+    def delete(self, instance_id):
+        '''
+        Delete the entity of the given instance_id from world_object_instances table.
+
+        @param instance_id : the unique identifier of entity
+        @type  instance_id : integer
+        @return: result
+        @rtype: bool 
+        '''
+        with self._pool.connection() as conn:
+            conn.execute("""DELETE FROM """ + self._woi + """ WHERE instance_id = ?""", 
+                         (instance_id,))
+            conn.commit()
+        return True
+
+    def delete_many(self, instance_ids):
+        '''
+        Delete the entities of the given instance_ids from world_object_instances table in one
+        transaction.
+        
+        @param instance_ids: the unique identifiers of the entities
+        @type  instance_ids: list
+        @return: if an entity was found and deleted, for each instance_id
+        @rtype: list
+        '''
+        if len(instance_ids) is 0:
+            return []
+        deleted = set()
+        with self._pool.connection() as conn:
+            for chunk in self._chunks(list(instance_ids)):
+                where = """ WHERE instance_id IN (""" + ', '.join(['?'] * len(chunk)) + """)"""
+                cur = conn.execute("""SELECT instance_id FROM """ + self._woi + where, chunk)
+                deleted.update([r[0] for r in cur.fetchall()])
+                conn.execute("""DELETE FROM """ + self._woi + where, chunk)
+            conn.commit()
+        return [i in deleted for i in instance_ids]
+
+    def update_entity_by_instance_id(self, instance_id, entity):
+        '''
+        Update the entity in the world_object_instances table with the given instance_id, if one
+        exists.
+        
+        @param instance_id: the instance_id of the entity to update
+        @type  instance_id: int
+        @param entity: the entity to update with
+        @type  entity: dict
+        @return: if an entity was found and updated with the given instance_id
+        @rtype:  bool
+        '''
+        with self._pool.connection() as conn:
+            result = self._update(conn, instance_id, entity)
+            conn.commit()
+        return result
+
+    def upsert_by_tags(self, tags, entity, update=None):
+        '''
+        Find the instance in the world_object_instances table that contains the given list of tags
+        and (optionally) update it, or insert the given entity as a new instance if none matches.
+        This is done in one write transaction, so concurrent upserts with the same tags cannot
+        create duplicates. If several instances match, the oldest one is used.
+        
+        @param tags: the list of tags an existing instance must contain
+        @type  tags: list
+        @param entity: the entity to insert if no instance matches
+        @type  entity: dict
+        @param update: the entity to update a matching instance with, or None to leave it as is
+        @type  update: dict
+        @return: the instance_id of the matching or new instance, and if it was created
+        @rtype: tuple
+        '''
+        if len(tags) is 0:
+            raise ValueError('At least one tag is required to match an instance.')
+        with self._pool.connection() as conn:
+            where = self._build_tag_filter(tags)
+            row = conn.execute("""SELECT instance_id FROM """ + self._woi + """ WHERE 1 = 1""" + 
+                               where['sql'] + """ ORDER BY instance_id LIMIT 1""", 
+                               where['values']).fetchone()
+            if row is None:
+                result = (self._insert(conn, entity), True)
+            else:
+                if update is not None:
+                    self._update(conn, row[0], update)
+                result = (row[0], False)
+            conn.commit()
+        return result
+
+    def update_many(self, updates):
+        '''
+        Update the entities in the world_object_instances table with the given instance_ids in one
+        transaction.
+        
+        @param updates: an (instance_id, entity) tuple for each entity to update
+        @type  updates: list
+        @return: if an entity was found and updated, for each instance_id
+        @rtype: list
+        '''
+        with self._pool.connection() as conn:
+            result = [self._update(conn, instance_id, entity) for instance_id, entity in updates]
+            conn.commit()
+        return result
+
+    def expire(self, batch_size=1000):
+        '''
+        End the instances in the world_object_instances table whose expected_ttl has passed since
+        their last update (or their creation, if they were never updated) by setting their
+        perceived_end to the current time.
+        
+        @param batch_size: the maximum number of instances to end
+        @type  batch_size: int
+        @return: the instance_ids of the ended instances
+        @rtype: list
+        '''
+        now = time.time()
+        with self._pool.connection() as conn:
+            cur = conn.execute("""SELECT instance_id FROM """ + self._woi + """ 
+                               WHERE expected_ttl > 0 AND perceived_end IS NULL 
+                               AND coalesce("update", creation) + expected_ttl < ? 
+                               ORDER BY instance_id LIMIT ?""", (now, batch_size))
+            expired = [r[0] for r in cur.fetchall()]
+            for chunk in self._chunks(expired):
+                conn.execute("""UPDATE """ + self._woi + """ SET perceived_end = ? 
+                             WHERE instance_id IN (""" + ', '.join(['?'] * len(chunk)) + """)""", 
+                             [now] + chunk)
+            conn.commit()
+        return expired
+
+    def archive(self, batch_size=1000):
+        '''
+        Move the instances in the world_object_instances table which have a perceived_end into
+        the archive table.
+        
+        @param batch_size: the maximum number of instances to move
+        @type  batch_size: int
+        @return: the instance_ids of the moved instances
+        @rtype: list
+        '''
+        now = time.time()
+        with self._pool.connection() as conn:
+            cur = conn.execute("""SELECT instance_id FROM """ + self._woi + """ 
+                               WHERE perceived_end IS NOT NULL ORDER BY instance_id LIMIT ?""", 
+                               (batch_size,))
+            archived = [r[0] for r in cur.fetchall()]
+            for chunk in self._chunks(archived):
+                where = """ WHERE instance_id IN (""" + ', '.join(['?'] * len(chunk)) + """)"""
+                conn.execute("""INSERT INTO """ + self._archive + """ (""" + self._select + 
+                             """, archived) SELECT """ + self._select + """, ? FROM """ + 
+                             self._woi + where, [now] + chunk)
+                # the tag rows are removed along with the instances
+                conn.execute("""DELETE FROM """ + self._woi + where, chunk)
+            conn.commit()
+        return archived
+
+    def search_instance_id(self, instance_id):
+        '''
+        Search for and return the entity in the world_object_instances table with the given
+        instance_id.
+        
+        @param instance_id: the instance_id to search for
+        @type  instance_id: int
+        @return: the entity found, or None if no entity has the given instance_id
+        @rtype: dict
+        '''
+        with self._pool.connection(False) as conn:
+            result = conn.execute("""SELECT """ + self._select + """ FROM """ + self._woi + 
+                                  """ WHERE instance_id = ?""", (instance_id,)).fetchone()
+        return None if result is None else self._db_to_dict(result)
+
+    def search_instance_ids(self, instance_ids, primary=False):
+        '''
+        Search for and return the entities in the world_object_instances table with the given
+        instance_ids.
+        
+        @param instance_ids: the instance_ids to search for
+        @type  instance_ids: list
+        @param primary: if the entities must be read from the primary database (ignored, the file
+                        has no replicas)
+        @type  primary: bool
+        @return: the entities found
+        @rtype: list
+        '''
+        final = []
+        if len(instance_ids) > 0:
+            with self._pool.connection(False) as conn:
+                for chunk in self._chunks(list(instance_ids)):
+                    cur = conn.execute("""SELECT """ + self._select + """ FROM """ + self._woi + 
+                                       """ WHERE instance_id IN (""" + 
+                                       ', '.join(['?'] * len(chunk)) + """)""", chunk)
+                    final.extend([self._db_to_dict(r) for r in cur.fetchall()])
+        return final
+
+    def search_tags(self, tags, after_id=0, limit=0):
+        '''
+        Search for and return all entities in the world_object_instances table that contain the
+        given list of tags, ordered by instance_id. Results can be paged by passing the last
+        instance_id of the previous page as after_id.
+        
+        @param tags: the list of tags to search for
+        @type  tags: list
+        @param after_id: only return entities with a instance_id greater than this
+        @type  after_id: int
+        @param limit: the maximum number of entities to return (0 for no limit)
+        @type  limit: int
+        @return: the entities found
+        @rtype: list
+        '''
+        final = []
+        # do not search empty arrays
+        if len(tags) > 0:
+            with self._pool.connection(False) as conn:
+                sql, values = self._build_tag_search(tags, after_id, limit)
+                final = [self._db_to_dict(r) for r in conn.execute(sql, values).fetchall()]
+        return final
+
+    def stream_tags(self, tags, chunk_size=100, after_id=0, limit=0):
+        '''
+        Search for all entities in the world_object_instances table that contain the given list of
+        tags, ordered by instance_id, and yield them in lists of at most chunk_size. Rows are
+        stepped through as they are needed, so only one chunk is held in memory at a time.
+        
+        @param tags: the list of tags to search for
+        @type  tags: list
+        @param chunk_size: the maximum number of entities in each list
+        @type  chunk_size: int
+        @param after_id: only return entities with a instance_id greater than this
+        @type  after_id: int
+        @param limit: the maximum number of entities to return (0 for no limit)
+        @type  limit: int
+        @return: a generator of lists of the entities found
+        @rtype: generator
+        '''
+        # do not search empty arrays
+        if len(tags) > 0:
+            with self._pool.connection(False) as conn:
+                sql, values = self._build_tag_search(tags, after_id, limit)
+                cur = conn.execute(sql, values)
+                while True:
+                    results = cur.fetchmany(chunk_size)
+                    if len(results) is 0:
+                        break
+                    yield [self._db_to_dict(r) for r in results]
+                cur.close()
+
+    def stream(self, chunk_size=100, tags=None, start=None, end=None):
+        '''
+        Yield all entities in the world_object_instances table, ordered by instance_id, in lists
+        of at most chunk_size. Only entities which contain the given tags and which were last
+        updated (or created, if never updated) within the given time range are returned. Rows are
+        stepped through as they are needed, so only one chunk is held in memory at a time.
+        
+        @param chunk_size: the maximum number of entities in each list
+        @type  chunk_size: int
+        @param tags: if given, only return entities that contain all of these tags
+        @type  tags: list
+        @param start: if given, the earliest update time (unix time) of the entities returned
+        @type  start: float
+        @param end: if given, the latest update time (unix time) of the entities returned
+        @type  end: float
+        @return: a generator of lists of the entities found
+        @rtype: generator
+        '''
+        # build the SQL
+        sql = """SELECT """ + self._select + """ FROM """ + self._woi + """ WHERE 1 = 1"""
+        values = ()
+        if tags:
+            where = self._build_tag_filter(tags)
+            sql += where['sql']
+            values += where['values']
+        if start is not None:
+            sql += """ AND coalesce("update", creation) >= ?"""
+            values += (start,)
+        if end is not None:
+            sql += """ AND coalesce("update", creation) <= ?"""
+            values += (end,)
+        with self._pool.connection(False) as conn:
+            cur = conn.execute(sql + """ ORDER BY instance_id""", values)
+            while True:
+                results = cur.fetchmany(chunk_size)
+                if len(results) is 0:
+                    break
+                yield [self._db_to_dict(r) for r in results]
+            cur.close()
+
+    def search_box(self, min_x, min_y, max_x, max_y, frame_id=None, tags=None):
+        '''
+        Search for and return all entities in the world_object_instances table whose X, Y position
+        lies within the given bounding box.
+        
+        @param min_x: the minimum X value of the box
+        @type  min_x: float
+        @param min_y: the minimum Y value of the box
+        @type  min_y: float
+        @param max_x: the maximum X value of the box
+        @type  max_x: float
+        @param max_y: the maximum Y value of the box
+        @type  max_y: float
+        @param frame_id: if given, only search instances with a pose in this frame
+        @type  frame_id: string
+        @param tags: if given, only search instances that contain all of these tags
+        @type  tags: list
+        @return: the entities found
+        @rtype: list
+        '''
+        where = self._build_spatial_filter(frame_id, tags)
+        return self._search_spatial(
+                """SELECT """ + self._select + """ FROM """ + self._woi + 
+                """ WHERE pose_x BETWEEN ? AND ? AND pose_y BETWEEN ? AND ?""" + where['sql'], 
+                (min_x, max_x, min_y, max_y) + where['values'])
+
+    def search_radius(self, x, y, radius, frame_id=None, tags=None):
+        '''
+        Search for and return all entities in the world_object_instances table whose X, Y position
+        lies within the given distance of a point.
+        
+        @param x: the X value of the center point
+        @type  x: float
+        @param y: the Y value of the center point
+        @type  y: float
+        @param radius: the maximum distance from the center point
+        @type  radius: float
+        @param frame_id: if given, only search instances with a pose in this frame
+        @type  frame_id: string
+        @param tags: if given, only search instances that contain all of these tags
+        @type  tags: list
+        @return: the entities found
+        @rtype: list
+        '''
+        where = self._build_spatial_filter(frame_id, tags)
+        # the bounding box of the circle is answered by the position index
+        return self._search_spatial(
+                """SELECT """ + self._select + """ FROM """ + self._woi + 
+                """ WHERE pose_x BETWEEN ? AND ? AND pose_y BETWEEN ? AND ? 
+                AND (pose_x - ?) * (pose_x - ?) + (pose_y - ?) * (pose_y - ?) <= ?""" + 
+                where['sql'], 
+                (x - radius, x + radius, y - radius, y + radius, x, x, y, y, radius * radius) + 
+                where['values'])
+
+    def search_nearest(self, x, y, k, frame_id=None, tags=None):
+        '''
+        Search for and return the k entities in the world_object_instances table whose X, Y
+        position is closest to a point, closest first.
+        
+        @param x: the X value of the point
+        @type  x: float
+        @param y: the Y value of the point
+        @type  y: float
+        @param k: the maximum number of entities to return
+        @type  k: int
+        @param frame_id: if given, only search instances with a pose in this frame
+        @type  frame_id: string
+        @param tags: if given, only search instances that contain all of these tags
+        @type  tags: list
+        @return: the entities found
+        @rtype: list
+        '''
+        if k <= 0:
+            return []
+        where = self._build_spatial_filter(frame_id, tags)
+        # every positioned instance is compared, there is no index for the distance ordering
+        return self._search_spatial(
+                """SELECT """ + self._select + """ FROM """ + self._woi + 
+                """ WHERE pose_x IS NOT NULL AND pose_y IS NOT NULL""" + where['sql'] + 
+                """ ORDER BY (pose_x - ?) * (pose_x - ?) + (pose_y - ?) * (pose_y - ?) 
+                LIMIT ?""", 
+                where['values'] + (x, x, y, y, k))
+
+    def _search_spatial(self, sql, values):
+        '''
+        Run one of the spatial searches and convert the results.
+        
+        @param sql: the query to run
+        @type  sql: string
+        @param values: the values for the query
+        @type  values: tuple
+        @return: the entities found
+        @rtype: list
+        '''
+        with self._pool.connection(False) as conn:
+            return [self._db_to_dict(r) for r in conn.execute(sql, values).fetchall()]
+
+    def _build_spatial_filter(self, frame_id, tags):
+        '''
+        A helper function to build the optional frame and tag restrictions of a spatial search.
+        This will create a dict containing the SQL to append to the WHERE clause and a tuple of
+        its values.
+        
+        @param frame_id: the frame to restrict the search to, or None
+        @type  frame_id: string
+        @param tags: the tags to restrict the search to, or None
+        @type  tags: list
+        @return: the dictionary containing the two helper variables
+        @rtype: dict
+        '''
+        final = {'sql' : '', 'values' : ()}
+        if frame_id:
+            final['sql'] += """ AND pose_frame_id = ?"""
+            final['values'] += (frame_id,)
+        if tags:
+            where = self._build_tag_filter(tags)
+            final['sql'] += where['sql']
+            final['values'] += where['values']
+        return final
+
+    def _build_tag_filter(self, tags):
+        '''
+        A helper function to build the restriction to the instances which contain all of the
+        given tags. The tag rows are counted per instance, which can be answered by the primary
+        key of the tag table.
+        
+        @param tags: the tags the instances must contain
+        @type  tags: list
+        @return: the dictionary containing the SQL to append to a WHERE clause and its values
+        @rtype: dict
+        '''
+        tags = tuple(sorted(set(tags)))
+        return {'sql' : """ AND instance_id IN (SELECT instance_id FROM """ + self._tags + 
+                        """ WHERE tag IN (""" + ', '.join(['?'] * len(tags)) + """) 
+                        GROUP BY instance_id HAVING count(*) = ?)""", 
+                'values' : tags + (len(tags),)}
+
+    def _build_tag_search(self, tags, after_id, limit):
+        '''
+        Build the SQL and values of a tag search.
+        
+        @param tags: the list of tags to search for
+        @type  tags: list
+        @param after_id: only return entities with a instance_id greater than this
+        @type  after_id: int
+        @param limit: the maximum number of entities to return (0 for no limit)
+        @type  limit: int
+        @return: the SQL and the values for the search
+        @rtype: tuple
+        '''
+        where = self._build_tag_filter(tags)
+        sql = ("""SELECT """ + self._select + """ FROM """ + self._woi + 
+               """ WHERE instance_id > ?""" + where['sql'] + """ ORDER BY instance_id""")
+        values = (after_id,) + where['values']
+        if limit > 0:
+            sql += """ LIMIT ?"""
+            values += (limit,)
+        return (sql, values)
+
+    def _insert(self, conn, entity):
+        '''
+        Insert the given entity with the given connection without committing.
+        
+        @param conn: the connection of the transaction to insert in
+        @type  conn: Connection
+        @param entity: the entity to insert with the correct keys for the columns
+        @type  entity: dict
+        @return: the instance_id
+        @rtype: integer
+        '''
+        # ensure the instance ID does not get set by the user
+        if 'instance_id' in entity.keys():
+            del entity['instance_id']
+        helper = self._build_sql_helper(entity)
+        if len(helper['cols']) is 0:
+            cur = conn.execute("""INSERT INTO """ + self._woi + """ DEFAULT VALUES""")
+        else:
+            cur = conn.execute("""INSERT INTO """ + self._woi + """ (""" + 
+                               ', '.join(helper['cols']) + """) VALUES (""" + 
+                               ', '.join(['?'] * len(helper['cols'])) + """)""", 
+                               helper['values'])
+        instance_id = cur.lastrowid
+        if entity.get('tags') is not None:
+            self._insert_tags(conn, instance_id, entity['tags'])
+        return instance_id
+
+    def _update(self, conn, instance_id, entity):
+        '''
+        Update the entity with the given instance_id with the given connection without
+        committing.
+        
+        @param conn: the connection of the transaction to update in
+        @type  conn: Connection
+        @param instance_id: the instance_id of the entity to update
+        @type  instance_id: int
+        @param entity: the entity to update with
+        @type  entity: dict
+        @return: if an entity was found and updated with the given instance_id
+        @rtype:  bool
+        '''
+        # ensure the instance ID does not get set by the user
+        if 'instance_id' in entity.keys():
+            del entity['instance_id']
+        helper = self._build_sql_helper(entity)
+        if len(helper['cols']) is 0:
+            # nothing to set, only check that the instance exists
+            return conn.execute("""SELECT instance_id FROM """ + self._woi + 
+                                """ WHERE instance_id = ?""", (instance_id,)).fetchone() is not None
+        cur = conn.execute("""UPDATE """ + self._woi + """ SET """ + 
+                           ', '.join([c + ' = ?' for c in helper['cols']]) + 
+                           """ WHERE instance_id = ?""", helper['values'] + (instance_id,))
+        if cur.rowcount is 0:
+            return False
+        if 'tags' in entity.keys():
+            conn.execute("""DELETE FROM """ + self._tags + """ WHERE instance_id = ?""", 
+                         (instance_id,))
+            if entity['tags'] is not None:
+                self._insert_tags(conn, instance_id, entity['tags'])
+        return True
+
+    def _insert_tags(self, conn, instance_id, tags):
+        '''
+        Insert a tag row for each distinct tag of an instance.
+        
+        @param conn: the connection of the transaction to insert in
+        @type  conn: Connection
+        @param instance_id: the instance_id of the instance
+        @type  instance_id: int
+        @param tags: the tags of the instance
+        @type  tags: list
+        '''
+        conn.executemany("""INSERT INTO """ + self._tags + """ (tag, instance_id) VALUES (?, ?)""", 
+                         [(t, instance_id) for t in set(tags)])
+
+    def _chunks(self, values):
+        '''
+        Split a list of values into lists small enough to bind to one statement.
+        
+        @param values: the values to split
+        @type  values: list
+        @return: the lists of values
+        @rtype: list
+        '''
+        return [values[i:i + self._max_variables] 
+                for i in range(0, len(values), self._max_variables)]
+
+    def _db_to_dict(self, entity):
+        '''
+        Convert a database tuple selected with the select list of full instances to a dict keyed 
+        by column name, decoding the arrays.
+        
+        @param entity: the entity to build the dictionary for
+        @type  entity: tuple
+        @return: the dictionary containing the information from the database
+        @rtype: dict
+        '''
+        final = dict(zip(self._columns, entity))
+        for c in self._arrays:
+            final[c] = from_array(final[c])
+        return final
+
+    def _build_sql_helper(self, entity):
+        '''
+        A helper function to build the SQL for an insertion/update. This will take the entity dict
+        and create a new dict containing a tuple of the sorted (quoted) column names and a tuple of
+        the values, with arrays encoded. The planar position is set along with the position.
+        
+        @param entity: the entity to build the SQL helper for
+        @type  entity: dict
+        @return: the dictionary containing the two helper variables
+        @rtype: dict
+        '''
+        values = {}
+        for c in entity.keys():
+            values[c] = to_array(entity[c]) if c in self._arrays else entity[c]
+        if 'pose_position' in entity.keys():
+            position = entity['pose_position'] or []
+            values['pose_x'] = position[0] if len(position) > 0 else None
+            values['pose_y'] = position[1] if len(position) > 1 else None
+        cols = tuple(sorted(values.keys()))
+        return {'cols' : tuple(['"' + c + '"' for c in cols]), 
+                'values' : tuple([values[c] for c in cols])}
@@ -0,0 +1,147 @@
+# Software License Agreement (BSD License)
+#
+# Copyright (c) 2013, Willow Garage, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above
+# copyright notice, this list of conditions and the following
+# disclaimer in the documentation and/or other materials provided
+# with the distribution.
+# * Neither the name of Willow Garage, Inc. nor the names of its
+# contributors may be used to endorse or promote products derived
+# from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+'''
+The StatementCache class compiles the SQL of the frequently run insert and update statements once
+per table and column set, and runs them as server-side prepared statements. Every value is passed
+as a parameter, so PostgreSQL parses and plans each statement once per connection instead of once
+per call.
+
+@author:  Jihoon Lee
+@version: October 16, 2026
+'''
+
+import itertools
+import threading
+import weakref
+from collections import OrderedDict
+
+class StatementCache(object):
+    '''
+    The main StatementCache object which holds compiled statements and tracks which of them have
+    been prepared on each connection. A single cache is shared by all users of a ConnectionPool.
+    '''
+
+    def __init__(self, max_size=64):
+        '''
+        Creates the StatementCache object.
+
+        @param max_size: the maximum number of statements prepared on each connection (0 runs the
+                         statements without preparing them)
+        @type  max_size: int
+        '''
+        if max_size < 0:
+            raise ValueError('Invalid statement cache size: ' + str(max_size))
+        self.max_size = max_size
+        # compiled statements as key -> (name, SQL with numbered parameters), least recent first
+        self._statements = OrderedDict()
+        # names of the statements prepared on each connection, least recent first
+        self._prepared = weakref.WeakKeyDictionary()
+        # source of unique statement names
+        self._ids = itertools.count(1)
+        # guards the compiled statements and the prepared names
+        self._lock = threading.Lock()
+
+    def execute(self, cur, key, build, values):
+        '''
+        Execute the statement with the given key with the given cursor. The SQL is built and
+        compiled the first time the key is seen, and prepared on the connection of the cursor the
+        first time it is used there.
+
+        @param cur: the cursor to execute with
+        @type  cur: Cursor
+        @param key: the key of the statement, such as the table, operation and column names
+        @type  key: tuple
+        @param build: the function which builds the SQL with a '%s' place holder for each value
+        @type  build: function
+        @param values: the values of the statement
+        @type  values: tuple
+        '''
+        if self.max_size is 0:
+            cur.execute(build(), values)
+            return
+        name, sql = self._compile(key, build, len(values))
+        conn = cur.connection
+        with self._lock:
+            prepared = self._prepared.setdefault(conn, OrderedDict())
+            ready = name in prepared
+            if ready:
+                prepared[name] = prepared.pop(name)
+        if not ready:
+            cur.execute("""PREPARE """ + name + """ AS """ + sql)
+            with self._lock:
+                prepared[name] = True
+                evicted = prepared.popitem(last=False)[0] if len(prepared) > self.max_size else None
+            if evicted is not None:
+                cur.execute("""DEALLOCATE """ + evicted)
+        if len(values) is 0:
+            cur.execute("""EXECUTE """ + name)
+        else:
+            cur.execute("""EXECUTE """ + name + """ (""" + ', '.join(['%s'] * len(values)) + """)""",
+                        values)
+
+    def stats(self):
+        '''
+        Get the number of compiled statements and of statements prepared on each connection.
+
+        @return: the dictionary with the counts
+        @rtype: dict
+        '''
+        with self._lock:
+            return {'compiled' : len(self._statements),
+                    'prepared' : [len(p) for p in self._prepared.values()]}
+
+    def _compile(self, key, build, count):
+        '''
+        Get the compiled statement of the given key, building it if needed.
+
+        @param key: the key of the statement
+        @type  key: tuple
+        @param build: the function which builds the SQL with a '%s' place holder for each value
+        @type  build: function
+        @param count: the number of values of the statement
+        @type  count: int
+        @return: the name of the statement and its SQL with numbered parameters
+        @rtype: tuple
+        '''
+        with self._lock:
+            statement = self._statements.pop(key, None)
+            if statement is None:
+                sql = build() % tuple(['$' + str(i + 1) for i in range(count)])
+                # named after the table and operation so that they can be told apart in logs
+                prefix = '_'.join([str(k) for k in key[:2]])[:48]
+                statement = (prefix + '_' + str(self._ids.next()), sql)
+            self._statements[key] = statement
+            # statements dropped here are deallocated once pushed out of each connection
+            if len(self._statements) > self.max_size * 4:
+                self._statements.popitem(last=False)
+        return statement
@@ -0,0 +1,189 @@
+# Software License Agreement (BSD License)
+#
+# Copyright (c) 2013, Willow Garage, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above
+# copyright notice, this list of conditions and the following
+# disclaimer in the documentation and/or other materials provided
+# with the distribution.
+# * Neither the name of Willow Garage, Inc. nor the names of its
+# contributors may be used to endorse or promote products derived
+# from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+'''
+The Storage classes put the connections to the main World Model tables behind a common interface,
+so that the same code can run against a PostgreSQL server or an embedded SQLite database. Every
+backend provides an instances, descriptions and descriptors connection with the methods and
+results of the PostgreSQL connection classes, and the pool they share. Features which only some
+backends have (e.g., tiled maps) are reported by supports.
+
+@author:  Jihoon Lee
+@version: October 16, 2026
+'''
+
+from worldlib.connection_pool import ConnectionPool
+from worldlib.replicated_pool import ReplicatedPool
+from worldlib.world_object_instance_connection import WorldObjectInstanceConnection
+from worldlib.world_object_description_connection import WorldObjectDescriptionConnection
+from worldlib.descriptor_connection import DescriptorConnection
+from worldlib.sqlite_pool import SqlitePool
+from worldlib.sqlite_world_object_instance_connection import SqliteWorldObjectInstanceConnection
+from worldlib.sqlite_world_object_description_connection import \
+    SqliteWorldObjectDescriptionConnection
+from worldlib.sqlite_descriptor_connection import SqliteDescriptorConnection
+from worldlib import descriptor_codec, sqlite_schema
+
+# name of the PostgreSQL backend
+POSTGRESQL = 'postgresql'
+# name of the embedded SQLite backend
+SQLITE = 'sqlite'
+
+class Storage(object):
+    '''
+    The main Storage object which holds the connections of a backend.
+    '''
+
+    # occupancy grids can be stored as tiles (see MapTileConnection)
+    MAPS = 'maps'
+    # the poses of the instances can be kept in a history (see PoseHistoryConnection)
+    HISTORY = 'history'
+    # changes made by any writer are notified (see ChangeListener)
+    CHANGES = 'changes'
+    # rows can be bulk loaded with COPY through the copy_many method of the connections
+    COPY = 'copy'
+    # the optional features of the backend
+    features = ()
+
+    def __init__(self, pool, instances, descriptions, descriptors):
+        '''
+        Creates the Storage object.
+
+        @param pool: the pool the connections share
+        @type  pool: ConnectionPool
+        @param instances: the connection to the world object instances
+        @type  instances: WorldObjectInstanceConnection
+        @param descriptions: the connection to the world object descriptions
+        @type  descriptions: WorldObjectDescriptionConnection
+        @param descriptors: the connection to the descriptors
+        @type  descriptors: DescriptorConnection
+        '''
+        self.pool = pool
+        self.instances = instances
+        self.descriptions = descriptions
+        self.descriptors = descriptors
+
+    def supports(self, feature):
+        '''
+        Check if the backend has an optional feature.
+
+        @param feature: the feature (e.g., Storage.MAPS)
+        @type  feature: string
+        @return: if the backend has the feature
+        @rtype: bool
+        '''
+        return feature in self.features
+
+    def close(self):
+        '''
+        Close all connections of the backend.
+        '''
+        self.pool.close()
+
+class PostgresStorage(Storage):
+    '''
+    The Storage of a PostgreSQL World Model database, which has every feature. Reads can be
+    spread over read replicas of the database.
+    '''
+
+    features = (Storage.MAPS, Storage.HISTORY, Storage.CHANGES, Storage.COPY)
+
+    def __init__(self, user, pwd, host='localhost', min_size=1, max_size=8, 
+                 codec=descriptor_codec.ZLIB, max_statements=64, metrics=None, replicas=None, 
+                 read_your_writes=True, replica_timeout=2):
+        '''
+        Creates the PostgresStorage object and opens its connection pool.
+
+        @param user: the database username
+        @type  user: string
+        @param pwd: the database password
+        @type  pwd: string
+        @param host: the hostname of the (primary) database, with an optional port
+        @type  host: string
+        @param min_size: the number of connections to keep open at all times
+        @type  min_size: int
+        @param max_size: the maximum number of connections to open at once
+        @type  max_size: int
+        @param codec: the codec used to compress new descriptor data
+        @type  codec: string
+        @param max_statements: the maximum number of statements prepared on each connection
+        @type  max_statements: int
+        @param metrics: the Metrics object to time statements with (None to disable)
+        @type  metrics: Metrics
+        @param replicas: the hostnames of the read replicas of the database, with optional ports
+        @type  replicas: list
+        @param read_your_writes: if reads should wait for a replica to replay the writes made
+                                 through this storage (otherwise replicas may lag behind)
+        @type  read_your_writes: bool
+        @param replica_timeout: the number of seconds to wait for a connection to a replica
+        @type  replica_timeout: int
+        '''
+        pool = ConnectionPool(user, pwd, host, min_size, max_size, 
+                              max_statements=max_statements, metrics=metrics)
+        if replicas:
+            # replicas may be down when starting, so no connections are opened up front
+            pool = ReplicatedPool(pool, [ConnectionPool(user, pwd, r, 0, max_size, 
+                                                        max_statements=0, metrics=metrics, 
+                                                        connect_timeout=replica_timeout) 
+                                         for r in replicas], read_your_writes)
+        Storage.__init__(self, pool, WorldObjectInstanceConnection(user, pwd, host, pool), 
+                         WorldObjectDescriptionConnection(user, pwd, host, pool), 
+                         DescriptorConnection(user, pwd, host, pool, codec))
+
+class SqliteStorage(Storage):
+    '''
+    The Storage of an embedded SQLite World Model database. The schema is created the first time
+    a database file is opened.
+    '''
+
+    def __init__(self, path, codec=descriptor_codec.ZLIB, metrics=None):
+        '''
+        Creates the SqliteStorage object and creates the schema if the database is new.
+
+        @param path: the path of the database file (':memory:' for a private in-memory database)
+        @type  path: string
+        @param codec: the codec used to compress new descriptor data
+        @type  codec: string
+        @param metrics: the Metrics object to time statements with (None to disable)
+        @type  metrics: Metrics
+        '''
+        pool = SqlitePool(path, metrics=metrics)
+        # the schema is created in a transaction of its own
+        with pool.connection(False) as conn:
+            version = sqlite_schema.version(conn)
+            if version is None:
+                sqlite_schema.create(conn)
+            elif version != sqlite_schema.VERSION:
+                raise ValueError('Unsupported World Model version "' + version + '" in ' + path)
+        Storage.__init__(self, pool, SqliteWorldObjectInstanceConnection(path, pool), 
+                         SqliteWorldObjectDescriptionConnection(path, pool), 
+                         SqliteDescriptorConnection(path, pool, codec))
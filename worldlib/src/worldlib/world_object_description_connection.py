@@ -40,8 +40,9 @@ individual descriptors.
 @version: February 18, 2013
 '''
 
-import psycopg2
-import thread
+from psycopg2.extras import execute_values
+from worldlib.connection_pool import ConnectionPool
+from worldlib.bulk_copy import copy_rows, reserve_ids
 
 class WorldObjectDescriptionConnection(object):
     '''
@@ -49,17 +50,24 @@ class WorldObjectDescriptionConnection(object):
     model database.
     '''
     
-    def __init__(self, user, pwd, host='localhost'):
+    def __init__(self, user, pwd, host='localhost', pool=None):
         '''
         Creates the WorldObjectDescriptionDatabase object and connects to the world object
         description database.
+        
+        @param user: the database username
+        @type  user: string
+        @param pwd: the database password
+        @type  pwd: string
+        @param host: the database hostname
+        @type  host: string
+        @param pool: a shared connection pool to use instead of creating a private one
+        @type  pool: ConnectionPool
         '''
         # name of the world object descriptions table
         self._wod = 'world_object_descriptions'
         # connect to the world model database
-        self.conn = psycopg2.connect(database='world_model', user=user, password=pwd, host=host)
-        # create a lock 
-        self.lock = thread.allocate_lock()
+        self._pool = pool if pool is not None else ConnectionPool(user, pwd, host)
         
     def insert(self, entity):
         '''
@@ -77,20 +85,88 @@ class WorldObjectDescriptionConnection(object):
             del entity['description_id']
         # build the SQL
         helper = self._build_sql_helper(entity)
-        with self.lock:
+        with self._pool.connection() as conn:
             # create a cursor
-            cur = self.conn.cursor()
+            cur = conn.cursor()
             # build the SQL
-            cur.execute("""INSERT INTO """ + self._wod + 
-                        """ (description_id, """ + helper['cols'] + """) 
-                        VALUES (nextval('world_object_descriptions_description_id_seq'), 
-                        """ + helper['holders'] + """) RETURNING description_id""", helper['values'])
+            self._pool.statements.execute(cur, (self._wod, 'insert') + helper['cols'], 
+                                          lambda: """INSERT INTO """ + self._wod + 
+                                          """ (description_id, """ + 
+                                          ', '.join(helper['cols']) + """) VALUES 
+                                          (nextval('world_object_descriptions_description_id_seq'), 
+                                          """ + ', '.join(helper['holders']) + """) 
+                                          RETURNING description_id""", helper['values'])
             description_id = cur.fetchone()[0]
-            self.conn.commit()
+            conn.commit()
             cur.close()
         # return the description ID
         return description_id
 
+    def insert_many(self, entities):
+        '''
+        Insert the given entities into the world_object_descriptions table with a single multi-row
+        statement in one transaction. A unique description_id will be set for each and returned.
+        
+        @param entities: the entities to insert
+        @type  entities: list
+        @return: the description_ids, in the same order as the entities
+        @rtype: list
+        '''
+        if len(entities) is 0:
+            return []
+        # ensure the description IDs do not get set by the user
+        for e in entities:
+            if 'description_id' in e.keys():
+                del e['description_id']
+        # build the SQL, using NULL for the columns an entity does not set
+        cols = set()
+        for e in entities:
+            cols.update(e.keys())
+        cols = sorted(cols)
+        values = [tuple([e.get(c) for c in cols]) for e in entities]
+        holders = ''.join([', %s::character varying[]' if c == 'tags' else ', %s' for c in cols])
+        with self._pool.connection() as conn:
+            # create a cursor
+            cur = conn.cursor()
+            rows = execute_values(cur, """INSERT INTO """ + self._wod + """ (description_id""" + 
+                                  ''.join([', ' + c for c in cols]) + """) VALUES %s 
+                                  RETURNING description_id""", values, 
+                                  """(nextval('world_object_descriptions_description_id_seq')""" + 
+                                  holders + """)""", len(entities), True)
+            conn.commit()
+            cur.close()
+        # multi-row inserts return their rows in the order of the values
+        return [r[0] for r in rows]
+
+    def copy_many(self, entities):
+        '''
+        Insert the given entities into the world_object_descriptions table with COPY in one
+        transaction, which is faster than insert_many for large batches. A unique description_id
+        will be set for each and returned.
+        
+        @param entities: the entities to insert
+        @type  entities: list
+        @return: the description_ids, in the same order as the entities
+        @rtype: list
+        '''
+        if len(entities) is 0:
+            return []
+        cols = set()
+        for e in entities:
+            cols.update(e.keys())
+        cols = sorted(cols - set(['description_id']))
+        with self._pool.connection() as conn:
+            # create a cursor
+            cur = conn.cursor()
+            description_ids = reserve_ids(cur, 'world_object_descriptions_description_id_seq', 
+                                          len(entities))
+            copy_rows(cur, self._wod, ['description_id'] + cols, 
+                      [(i,) + tuple([e.get(c) for c in cols]) 
+                       for i, e in zip(description_ids, entities)])
+            conn.commit()
+            cur.close()
+        return description_ids
+
     def search_description_id(self, description_id):
         '''
         Search for and return the entity in the world_object_descriptions table with the given 
@@ -101,9 +177,9 @@ class WorldObjectDescriptionConnection(object):
         @return: the entity found, or None if an invalid description_id was given
         @rtype:  dict
         '''
-        with self.lock:
+        with self._pool.connection(False) as conn:
             # create a cursor
-            cur = self.conn.cursor()
+            cur = conn.cursor()
             # check if the description actually exists
             cur.execute("""SELECT * FROM """ + self._wod + 
                         """ WHERE description_id = %s""", (description_id,))
@@ -114,31 +190,29 @@ class WorldObjectDescriptionConnection(object):
         else:
             return self._db_to_dict(result)
         
-    def search_tags(self, tags):
+    def search_tags(self, tags, after_id=0, limit=0):
         '''
         Search for and return all entities in the world_object_descriptions table that contain the
-        given list of tags.
+        given list of tags, ordered by description_id. Results can be paged by passing the last
+        description_id of the previous page as after_id.
         
         @param tags: the list of tags to search for
         @type  tags: list
+        @param after_id: only return entities with a description_id greater than this
+        @type  after_id: int
+        @param limit: the maximum number of entities to return (0 for no limit)
+        @type  limit: int
         @return: the entities found
         @rtype: list
         '''
         final = []
         # do not search empty arrays
         if len(tags) > 0:
-            # build the SQL
-            sql = """SELECT * FROM """ + self._wod + """ WHERE ("""
-            values = ()
-            for t in tags:
-                sql += "%s = ANY (tags) AND "
-                values += (t,)
-            # remove the trailing ' AND '
-            sql = sql[:-5] + """);"""
-            with self.lock:
+            with self._pool.connection(False) as conn:
                 # create a cursor
-                cur = self.conn.cursor()
-                cur.execute(sql, values)
+                cur = conn.cursor()
+                cur.execute(self._build_tag_search(limit), self._tag_search_values(tags, after_id, 
+                                                                                    limit))
                 # extract the values
                 results = cur.fetchall()
                 for r in results:
@@ -146,27 +220,114 @@ class WorldObjectDescriptionConnection(object):
                     final.append(self._db_to_dict(r))
                 cur.close()
         return final
-    
+
+    def stream_tags(self, tags, chunk_size=100, after_id=0, limit=0):
+        '''
+        Search for all entities in the world_object_descriptions table that contain the given list
+        of tags, ordered by description_id, and yield them in lists of at most chunk_size. Rows are
+        pulled through a server-side cursor, so only one chunk is held in memory at a time. The
+        connection is returned to the pool once the generator is exhausted or closed.
+        
+        @param tags: the list of tags to search for
+        @type  tags: list
+        @param chunk_size: the maximum number of entities in each list
+        @type  chunk_size: int
+        @param after_id: only return entities with a description_id greater than this
+        @type  after_id: int
+        @param limit: the maximum number of entities to return (0 for no limit)
+        @type  limit: int
+        @return: a generator of lists of the entities found
+        @rtype: generator
+        '''
+        # do not search empty arrays
+        if len(tags) > 0:
+            with self._pool.connection(False) as conn:
+                # a named cursor is kept on the server and read in chunks
+                cur = conn.cursor('tag_search')
+                cur.itersize = chunk_size
+                cur.execute(self._build_tag_search(limit), self._tag_search_values(tags, after_id, 
+                                                                                    limit))
+                while True:
+                    results = cur.fetchmany(chunk_size)
+                    if len(results) is 0:
+                        break
+                    yield [self._db_to_dict(r) for r in results]
+                cur.close()
+                conn.commit()
+
+    def stream(self, chunk_size=100):
+        '''
+        Yield all entities in the world_object_descriptions table, ordered by description_id, in
+        lists of at most chunk_size. Rows are pulled through a server-side cursor, so only one
+        chunk is held in memory at a time.
+        
+        @param chunk_size: the maximum number of entities in each list
+        @type  chunk_size: int
+        @return: a generator of lists of the entities found
+        @rtype: generator
+        '''
+        with self._pool.connection(False) as conn:
+            # a named cursor is kept on the server and read in chunks
+            cur = conn.cursor('description_stream')
+            cur.itersize = chunk_size
+            cur.execute("""SELECT * FROM """ + self._wod + """ ORDER BY description_id""")
+            while True:
+                results = cur.fetchmany(chunk_size)
+                if len(results) is 0:
+                    break
+                yield [self._db_to_dict(r) for r in results]
+            cur.close()
+            conn.commit()
+
+    def _build_tag_search(self, limit):
+        '''
+        Build the SQL of a tag search. Containment on the tag array can be answered by the GIN
+        index on tags.
+        
+        @param limit: the maximum number of entities to return (0 for no limit)
+        @type  limit: int
+        @return: the SQL for the search
+        @rtype: string
+        '''
+        sql = ("""SELECT * FROM """ + self._wod + """ WHERE tags @> %s::character varying[] 
+               AND description_id > %s ORDER BY description_id""")
+        if limit > 0:
+            sql += """ LIMIT %s"""
+        return sql
+
+    def _tag_search_values(self, tags, after_id, limit):
+        '''
+        Build the values of a tag search.
+        
+        @param tags: the list of tags to search for
+        @type  tags: list
+        @param after_id: only return entities with a description_id greater than this
+        @type  after_id: int
+        @param limit: the maximum number of entities to return (0 for no limit)
+        @type  limit: int
+        @return: the values for the search
+        @rtype: tuple
+        '''
+        values = (list(tags), after_id)
+        if limit > 0:
+            values += (limit,)
+        return values
+
     def _build_sql_helper(self, entity):
         '''
         A helper function to build the SQL for an insertion/update. This will take the entity dict
-        and create a new dict containing a string of comma separated column names, a string of
-        comma separated place holders (e.g., '%s'), and a tuple of the values.
+        and create a new dict containing a tuple of the sorted column names, a tuple of the
+        matching place holders (e.g., '%s'), and a tuple of the values. Entities which set the same
+        columns share the same statement.
         
         @param entity: the entity to build the SQL helper for
         @type  entity: dict
         @return: the dictionary containing the three helper variables
         @rtype: dict
         '''
-        final = {'cols' : '', 'holders' : '', 'values' : ()}
-        for k in entity.keys():
-            final['cols'] += k + ', '
-            final['holders'] += '%s, '
-            final['values'] += (entity[k],)
-        # remove trailing ', '
-        final['cols'] = final['cols'][:-2]
-        final['holders'] = final['holders'][:-2]
-        return final
+        cols = tuple(sorted(entity.keys()))
+        return {'cols' : cols, 'holders' : ('%s',) * len(cols), 
+                'values' : tuple([entity[c] for c in cols])}
 
     def _db_to_dict(self, entity):
         '''
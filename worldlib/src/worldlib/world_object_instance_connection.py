@@ -40,8 +40,9 @@ working memory.
 @version: February 18, 2013
 '''
 
-import psycopg2
-import thread
+from psycopg2.extras import execute_values
+from worldlib.connection_pool import ConnectionPool
+from worldlib.bulk_copy import copy_rows, reserve_ids
 
 class WorldObjectInstanceConnection(object):
     '''
@@ -49,7 +50,7 @@ class WorldObjectInstanceConnection(object):
     database.
     '''
 
-    def __init__(self, user, pwd, host='localhost'):
+    def __init__(self, user, pwd, host='localhost', pool=None):
         '''
         Creates the WorldObjectInstanceDatabase object and connects to the world object instance
         database.
@@ -60,17 +61,54 @@ class WorldObjectInstanceConnection(object):
         @type  pwd: string
         @param host: the database hostname
         @type  host: string
+        @param pool: a shared connection pool to use instead of creating a private one
+        @type  pool: ConnectionPool
         '''
         # fields in the database that are timestamps
         self.timestamps = ['creation', 'update', 'perceived_end', 'pose_stamp']
+        # types of the columns, used to cast the values of multi-row statements
+        self._types = {
+                       'instance_id' : 'bigint',
+                       'name' : 'character varying',
+                       'expected_ttl' : 'bigint',
+                       'source_origin' : 'character varying',
+                       'source_creator' : 'character varying',
+                       'pose_seq' : 'integer',
+                       'pose_frame_id' : 'character varying',
+                       'pose_position' : 'double precision[]',
+                       'pose_orientation' : 'double precision[]',
+                       'pose_covariance' : 'double precision[]',
+                       'description_id' : 'bigint',
+                       'properties' : 'character varying[]',
+                       'tags' : 'character varying[]',
+                       }
         # name of the world object instances table
         self._woi = 'world_object_instances'
-        # name of the database
-        self._db = 'world_model'
+        # name of the narrow table holding the frequently updated fields of each instance
+        self._poses = 'world_object_instance_poses'
+        # name of the table indexing the position of each instance by grid cell
+        self._cells = 'world_object_instance_cells'
+        # fields stored in the pose table
+        self._hot = ['update', 'pose_seq', 'pose_stamp', 'pose_frame_id', 'pose_position', 
+                     'pose_orientation']
+        # name of the table ended instances are moved to, in the columns of the view
+        self._archive = 'world_object_instance_archive'
+        # name of the view joining both tables into full instances
+        self._view = 'world_object_instance_view'
+        # columns selected for full instances, which name the fields of the dicts returned
+        self._columns = ['instance_id', 'name', 'creation', 'update', 'expected_ttl', 
+                         'perceived_end', 'source_origin', 'source_creator', 'pose_seq', 
+                         'pose_stamp', 'pose_frame_id', 'pose_position', 'pose_orientation', 
+                         'pose_covariance', 'description_id', 'properties', 'tags']
+        # select list for full instances, with timestamps converted to unix time by the database
+        self._select = ', '.join([("date_part('epoch', " + c + ') AS ' + c) 
+                                  if c in self.timestamps else c for c in self._columns])
+        # first key of the advisory locks taken by upsert_by_tags
+        self._upsert_lock = 1869
+        # planar position of an instance
+        self._position = 'point(pose_position[1], pose_position[2])'
         # connect to the world model database
-        self.conn = psycopg2.connect(database=self._db, user=user, password=pwd, host=host)
-        # create a lock 
-        self.lock = thread.allocate_lock()
+        self._pool = pool if pool is not None else ConnectionPool(user, pwd, host)
 
     def insert(self, entity):
         '''
@@ -82,25 +120,91 @@ class WorldObjectInstanceConnection(object):
         @return: the instance_id
         @rtype: integer
         '''
-        # ensure the instance ID does not get set by the user
-        if 'instance_id' in entity.keys():
-            del entity['instance_id']
-        # build the SQL
-        helper = self._build_sql_helper(entity)
-        with self.lock:
+        with self._pool.connection() as conn:
             # create a cursor
-            cur = self.conn.cursor()
-            # build the SQL
-            cur.execute("""INSERT INTO """ + self._woi + 
-                        """ (instance_id, """ + helper['cols'] + """) 
-                        VALUES (nextval('world_object_instances_instance_id_seq'), 
-                        """ + helper['holders'] + """) RETURNING instance_id""", helper['values'])
-            instance_id = cur.fetchone()[0]
-            self.conn.commit()
+            cur = conn.cursor()
+            instance_id = self._insert(cur, entity)
+            conn.commit()
             cur.close()
         # return the instance ID
         return instance_id
 
+    def insert_many(self, entities):
+        '''
+        Insert the given entities into the world_object_instances table with a single multi-row
+        statement in one transaction. A unique instance_id will be set for each and returned.
+        
+        @param entities: the entities to insert with the correct keys for the columns
+        @type  entities: list
+        @return: the instance_ids, in the same order as the entities
+        @rtype: list
+        '''
+        if len(entities) is 0:
+            return []
+        # ensure the instance IDs do not get set by the user
+        for e in entities:
+            if 'instance_id' in e.keys():
+                del e['instance_id']
+        split = [self._split(e) for e in entities]
+        # build the SQL
+        helper = self._build_batch_helper([c for c, h in split])
+        if len(helper['cols']) > 0:
+            helper['cols'] = ', ' + helper['cols']
+            helper['holders'] = ', ' + helper['holders']
+        with self._pool.connection() as conn:
+            # create a cursor
+            cur = conn.cursor()
+            rows = execute_values(cur, """INSERT INTO """ + self._woi + 
+                                  """ (instance_id""" + helper['cols'] + """) VALUES %s 
+                                  RETURNING instance_id""", helper['values'], 
+                                  """(nextval('world_object_instances_instance_id_seq')""" + 
+                                  helper['holders'] + """)""", len(entities), True)
+            # multi-row inserts return their rows in the order of the values
+            instance_ids = [r[0] for r in rows]
+            # every instance has a pose row, even if it is empty
+            for instance_id, (cold, hot) in zip(instance_ids, split):
+                hot['instance_id'] = instance_id
+            helper = self._build_batch_helper([h for c, h in split])
+            execute_values(cur, """INSERT INTO """ + self._poses + """ (""" + helper['cols'] + 
+                           """) VALUES %s""", helper['values'], 
+                           """(""" + helper['holders'] + """)""", len(entities))
+            conn.commit()
+            cur.close()
+        return instance_ids
+
+    def copy_many(self, entities):
+        '''
+        Insert the given entities into the world_object_instances table with COPY in one
+        transaction, which is faster than insert_many for large batches. A unique instance_id will
+        be set for each and returned.
+        
+        @param entities: the entities to insert with the correct keys for the columns
+        @type  entities: list
+        @return: the instance_ids, in the same order as the entities
+        @rtype: list
+        '''
+        if len(entities) is 0:
+            return []
+        split = [self._split(e) for e in entities]
+        with self._pool.connection() as conn:
+            # create a cursor
+            cur = conn.cursor()
+            instance_ids = reserve_ids(cur, 'world_object_instances_instance_id_seq', 
+                                       len(entities))
+            # every instance has a pose row, even if it is empty
+            for table, rows in [(self._woi, [c for c, h in split]), 
+                                (self._poses, [h for c, h in split])]:
+                cols = set()
+                for e in rows:
+                    cols.update(e.keys())
+                cols = ['instance_id'] + sorted(cols - set(['instance_id']))
+                values = [(i,) + tuple([e.get(c) for c in cols[1:]]) 
+                          for i, e in zip(instance_ids, rows)]
+                copy_rows(cur, table, cols, values, self.timestamps)
+            conn.commit()
+            cur.close()
+        return instance_ids
+
     def delete(self, instance_id): 
         '''
         Delete the entity of the given instance_id from world_object_instances table.
@@ -110,17 +214,39 @@ class WorldObjectInstanceConnection(object):
         @return: result
         @rtype: bool 
         '''
-        with self.lock:
+        with self._pool.connection() as conn:
             # create a cursor
-            cur = self.conn.cursor()
+            cur = conn.cursor()
             # build the SQL
             cur.execute("""DELETE FROM """ + self._woi + """ WHERE instance_id = %s""",(instance_id,))
-            self.conn.commit()
+            conn.commit()
             cur.close()
             result = True
         return result
 
             
+    def delete_many(self, instance_ids):
+        '''
+        Delete the entities of the given instance_ids from world_object_instances table in a single
+        statement.
+        
+        @param instance_ids: the unique identifiers of the entities
+        @type  instance_ids: list
+        @return: if an entity was found and deleted, for each instance_id
+        @rtype: list
+        '''
+        if len(instance_ids) is 0:
+            return []
+        with self._pool.connection() as conn:
+            # create a cursor
+            cur = conn.cursor()
+            cur.execute("""DELETE FROM """ + self._woi + """ WHERE instance_id = ANY (%s) 
+                        RETURNING instance_id""", (list(instance_ids),))
+            deleted = set([r[0] for r in cur.fetchall()])
+            conn.commit()
+            cur.close()
+        return [i in deleted for i in instance_ids]
+
     def update_entity_by_instance_id(self, instance_id, entity):
         '''
         Update the entity in the world_object_instances table with the given instance_id, if one
@@ -133,56 +259,240 @@ class WorldObjectInstanceConnection(object):
         @return: if an entity was found and updated with the given instance_id
         @rtype:  bool
         '''
-        with self.lock:
+        with self._pool.connection() as conn:
             # create a cursor
-            cur = self.conn.cursor()
-            # check if the instance actually exists
+            cur = conn.cursor()
+            result = self._update(cur, instance_id, entity)
+            conn.commit()
+            cur.close()
+        return result
+
+    def upsert_by_tags(self, tags, entity, update=None):
+        '''
+        Find the instance in the world_object_instances table that contains the given list of tags
+        and (optionally) update it, or insert the given entity as a new instance if none matches.
+        This is done in one transaction which holds an advisory lock on the tags, so concurrent
+        upserts with the same tags cannot create duplicates. If several instances match, the
+        oldest one is used.
+        
+        @param tags: the list of tags an existing instance must contain
+        @type  tags: list
+        @param entity: the entity to insert if no instance matches
+        @type  entity: dict
+        @param update: the entity to update a matching instance with, or None to leave it as is
+        @type  update: dict
+        @return: the instance_id of the matching or new instance, and if it was created
+        @rtype: tuple
+        '''
+        if len(tags) is 0:
+            raise ValueError('At least one tag is required to match an instance.')
+        with self._pool.connection() as conn:
+            # create a cursor
+            cur = conn.cursor()
+            # serialize upserts of the same tags until the end of the transaction
+            key = '\x1f'.join(sorted(set(tags)))
+            cur.execute("""SELECT pg_advisory_xact_lock(%s, hashtext(%s))""", 
+                        (self._upsert_lock, key))
             cur.execute("""SELECT instance_id FROM """ + self._woi + 
-                        """ WHERE instance_id = %s""", (instance_id,))
-            if len(cur.fetchall()) is 0:
-                cur.close()
-                result = False
+                        """ WHERE tags @> %s::character varying[] 
+                        ORDER BY instance_id LIMIT 1""", (list(tags),))
+            row = cur.fetchone()
+            if row is None:
+                result = (self._insert(cur, entity), True)
             else:
-                # ensure the instance ID does not get set by the user
-                if 'instance_id' in entity.keys():
-                    del entity['instance_id']
-                # build the SQL
-                helper = self._build_sql_helper(entity)
-                # build the SQL
-                helper['values'] += (instance_id,)
-                cur.execute("""UPDATE """ + self._woi + 
-                            """ SET (""" + helper['cols'] + """) = (""" + helper['holders'] + 
-                            """) WHERE instance_id = %s""", helper['values'])
-                self.conn.commit()
-                cur.close()
-                result = True
+                if update is not None:
+                    self._update(cur, row[0], update)
+                result = (row[0], False)
+            conn.commit()
+            cur.close()
         return result
     
-    def search_tags(self, tags):
+    def update_many(self, updates):
+        '''
+        Update the entities in the world_object_instances table with the given instance_ids in one
+        transaction. Entities which set the same columns are updated with a single multi-row
+        statement.
+        
+        @param updates: an (instance_id, entity) tuple for each entity to update
+        @type  updates: list
+        @return: if an entity was found and updated, for each instance_id
+        @rtype: list
+        '''
+        # group the updates by the columns they set
+        groups = {}
+        for instance_id, entity in updates:
+            # ensure the instance ID does not get set by the user
+            if 'instance_id' in entity.keys():
+                del entity['instance_id']
+            entity['instance_id'] = instance_id
+            groups.setdefault(tuple(sorted(entity.keys())), []).append(entity)
+        updated = set()
+        with self._pool.connection() as conn:
+            # create a cursor
+            cur = conn.cursor()
+            for entities in groups.values():
+                # build the SQL
+                helper = self._build_batch_helper(entities)
+                cols = [c for c in helper['cols'].split(', ') if c != 'instance_id']
+                hot = [c for c in cols if c in self._hot]
+                cold = [c for c in cols if c not in self._hot]
+                if len(hot) is 0:
+                    # no pose to set, only check that the instances exist
+                    cur.execute("""SELECT instance_id FROM """ + self._woi + 
+                                """ WHERE instance_id = ANY (%s)""", 
+                                ([e['instance_id'] for e in entities],))
+                    rows = cur.fetchall()
+                else:
+                    rows = execute_values(cur, """UPDATE """ + self._poses + """ AS t SET """ + 
+                                          ', '.join([c + ' = v.' + c for c in hot]) + 
+                                          """ FROM (VALUES %s) AS v (""" + helper['cols'] + """) 
+                                          WHERE t.instance_id = v.instance_id 
+                                          RETURNING t.instance_id""", helper['values'], 
+                                          """(""" + helper['holders'] + """)""", 
+                                          len(entities), True)
+                updated.update([r[0] for r in rows])
+                if len(cold) > 0:
+                    # rows whose other fields did not change are not rewritten
+                    execute_values(cur, """UPDATE """ + self._woi + """ AS t SET """ + 
+                                   ', '.join([c + ' = v.' + c for c in cold]) + 
+                                   """ FROM (VALUES %s) AS v (""" + helper['cols'] + """) 
+                                   WHERE t.instance_id = v.instance_id AND (""" + 
+                                   ', '.join(['t.' + c for c in cold]) + 
+                                   """) IS DISTINCT FROM (""" + 
+                                   ', '.join(['v.' + c for c in cold]) + """)""", 
+                                   helper['values'], """(""" + helper['holders'] + """)""", 
+                                   len(entities))
+            conn.commit()
+            cur.close()
+        return [u[0] in updated for u in updates]
+
+    def expire(self, batch_size=1000):
+        '''
+        End the instances in the world_object_instances table whose expected_ttl has passed since
+        their last update (or their creation, if they were never updated) by setting their
+        perceived_end to the current time. Instances locked by other transactions are left for
+        the next call.
+        
+        @param batch_size: the maximum number of instances to end
+        @type  batch_size: int
+        @return: the instance_ids of the ended instances
+        @rtype: list
+        '''
+        with self._pool.connection() as conn:
+            # create a cursor
+            cur = conn.cursor()
+            cur.execute("""WITH expired AS (SELECT i.instance_id FROM """ + self._woi + """ AS i 
+                        JOIN """ + self._poses + """ AS p ON p.instance_id = i.instance_id 
+                        WHERE i.expected_ttl > 0 AND i.perceived_end IS NULL 
+                        AND coalesce(p.update, i.creation) + i.expected_ttl * interval '1 second' 
+                        < now() ORDER BY i.instance_id LIMIT %s FOR UPDATE OF i SKIP LOCKED) 
+                        UPDATE """ + self._woi + """ AS t SET perceived_end = now() FROM expired 
+                        WHERE t.instance_id = expired.instance_id 
+                        RETURNING t.instance_id""", (batch_size,))
+            expired = [r[0] for r in cur.fetchall()]
+            conn.commit()
+            cur.close()
+        return expired
+
+    def archive(self, batch_size=1000):
+        '''
+        Move the instances in the world_object_instances table which have a perceived_end into
+        the archive table, along with their poses. Instances locked by other transactions are
+        left for the next call.
+        
+        @param batch_size: the maximum number of instances to move
+        @type  batch_size: int
+        @return: the instance_ids of the moved instances
+        @rtype: list
+        '''
+        with self._pool.connection() as conn:
+            # create a cursor
+            cur = conn.cursor()
+            # the pose rows are removed along with the instances
+            cur.execute("""WITH ended AS (SELECT instance_id FROM """ + self._woi + """ 
+                        WHERE perceived_end IS NOT NULL ORDER BY instance_id LIMIT %s 
+                        FOR UPDATE SKIP LOCKED), 
+                        archived AS (INSERT INTO """ + self._archive + """ (""" + 
+                        ', '.join(self._columns) + """) SELECT """ + 
+                        ', '.join(['v.' + c for c in self._columns]) + """ FROM """ + 
+                        self._view + """ AS v JOIN ended ON ended.instance_id = v.instance_id 
+                        RETURNING instance_id) 
+                        DELETE FROM """ + self._woi + """ AS t USING archived 
+                        WHERE t.instance_id = archived.instance_id 
+                        RETURNING t.instance_id""", (batch_size,))
+            archived = [r[0] for r in cur.fetchall()]
+            conn.commit()
+            cur.close()
+        return archived
+
+    def search_instance_id(self, instance_id):
+        '''
+        Search for and return the entity in the world_object_instances table with the given
+        instance_id.
+        
+        @param instance_id: the instance_id to search for
+        @type  instance_id: int
+        @return: the entity found, or None if no entity has the given instance_id
+        @rtype: dict
+        '''
+        with self._pool.connection(False) as conn:
+            # create a cursor
+            cur = conn.cursor()
+            cur.execute("""SELECT """ + self._select + """ FROM """ + self._view + 
+                        """ WHERE instance_id = %s""", (instance_id,))
+            result = cur.fetchone()
+            cur.close()
+        return None if result is None else self._db_to_dict(result)
+
+    def search_instance_ids(self, instance_ids, primary=False):
+        '''
+        Search for and return the entities in the world_object_instances table with the given
+        instance_ids in a single query.
+        
+        @param instance_ids: the instance_ids to search for
+        @type  instance_ids: list
+        @param primary: if the entities must be read from the primary database, since a replica
+                        may not have replayed the latest changes yet
+        @type  primary: bool
+        @return: the entities found
+        @rtype: list
+        '''
+        final = []
+        if len(instance_ids) > 0:
+            # connections which may write always use the primary
+            with self._pool.connection(primary) as conn:
+                # create a cursor
+                cur = conn.cursor()
+                cur.execute("""SELECT """ + self._select + """ FROM """ + self._view + 
+                            """ WHERE instance_id = ANY (%s)""", (list(instance_ids),))
+                for r in cur.fetchall():
+                    final.append(self._db_to_dict(r))
+                cur.close()
+        return final
+
+    def search_tags(self, tags, after_id=0, limit=0):
         '''
         Search for and return all entities in the world_object_instances table that contain the
-        given list of tags.
+        given list of tags, ordered by instance_id. Results can be paged by passing the last
+        instance_id of the previous page as after_id.
         
         @param tags: the list of tags to search for
         @type  tags: list
+        @param after_id: only return entities with a instance_id greater than this
+        @type  after_id: int
+        @param limit: the maximum number of entities to return (0 for no limit)
+        @type  limit: int
         @return: the entities found
         @rtype: list
         '''
         final = []
         # do not search empty arrays
         if len(tags) > 0:
-            # build the SQL
-            sql = """SELECT * FROM """ + self._woi + """ WHERE ("""
-            values = ()
-            for t in tags:
-                sql += "%s = ANY (tags) AND "
-                values += (t,)
-            # remove the trailing ' AND '
-            sql = sql[:-5] + """);"""
-            with self.lock:
+            with self._pool.connection(False) as conn:
                 # create a cursor
-                cur = self.conn.cursor()
-                cur.execute(sql, values)
+                cur = conn.cursor()
+                cur.execute(self._build_tag_search(limit), self._tag_search_values(tags, after_id, 
+                                                                                    limit))
                 # extract the values
                 results = cur.fetchall()
                 for r in results:
@@ -190,61 +500,424 @@ class WorldObjectInstanceConnection(object):
                     final.append(self._db_to_dict(r))
                 cur.close()
         return final
-    
+
+    def stream_tags(self, tags, chunk_size=100, after_id=0, limit=0):
+        '''
+        Search for all entities in the world_object_instances table that contain the given list of
+        tags, ordered by instance_id, and yield them in lists of at most chunk_size. Rows are
+        pulled through a server-side cursor, so only one chunk is held in memory at a time. The
+        connection is returned to the pool once the generator is exhausted or closed.
+        
+        @param tags: the list of tags to search for
+        @type  tags: list
+        @param chunk_size: the maximum number of entities in each list
+        @type  chunk_size: int
+        @param after_id: only return entities with a instance_id greater than this
+        @type  after_id: int
+        @param limit: the maximum number of entities to return (0 for no limit)
+        @type  limit: int
+        @return: a generator of lists of the entities found
+        @rtype: generator
+        '''
+        # do not search empty arrays
+        if len(tags) > 0:
+            with self._pool.connection(False) as conn:
+                # a named cursor is kept on the server and read in chunks
+                cur = conn.cursor('tag_search')
+                cur.itersize = chunk_size
+                cur.execute(self._build_tag_search(limit), self._tag_search_values(tags, after_id, 
+                                                                                    limit))
+                while True:
+                    results = cur.fetchmany(chunk_size)
+                    if len(results) is 0:
+                        break
+                    yield [self._db_to_dict(r) for r in results]
+                cur.close()
+                conn.commit()
+
+    def stream(self, chunk_size=100, tags=None, start=None, end=None):
+        '''
+        Yield all entities in the world_object_instances table, ordered by instance_id, in lists
+        of at most chunk_size. Only entities which contain the given tags and which were last
+        updated (or created, if never updated) within the given time range are returned. Rows are
+        pulled through a server-side cursor, so only one chunk is held in memory at a time.
+        
+        @param chunk_size: the maximum number of entities in each list
+        @type  chunk_size: int
+        @param tags: if given, only return entities that contain all of these tags
+        @type  tags: list
+        @param start: if given, the earliest update time (unix time) of the entities returned
+        @type  start: float
+        @param end: if given, the latest update time (unix time) of the entities returned
+        @type  end: float
+        @return: a generator of lists of the entities found
+        @rtype: generator
+        '''
+        # build the SQL
+        where = []
+        values = ()
+        if tags:
+            where.append("""tags @> %s::character varying[]""")
+            values += (list(tags),)
+        if start is not None:
+            where.append("""coalesce(update, creation) >= to_timestamp(%s)""")
+            values += (start,)
+        if end is not None:
+            where.append("""coalesce(update, creation) <= to_timestamp(%s)""")
+            values += (end,)
+        sql = """SELECT """ + self._select + """ FROM """ + self._view
+        if len(where) > 0:
+            sql += """ WHERE """ + """ AND """.join(where)
+        with self._pool.connection(False) as conn:
+            # a named cursor is kept on the server and read in chunks
+            cur = conn.cursor('instance_stream')
+            cur.itersize = chunk_size
+            cur.execute(sql + """ ORDER BY instance_id""", values)
+            while True:
+                results = cur.fetchmany(chunk_size)
+                if len(results) is 0:
+                    break
+                yield [self._db_to_dict(r) for r in results]
+            cur.close()
+            conn.commit()
+
+    def _build_tag_search(self, limit):
+        '''
+        Build the SQL of a tag search. Containment on the tag array can be answered by the GIN
+        index on tags.
+        
+        @param limit: the maximum number of entities to return (0 for no limit)
+        @type  limit: int
+        @return: the SQL for the search
+        @rtype: string
+        '''
+        sql = ("""SELECT """ + self._select + """ FROM """ + self._view + 
+               """ WHERE tags @> %s::character varying[] AND instance_id > %s 
+               ORDER BY instance_id""")
+        if limit > 0:
+            sql += """ LIMIT %s"""
+        return sql
+
+    def _tag_search_values(self, tags, after_id, limit):
+        '''
+        Build the values of a tag search.
+        
+        @param tags: the list of tags to search for
+        @type  tags: list
+        @param after_id: only return entities with a instance_id greater than this
+        @type  after_id: int
+        @param limit: the maximum number of entities to return (0 for no limit)
+        @type  limit: int
+        @return: the values for the search
+        @rtype: tuple
+        '''
+        values = (list(tags), after_id)
+        if limit > 0:
+            values += (limit,)
+        return values
+
+    def search_box(self, min_x, min_y, max_x, max_y, frame_id=None, tags=None):
+        '''
+        Search for and return all entities in the world_object_instances table whose X, Y position
+        lies within the given bounding box.
+        
+        @param min_x: the minimum X value of the box
+        @type  min_x: float
+        @param min_y: the minimum Y value of the box
+        @type  min_y: float
+        @param max_x: the maximum X value of the box
+        @type  max_x: float
+        @param max_y: the maximum Y value of the box
+        @type  max_y: float
+        @param frame_id: if given, only search instances with a pose in this frame
+        @type  frame_id: string
+        @param tags: if given, only search instances that contain all of these tags
+        @type  tags: list
+        @return: the entities found
+        @rtype: list
+        '''
+        where = self._build_spatial_filter(frame_id, tags)
+        return self._search_spatial(
+                """SELECT """ + self._select + """ FROM """ + self._view + 
+                """ WHERE """ + self._in_cells("""box(point(%s, %s), point(%s, %s))""") + 
+                """ AND """ + self._position + """ <@ box(point(%s, %s), point(%s, %s))""" + 
+                where['sql'], 
+                (min_x, min_y, max_x, max_y) * 2 + where['values'])
+
+    def search_radius(self, x, y, radius, frame_id=None, tags=None):
+        '''
+        Search for and return all entities in the world_object_instances table whose X, Y position
+        lies within the given distance of a point.
+        
+        @param x: the X value of the center point
+        @type  x: float
+        @param y: the Y value of the center point
+        @type  y: float
+        @param radius: the maximum distance from the center point
+        @type  radius: float
+        @param frame_id: if given, only search instances with a pose in this frame
+        @type  frame_id: string
+        @param tags: if given, only search instances that contain all of these tags
+        @type  tags: list
+        @return: the entities found
+        @rtype: list
+        '''
+        where = self._build_spatial_filter(frame_id, tags)
+        return self._search_spatial(
+                """SELECT """ + self._select + """ FROM """ + self._view + 
+                """ WHERE """ + self._in_cells("""box(point(%s, %s), point(%s, %s))""") + 
+                """ AND """ + self._position + """ <@ circle(point(%s, %s), %s)""" + 
+                where['sql'], 
+                (x - radius, y - radius, x + radius, y + radius, x, y, radius) + where['values'])
+
+    def search_nearest(self, x, y, k, frame_id=None, tags=None):
+        '''
+        Search for and return the k entities in the world_object_instances table whose X, Y
+        position is closest to a point, closest first.
+        
+        @param x: the X value of the point
+        @type  x: float
+        @param y: the Y value of the point
+        @type  y: float
+        @param k: the maximum number of entities to return
+        @type  k: int
+        @param frame_id: if given, only search instances with a pose in this frame
+        @type  frame_id: string
+        @param tags: if given, only search instances that contain all of these tags
+        @type  tags: list
+        @return: the entities found
+        @rtype: list
+        '''
+        if k <= 0:
+            return []
+        where = self._build_spatial_filter(frame_id, tags)
+        # the k instances in the nearest cells are found by walking the GiST index; the true k
+        # nearest instances can be no further away than the furthest of them, so only the cells
+        # within that distance need to be searched
+        return self._search_spatial(
+                """WITH bound AS (SELECT max(distance) AS d FROM (
+                    SELECT """ + self._position + """ <-> point(%s, %s) AS distance 
+                    FROM """ + self._cells + """ c JOIN """ + self._view + """ v 
+                    ON v.instance_id = c.instance_id WHERE pose_position IS NOT NULL""" + 
+                    where['sql'] + """ ORDER BY c.cell <-> point(%s, %s) LIMIT %s) AS nearest) 
+                SELECT """ + self._select + """ FROM """ + self._view + """ 
+                WHERE instance_id IN (SELECT c.instance_id FROM """ + self._cells + """ c, bound 
+                    WHERE c.cell && box(point(%s - d, %s - d), point(%s + d, %s + d)))""" + 
+                where['sql'] + """ ORDER BY """ + self._position + """ <-> point(%s, %s) LIMIT %s""", 
+                (x, y) + where['values'] + (x, y, k, x, y, x, y) + where['values'] + (x, y, k))
+
+    def _in_cells(self, box):
+        '''
+        A helper function to build the SQL which restricts a search to the instances in the grid
+        cells which overlap a box, using the GiST index of the cells.
+        
+        @param box: the SQL of the box
+        @type  box: string
+        @return: the SQL of the restriction
+        @rtype: string
+        '''
+        return ("""instance_id IN (SELECT instance_id FROM """ + self._cells + """ 
+                WHERE cell && """ + box + """)""")
+
+    def _search_spatial(self, sql, values):
+        '''
+        Run one of the spatial searches and convert the results.
+        
+        @param sql: the query to run
+        @type  sql: string
+        @param values: the values for the query
+        @type  values: tuple
+        @return: the entities found
+        @rtype: list
+        '''
+        final = []
+        with self._pool.connection(False) as conn:
+            # create a cursor
+            cur = conn.cursor()
+            cur.execute(sql, values)
+            for r in cur.fetchall():
+                final.append(self._db_to_dict(r))
+            cur.close()
+        return final
+
+    def _build_spatial_filter(self, frame_id, tags):
+        '''
+        A helper function to build the optional frame and tag restrictions of a spatial search.
+        This will create a dict containing the SQL to append to the WHERE clause and a tuple of
+        its values.
+        
+        @param frame_id: the frame to restrict the search to, or None
+        @type  frame_id: string
+        @param tags: the tags to restrict the search to, or None
+        @type  tags: list
+        @return: the dictionary containing the two helper variables
+        @rtype: dict
+        '''
+        final = {'sql' : '', 'values' : ()}
+        if frame_id:
+            final['sql'] += """ AND pose_frame_id = %s"""
+            final['values'] += (frame_id,)
+        if tags:
+            final['sql'] += """ AND tags @> %s::character varying[]"""
+            final['values'] += (list(tags),)
+        return final
+
+    def _insert(self, cur, entity):
+        '''
+        Insert the given entity with the given cursor without committing.
+        
+        @param cur: the cursor of the transaction to insert in
+        @type  cur: Cursor
+        @param entity: the entity to insert with the correct keys for the columns
+        @type  entity: dict
+        @return: the instance_id
+        @rtype: integer
+        '''
+        # ensure the instance ID does not get set by the user
+        if 'instance_id' in entity.keys():
+            del entity['instance_id']
+        cold, hot = self._split(entity)
+        # build the SQL
+        helper = self._build_sql_helper(cold)
+        cols = ''.join([', ' + c for c in helper['cols']])
+        holders = ''.join([', ' + h for h in helper['holders']])
+        self._pool.statements.execute(cur, (self._woi, 'insert') + helper['cols'], 
+                                      lambda: """INSERT INTO """ + self._woi + 
+                                      """ (instance_id""" + cols + """) 
+                                      VALUES (nextval('world_object_instances_instance_id_seq')""" + 
+                                      holders + """) RETURNING instance_id""", helper['values'])
+        instance_id = cur.fetchone()[0]
+        # every instance has a pose row, even if it is empty
+        hot['instance_id'] = instance_id
+        helper = self._build_sql_helper(hot)
+        self._pool.statements.execute(cur, (self._poses, 'insert') + helper['cols'], 
+                                      lambda: """INSERT INTO """ + self._poses + """ (""" + 
+                                      ', '.join(helper['cols']) + """) VALUES (""" + 
+                                      ', '.join(helper['holders']) + """)""", helper['values'])
+        return instance_id
+
+    def _update(self, cur, instance_id, entity):
+        '''
+        Update the entity with the given instance_id with the given cursor without committing.
+        This is a single statement which reports if a row matched.
+        
+        @param cur: the cursor of the transaction to update in
+        @type  cur: Cursor
+        @param instance_id: the instance_id of the entity to update
+        @type  instance_id: int
+        @param entity: the entity to update with
+        @type  entity: dict
+        @return: if an entity was found and updated with the given instance_id
+        @rtype:  bool
+        '''
+        # ensure the instance ID does not get set by the user
+        if 'instance_id' in entity.keys():
+            del entity['instance_id']
+        cold, hot = self._split(entity)
+        # the narrow pose row is always rewritten
+        helper = self._build_sql_helper(hot)
+        if len(helper['cols']) is 0:
+            # no pose to set, only check that the instance exists
+            self._pool.statements.execute(cur, (self._woi, 'exists'), 
+                                          lambda: """SELECT instance_id FROM """ + self._woi + 
+                                          """ WHERE instance_id = %s""", (instance_id,))
+        else:
+            sets = ', '.join([c + ' = ' + h for c, h in zip(helper['cols'], helper['holders'])])
+            self._pool.statements.execute(cur, (self._poses, 'update') + helper['cols'], 
+                                          lambda: """UPDATE """ + self._poses + """ SET """ + 
+                                          sets + """ WHERE instance_id = %s 
+                                          RETURNING instance_id""", 
+                                          helper['values'] + (instance_id,))
+        if cur.fetchone() is None:
+            return False
+        helper = self._build_sql_helper(cold)
+        if len(helper['cols']) > 0:
+            # cast the values so they can be compared with the stored ones
+            holders = [h if c in self.timestamps else h + '::' + self._types[c] 
+                       for c, h in zip(helper['cols'], helper['holders'])]
+            # the wide row is only rewritten if one of its fields changed
+            self._pool.statements.execute(cur, (self._woi, 'update') + helper['cols'], 
+                                          lambda: """UPDATE """ + self._woi + """ SET """ + 
+                                          ', '.join([c + ' = ' + h for c, h in 
+                                                     zip(helper['cols'], holders)]) + 
+                                          """ WHERE instance_id = %s AND (""" + 
+                                          ', '.join(helper['cols']) + 
+                                          """) IS DISTINCT FROM (""" + ', '.join(holders) + 
+                                          """)""", 
+                                          helper['values'] + (instance_id,) + helper['values'])
+        return True
+
+    def _split(self, entity):
+        '''
+        Split an entity into the fields stored in the world_object_instances table and the
+        frequently updated fields stored in the pose table.
+        
+        @param entity: the entity to split
+        @type  entity: dict
+        @return: the dictionaries of the instance fields and of the pose fields
+        @rtype: tuple
+        '''
+        cold = {}
+        hot = {}
+        for k in entity.keys():
+            if k in self._hot:
+                hot[k] = entity[k]
+            else:
+                cold[k] = entity[k]
+        return (cold, hot)
+
     def _db_to_dict(self, entity):
         '''
-        Convert a database tuple to a dict. This will also convert timestamps back into unix time.
-        This function assumes the tuple is in the correct order.
+        Convert a database tuple selected with the select list of full instances to a dict keyed 
+        by column name. Timestamps are already unix time.
         
         @param entity: the entity to build the dictionary for
         @type  entity: tuple
         @return: the dictionary containing the information from the database
         @rtype: dict
         '''
-        # convert each one assuming the ordering is correct
-        final = {
-                'instance_id' : entity[0],
-                'name' : entity[1],
-                'creation' : None if entity[2] is None else float(entity[2].strftime('%s.%f')),
-                'update' : None if entity[3] is None else float(entity[3].strftime('%s.%f')),
-                'expected_ttl' : entity[4],
-                'perceived_end' : None if entity[5] is None else float(entity[5].strftime('%s.%f')),
-                'source_origin' : entity[6],
-                'source_creator' : entity[7],
-                'pose_seq' : entity[8],
-                'pose_stamp' : None if entity[9] is None else float(entity[9].strftime('%s.%f')),
-                'pose_frame_id' : entity[10],
-                'pose_position' : entity[11],
-                'pose_orientation' : entity[12],
-                'pose_covariance' : entity[13],
-                'description_id' : entity[14],
-                'properties' : entity[15],
-                'tags' : entity[16],
-                }
-        return final
+        return dict(zip(self._columns, entity))
 
     def _build_sql_helper(self, entity):
         '''
         A helper function to build the SQL for an insertion/update. This will take the entity dict
-        and create a new dict containing a string of comma separated column names, a string of
-        comma separated place holders (either '%s' or 'to_timestamp(...)'), and a tuple of the
-        values.
+        and create a new dict containing a tuple of the sorted column names, a tuple of the
+        matching place holders (either '%s' or 'to_timestamp(%s)'), and a tuple of the values.
+        Entities which set the same columns share the same statement.
         
         @param entity: the entity to build the SQL helper for
         @type  entity: dict
         @return: the dictionary containing the three helper variables
         @rtype: dict
         '''
-        final = {'cols' : '', 'holders' : '', 'values' : ()}
-        for k in entity.keys():
-            final['cols'] += k + ', '
+        cols = tuple(sorted(entity.keys()))
+        # check if each is a timestamp
+        holders = tuple(['to_timestamp(%s)' if c in self.timestamps else '%s' for c in cols])
+        return {'cols' : cols, 'holders' : holders, 'values' : tuple([entity[c] for c in cols])}
+
+    def _build_batch_helper(self, entities):
+        '''
+        A helper function to build the SQL for a multi-row insertion/update. This will take a list
+        of entity dicts and create a new dict containing a string of comma separated column names
+        (all columns set by any entity), a string of comma separated place holders (either
+        '%s::type' or 'to_timestamp(%s)'), and a list of value tuples with None for the columns an
+        entity does not set.
+        
+        @param entities: the entities to build the SQL helper for
+        @type  entities: list
+        @return: the dictionary containing the three helper variables
+        @rtype: dict
+        '''
+        cols = set()
+        for e in entities:
+            cols.update(e.keys())
+        cols = sorted(cols)
+        holders = []
+        for c in cols:
             # check if this is a timestamp
-            if k in self.timestamps:
-                final['holders'] += 'to_timestamp(' + str(entity[k]) + '), '
-            else :
-                final['holders'] += '%s, '
-                final['values'] += (entity[k],)
-        # remove trailing ', '
-        final['cols'] = final['cols'][:-2]
-        final['holders'] = final['holders'][:-2]
-        return final
+            if c in self.timestamps:
+                holders.append('to_timestamp(%s)')
+            else:
+                holders.append('%s::' + self._types[c])
+        values = [tuple([e.get(c) for c in cols]) for e in entities]
+        return {'cols' : ', '.join(cols), 'holders' : ', '.join(holders), 'values' : values}
@@ -0,0 +1,90 @@
+# Software License Agreement (BSD License)
+#
+# Copyright (c) 2013, Willow Garage, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above
+# copyright notice, this list of conditions and the following
+# disclaimer in the documentation and/or other materials provided
+# with the distribution.
+# * Neither the name of Willow Garage, Inc. nor the names of its
+# contributors may be used to endorse or promote products derived
+# from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Tests of the COPY text format written by bulk_copy, with a fake cursor in place of a database.
+
+@author:  Jihoon Lee
+@version: October 16, 2026
+'''
+
+import unittest
+from worldlib.bulk_copy import copy_rows, reserve_ids
+
+class FakeCursor(object):
+    '''
+    A stand-in for a psycopg2 cursor which records what it is given.
+    '''
+
+    def __init__(self):
+        self.executed = []
+        self.copied = []
+
+    def execute(self, sql, values=None):
+        self.executed.append((sql, values))
+
+    def fetchall(self):
+        return [(7,), (9,)]
+
+    def copy_expert(self, sql, f):
+        self.copied.append((sql, f.read()))
+
+class TestBulkCopy(unittest.TestCase):
+    '''
+    Tests of copy_rows and reserve_ids.
+    '''
+
+    def test_reserve_ids(self):
+        cur = FakeCursor()
+        self.assertEqual(reserve_ids(cur, 'things_id_seq', 2), [7, 9])
+        self.assertEqual(cur.executed[0][1], ('things_id_seq', 2))
+
+    def test_fields(self):
+        cur = FakeCursor()
+        copy_rows(cur, 'things', ['id', 'name', 'ok', 'value'], 
+                  [(1, 'a\tb\nc\\d', True, 0.1), (2L, None, False, -2.5e-9)])
+        self.assertEqual(cur.copied, [('COPY things (id, name, ok, value) FROM STDIN', 
+                                       '1\ta\\tb\\nc\\\\d\tt\t0.1\n2\t\\N\tf\t-2.5e-09\n')])
+
+    def test_arrays(self):
+        cur = FakeCursor()
+        copy_rows(cur, 'things', ['tags'], [(['x', 'say "hi"', None, u'caf\xe9'],), ([],)])
+        self.assertEqual(cur.copied[0][1], 
+                         '{"x","say \\\\"hi\\\\"",NULL,"caf\xc3\xa9"}\n{}\n')
+
+    def test_timestamps(self):
+        cur = FakeCursor()
+        copy_rows(cur, 'things', ['id', 'creation'], [(1, 1.5), (2, None)], ['creation'])
+        self.assertEqual(cur.copied[0][1], '1\t1970-01-01T00:00:01.500000+00\n2\t\\N\n')
+
+if __name__ == '__main__':
+    unittest.main()
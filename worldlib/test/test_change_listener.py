@@ -0,0 +1,191 @@
+# Software License Agreement (BSD License)
+#
+# Copyright (c) 2013, Willow Garage, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above
+# copyright notice, this list of conditions and the following
+# disclaimer in the documentation and/or other materials provided
+# with the distribution.
+# * Neither the name of Willow Garage, Inc. nor the names of its
+# contributors may be used to endorse or promote products derived
+# from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Tests of the ChangeListener class, with fake connections in place of a database.
+
+@author:  Jihoon Lee
+@version: October 16, 2026
+'''
+
+import json
+import psycopg2
+import threading
+import time
+import unittest
+from worldlib import change_listener
+from worldlib.change_listener import ChangeListener
+
+class FakeNotify(object):
+    '''
+    A stand-in for a psycopg2 notification.
+    '''
+
+    def __init__(self, payload):
+        self.payload = json.dumps(payload)
+
+class FakeCursor(object):
+    '''
+    A stand-in for a psycopg2 cursor which ignores its statements.
+    '''
+
+    def execute(self, sql):
+        pass
+
+    def close(self):
+        pass
+
+class FakeConnection(object):
+    '''
+    A stand-in for a psycopg2 connection which delivers the given batches of notifications, or
+    raises an error in place of a batch which is an exception.
+    '''
+
+    def __init__(self, batches):
+        self.batches = list(batches)
+        self.notifies = []
+        self.closed = 0
+
+    def set_isolation_level(self, level):
+        pass
+
+    def cursor(self):
+        return FakeCursor()
+
+    def poll(self):
+        batch = self.batches.pop(0)
+        if isinstance(batch, Exception):
+            raise batch
+        self.notifies.extend([FakeNotify(p) for p in batch])
+
+    def close(self):
+        self.closed = 1
+
+class FakeSelect(object):
+    '''
+    A stand-in for the select module which reports a connection readable while it has batches
+    left.
+    '''
+
+    def select(self, rlist, wlist, xlist, timeout):
+        if len(rlist[0].batches) > 0:
+            return (rlist, [], [])
+        time.sleep(0.01)
+        return ([], [], [])
+
+class TestChangeListener(unittest.TestCase):
+    '''
+    Tests of the ChangeListener class.
+    '''
+
+    def setUp(self):
+        # the fake connections to open, in order
+        self.connections = []
+        self.opened = []
+        self._connect = psycopg2.connect
+        self._select = change_listener.select
+        psycopg2.connect = self.connect
+        change_listener.select = FakeSelect()
+        self.listener = None
+
+    def tearDown(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener._thread.join()
+        psycopg2.connect = self._connect
+        change_listener.select = self._select
+
+    def connect(self, **kwargs):
+        if len(self.connections) == 0:
+            raise psycopg2.OperationalError('no more connections')
+        conn = self.connections.pop(0)
+        self.opened.append(conn)
+        return conn
+
+    def wait(self, event):
+        self.assertTrue(event.wait(5.0))
+
+    def test_parse(self):
+        self.connections = [FakeConnection([[
+            {'op' : 'INSERT', 'instance_id' : 1, 'tags' : ['red']},
+            {'op' : 'UPDATE', 'instance_id' : 1, 'tags' : ['blue'], 'old_tags' : ['red']},
+            {'op' : 'UPDATE', 'instance_id' : 2, 'tags' : None},
+            {'op' : 'DELETE', 'instance_id' : 1, 'tags' : ['blue']},
+            ]])]
+        received = []
+        done = threading.Event()
+        def cb(changes):
+            received.extend(changes)
+            done.set()
+        self.listener = ChangeListener('user', 'pwd', 'localhost', cb)
+        self.wait(done)
+        self.assertEqual(received, [(ChangeListener.CREATED, 1, ['red'], None),
+                                    (ChangeListener.UPDATED, 1, ['blue'], ['red']),
+                                    (ChangeListener.UPDATED, 2, [], []),
+                                    (ChangeListener.REMOVED, 1, ['blue'], None)])
+
+    def test_callback_error_keeps_connection(self):
+        self.connections = [FakeConnection([
+            [{'op' : 'INSERT', 'instance_id' : 1, 'tags' : []}],
+            [{'op' : 'INSERT', 'instance_id' : 2, 'tags' : []}],
+            ])]
+        received = []
+        done = threading.Event()
+        def cb(changes):
+            received.extend(changes)
+            if len(received) == 1:
+                raise ValueError('callback failed')
+            done.set()
+        self.listener = ChangeListener('user', 'pwd', 'localhost', cb, retry_interval=0.0)
+        self.wait(done)
+        self.assertEqual([c[1] for c in received], [1, 2])
+        self.assertEqual(len(self.opened), 1)
+        self.assertFalse(self.opened[0].closed)
+
+    def test_reconnect(self):
+        self.connections = [FakeConnection([psycopg2.OperationalError('connection lost')]),
+                            FakeConnection([[{'op' : 'INSERT', 'instance_id' : 1, 'tags' : []}]])]
+        reconnects = []
+        done = threading.Event()
+        def on_reconnect():
+            reconnects.append(len(self.opened))
+            raise ValueError('hook failed')
+        self.listener = ChangeListener('user', 'pwd', 'localhost', lambda c: done.set(),
+                                       retry_interval=0.0, on_reconnect=on_reconnect)
+        self.wait(done)
+        # only called once the second connection listens, and its error is not fatal
+        self.assertEqual(reconnects, [2])
+        self.assertTrue(self.opened[0].closed)
+        self.assertFalse(self.opened[1].closed)
+
+if __name__ == '__main__':
+    unittest.main()
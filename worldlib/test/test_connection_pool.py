@@ -0,0 +1,160 @@
+# Software License Agreement (BSD License)
+#
+# Copyright (c) 2013, Willow Garage, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above
+# copyright notice, this list of conditions and the following
+# disclaimer in the documentation and/or other materials provided
+# with the distribution.
+# * Neither the name of Willow Garage, Inc. nor the names of its
+# contributors may be used to endorse or promote products derived
+# from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Tests of the ConnectionPool class, with fake connections in place of a database.
+
+@author:  Jihoon Lee
+@version: October 16, 2026
+'''
+
+import psycopg2
+import unittest
+from worldlib.connection_pool import ConnectionPool, PoolTimeoutError, split_host
+
+class FakeConnection(object):
+    '''
+    A stand-in for a psycopg2 connection which records how it was used.
+    '''
+
+    def __init__(self):
+        self.closed = 0
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        self.rollbacks = 0
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+class FakePool(ConnectionPool):
+    '''
+    A ConnectionPool which opens fake connections.
+    '''
+
+    def __init__(self, **kwargs):
+        # every connection opened, in order
+        self.opened = []
+        ConnectionPool.__init__(self, 'user', 'pwd', **kwargs)
+
+    def _connect(self):
+        conn = FakeConnection()
+        self.opened.append(conn)
+        return conn
+
+class TestConnectionPool(unittest.TestCase):
+    '''
+    Tests of ConnectionPool.
+    '''
+
+    def test_split_host(self):
+        self.assertEqual(split_host('db'), ('db', None))
+        self.assertEqual(split_host('db:5433'), ('db', 5433))
+
+    def test_invalid_size(self):
+        self.assertRaises(ValueError, FakePool, min_size=2, max_size=1)
+
+    def test_opens_minimum_connections(self):
+        pool = FakePool(min_size=2, max_size=4)
+        self.assertEqual(pool.stats(), {'size' : 2, 'idle' : 2})
+
+    def test_connection_is_reused(self):
+        pool = FakePool(min_size=0, max_size=2)
+        with pool.connection() as first:
+            pass
+        with pool.connection() as second:
+            self.assertIs(second, first)
+        self.assertEqual(len(pool.opened), 1)
+
+    def test_timeout_when_exhausted(self):
+        pool = FakePool(min_size=0, max_size=1, timeout=0.05)
+        conn = pool.getconn()
+        self.assertRaises(PoolTimeoutError, pool.getconn)
+        # a pool timeout is still an operational error to existing callers
+        self.assertTrue(issubclass(PoolTimeoutError, psycopg2.OperationalError))
+        pool.putconn(conn)
+        self.assertIs(pool.getconn(), conn)
+
+    def test_operational_error_discards_connection(self):
+        pool = FakePool(min_size=0, max_size=1)
+        try:
+            with pool.connection() as conn:
+                raise psycopg2.OperationalError('server closed the connection')
+        except psycopg2.OperationalError:
+            pass
+        self.assertTrue(conn.closed)
+        self.assertEqual(pool.stats(), {'size' : 0, 'idle' : 0})
+        with pool.connection() as fresh:
+            self.assertIsNot(fresh, conn)
+
+    def test_other_error_rolls_back_and_keeps_connection(self):
+        pool = FakePool(min_size=0, max_size=1)
+        try:
+            with pool.connection() as conn:
+                conn.status = psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+                raise ValueError('bad value')
+        except ValueError:
+            pass
+        self.assertFalse(conn.closed)
+        self.assertTrue(conn.rollbacks > 0)
+        self.assertEqual(pool.stats(), {'size' : 1, 'idle' : 1})
+
+    def test_open_transaction_is_rolled_back_on_return(self):
+        pool = FakePool(min_size=0, max_size=1)
+        with pool.connection() as conn:
+            conn.status = psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+        self.assertEqual(conn.rollbacks, 1)
+
+    def test_closed_connection_is_replaced(self):
+        pool = FakePool(min_size=1, max_size=1)
+        dropped = pool.opened[0]
+        dropped.closed = 2
+        with pool.connection() as conn:
+            self.assertIsNot(conn, dropped)
+        self.assertEqual(pool.stats(), {'size' : 1, 'idle' : 1})
+
+    def test_close(self):
+        pool = FakePool(min_size=1, max_size=2)
+        conn = pool.getconn()
+        pool.close()
+        self.assertRaises(psycopg2.InterfaceError, pool.getconn)
+        pool.putconn(conn)
+        self.assertTrue(conn.closed)
+        self.assertEqual(pool.stats()['size'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
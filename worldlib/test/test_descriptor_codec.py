@@ -0,0 +1,80 @@
+# Software License Agreement (BSD License)
+#
+# Copyright (c) 2013, Willow Garage, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above
+# copyright notice, this list of conditions and the following
+# disclaimer in the documentation and/or other materials provided
+# with the distribution.
+# * Neither the name of Willow Garage, Inc. nor the names of its
+# contributors may be used to endorse or promote products derived
+# from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Tests of the descriptor_codec functions.
+
+@author:  Jihoon Lee
+@version: October 16, 2026
+'''
+
+import unittest
+from worldlib import descriptor_codec
+
+class TestDescriptorCodec(unittest.TestCase):
+    '''
+    Tests of encode and decode.
+    '''
+
+    def setUp(self):
+        self.data = ''.join([chr(i % 256) for i in range(5000)]) + '\x00' * 5000
+
+    def test_round_trip(self):
+        for codec in descriptor_codec.available_codecs():
+            encoded = descriptor_codec.encode(codec, self.data)
+            self.assertEqual(descriptor_codec.decode(codec, encoded), self.data, codec)
+            self.assertEqual(descriptor_codec.decode(codec, descriptor_codec.encode(codec, '')), 
+                             '', codec)
+
+    def test_compresses(self):
+        for codec in descriptor_codec.available_codecs():
+            if codec != descriptor_codec.NONE:
+                self.assertTrue(len(descriptor_codec.encode(codec, self.data)) < len(self.data), 
+                                codec)
+
+    def test_none_is_identity(self):
+        self.assertEqual(descriptor_codec.encode(descriptor_codec.NONE, self.data), self.data)
+
+    def test_data_without_codec_is_unchanged(self):
+        self.assertEqual(descriptor_codec.decode(None, 'raw'), 'raw')
+
+    def test_available(self):
+        codecs = descriptor_codec.available_codecs()
+        for codec in [descriptor_codec.NONE, descriptor_codec.ZLIB, descriptor_codec.BZ2]:
+            self.assertTrue(codec in codecs)
+
+    def test_unknown_codec(self):
+        self.assertRaises(ValueError, descriptor_codec.encode, 'unknown', 'data')
+        self.assertRaises(ValueError, descriptor_codec.decode, 'unknown', 'data')
+
+if __name__ == '__main__':
+    unittest.main()
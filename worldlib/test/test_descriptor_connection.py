@@ -0,0 +1,171 @@
+# Software License Agreement (BSD License)
+#
+# Copyright (c) 2013, Willow Garage, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above
+# copyright notice, this list of conditions and the following
+# disclaimer in the documentation and/or other materials provided
+# with the distribution.
+# * Neither the name of Willow Garage, Inc. nor the names of its
+# contributors may be used to endorse or promote products derived
+# from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Tests of how the DescriptorConnection class reads descriptor data, with a fake pool in place of a
+database.
+
+@author:  Jihoon Lee
+@version: October 16, 2026
+'''
+
+import unittest
+from contextlib import contextmanager
+from worldlib import descriptor_codec
+from worldlib.descriptor_connection import DescriptorConnection
+
+class FakeLargeObject(object):
+    '''
+    A stand-in for a psycopg2 Large Object which records the size of each read.
+    '''
+
+    def __init__(self, data, reads):
+        self._data = data
+        self._reads = reads
+        self._offset = 0
+
+    def read(self, size=-1):
+        self._reads.append(size)
+        if size < 0:
+            size = len(self._data) - self._offset
+        chunk = self._data[self._offset:self._offset + size]
+        self._offset += len(chunk)
+        return chunk
+
+    def close(self):
+        pass
+
+class FakeCursor(object):
+    '''
+    A stand-in for a psycopg2 cursor which returns the given rows.
+    '''
+
+    def __init__(self, conn, name):
+        self._conn = conn
+        self.name = name
+        self.itersize = 2000
+        conn.cursors.append(self)
+
+    def execute(self, query, values=None):
+        self._conn.queries.append(query)
+
+    def fetchall(self):
+        return self._conn.rows
+
+    def __iter__(self):
+        # lo_get is evaluated by the server, so the rows carry the contents of the Large Objects
+        for r in self._conn.rows:
+            if r[3] is not None and 'lo_get' in self._conn.queries[-1]:
+                r = r[:3] + (self._conn.objects[r[3]],) + r[4:]
+            yield r
+
+    def fetchone(self):
+        return self._conn.rows[0] if len(self._conn.rows) > 0 else None
+
+    def close(self):
+        pass
+
+class FakeConnection(object):
+    '''
+    A stand-in for a psycopg2 connection holding rows and Large Objects.
+    '''
+
+    def __init__(self, rows, objects):
+        self.rows = rows
+        self.objects = objects
+        self.queries = []
+        self.reads = {}
+        self.cursors = []
+
+    def cursor(self, name=None):
+        return FakeCursor(self, name)
+
+    def lobject(self, oid, mode='rb'):
+        return FakeLargeObject(self.objects[oid], self.reads.setdefault(oid, []))
+
+class FakePool(object):
+    '''
+    A stand-in for a ConnectionPool which always hands out the same connection.
+    '''
+
+    metrics = None
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    @contextmanager
+    def connection(self, write=True):
+        yield self._conn
+
+class TestDescriptorConnection(unittest.TestCase):
+    '''
+    Tests of DescriptorConnection.
+    '''
+
+    def setUp(self):
+        self.data = 'abcdefghij' * 1000
+        objects = {100 : descriptor_codec.encode(descriptor_codec.NONE, self.data),
+                   101 : descriptor_codec.encode(descriptor_codec.ZLIB, 'small')}
+        rows = [(1, 7, 'mesh', 100, 'r', ['a'], 'digest', descriptor_codec.NONE, None),
+                (2, 7, 'empty', None, None, None, None, None, None),
+                (3, 8, 'text', 101, None, None, None, descriptor_codec.ZLIB, None)]
+        self.conn = FakeConnection(rows, objects)
+        self.dc = DescriptorConnection(None, None, pool=FakePool(self.conn))
+        self.dc._chunk_size = 4096
+
+    def test_data_is_fetched_with_the_rows(self):
+        found = self.dc.search_by_description_ids([7, 8])
+        self.assertEqual([d['data'] for d in found[7]], [self.data, None])
+        self.assertEqual(found[8][0]['data'], 'small')
+        # one query reads every Large Object on the server, a few rows at a time
+        self.assertEqual(len(self.conn.queries), 1)
+        self.assertTrue('lo_get(data)' in self.conn.queries[0])
+        self.assertIsNotNone(self.conn.cursors[0].name)
+        self.assertEqual(self.conn.cursors[0].itersize, self.dc._fetch_size)
+        self.assertEqual(self.conn.reads, {})
+
+    def test_metadata_only_opens_no_large_object(self):
+        self.conn.rows = [r[:3] + (None,) + r[4:] for r in self.conn.rows]
+        found = self.dc.search_by_description_ids([7, 8], False)
+        self.assertEqual([d['type'] for d in found[7]], ['mesh', 'empty'])
+        self.assertEqual(self.conn.reads, {})
+        self.assertTrue('NULL' in self.conn.queries[0])
+
+    def test_search_descriptor_id(self):
+        self.conn.rows = self.conn.rows[:1]
+        self.assertEqual(self.dc.search_descriptor_id(1)['data'], self.data)
+        # the single Large Object is streamed in bounded reads
+        self.assertEqual(self.conn.reads[100], [4096] * 4)
+        self.assertIsNone(self.dc.search_descriptor_id(1, False)['data'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+# Software License Agreement (BSD License)
+#
+# Copyright (c) 2013, Willow Garage, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above
+# copyright notice, this list of conditions and the following
+# disclaimer in the documentation and/or other materials provided
+# with the distribution.
+# * Neither the name of Willow Garage, Inc. nor the names of its
+# contributors may be used to endorse or promote products derived
+# from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Tests of the descriptor_digest functions.
+
+@author:  Jihoon Lee
+@version: October 16, 2026
+'''
+
+import hashlib
+import unittest
+from worldlib.descriptor_digest import compute_digest
+
+class TestDescriptorDigest(unittest.TestCase):
+    '''
+    Tests of compute_digest.
+    '''
+
+    def test_stable(self):
+        # digests are stored, so the value for a given descriptor must never change
+        self.assertEqual(compute_digest('nav_msgs/OccupancyGrid', '{"frame": "/map"}', 'data'),
+                         'c1c46e02e40b11aede21206de046ed72efa15ab4')
+        self.assertEqual(compute_digest(None, None, None), hashlib.sha1('0:0:0:').hexdigest())
+
+    def test_missing_parts_are_empty(self):
+        self.assertEqual(compute_digest(None, None, None), compute_digest('', '', ''))
+
+    def test_unicode_is_utf8(self):
+        self.assertEqual(compute_digest(u'caf\xe9', None, None), 
+                         compute_digest('caf\xc3\xa9', None, None))
+
+    def test_parts_do_not_collide(self):
+        self.assertNotEqual(compute_digest('ab', 'c', None), compute_digest('a', 'bc', None))
+        self.assertNotEqual(compute_digest('a', None, 'b'), compute_digest('a', 'b', None))
+
+    def test_data_changes_digest(self):
+        self.assertNotEqual(compute_digest('t', 'r', 'x'), compute_digest('t', 'r', 'y'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+# Software License Agreement (BSD License)
+#
+# Copyright (c) 2013, Willow Garage, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above
+# copyright notice, this list of conditions and the following
+# disclaimer in the documentation and/or other materials provided
+# with the distribution.
+# * Neither the name of Willow Garage, Inc. nor the names of its
+# contributors may be used to endorse or promote products derived
+# from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Tests of the GoalDispatcher class, with fake goal handles in place of an action server.
+
+@author:  Jihoon Lee
+@version: October 16, 2026
+'''
+
+import threading
+import unittest
+from worldlib.goal_dispatcher import GoalDispatcher
+
+class FakeGoalHandle(object):
+    '''
+    A stand-in for a ServerGoalHandle which records the state it was set to.
+    '''
+
+    def __init__(self):
+        self.state = 'pending'
+        self.done = threading.Event()
+
+    def set_accepted(self):
+        self.state = 'active'
+
+    def set_rejected(self, result=None, text=''):
+        self.state = 'rejected'
+
+    def set_aborted(self, result=None, text=''):
+        self.state = 'aborted'
+        self.done.set()
+
+    def set_succeeded(self, result=None, text=''):
+        self.state = 'succeeded'
+        self.done.set()
+
+class TestGoalDispatcher(unittest.TestCase):
+    '''
+    Tests of GoalDispatcher.
+    '''
+
+    def setUp(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def tearDown(self):
+        # let any blocked worker finish
+        self.release.set()
+
+    def _blocking(self, gh):
+        self.started.set()
+        self.release.wait(5)
+        gh.set_succeeded()
+
+    def _succeed(self, gh):
+        gh.set_succeeded()
+
+    def test_invalid_arguments(self):
+        self.assertRaises(ValueError, GoalDispatcher, 'unknown')
+        self.assertRaises(ValueError, GoalDispatcher, GoalDispatcher.POOL, 0, 1)
+
+    def test_inline(self):
+        dispatcher = GoalDispatcher(GoalDispatcher.INLINE)
+        gh = FakeGoalHandle()
+        dispatcher.reader(self._succeed)(gh)
+        self.assertEqual(gh.state, 'succeeded')
+
+    def test_pool_runs_goals(self):
+        dispatcher = GoalDispatcher(read_workers=2, write_workers=1)
+        handles = [FakeGoalHandle() for i in range(4)]
+        for i, gh in enumerate(handles):
+            (dispatcher.writer if i % 2 else dispatcher.reader)(self._succeed)(gh)
+        for gh in handles:
+            self.assertTrue(gh.done.wait(5))
+            self.assertEqual(gh.state, 'succeeded')
+
+    def test_full_queue_rejects(self):
+        dispatcher = GoalDispatcher(read_workers=1, write_workers=1, max_queue_depth=1)
+        running = FakeGoalHandle()
+        dispatcher.writer(self._blocking)(running)
+        self.assertTrue(self.started.wait(5))
+        queued = FakeGoalHandle()
+        dispatcher.writer(self._succeed)(queued)
+        self.assertEqual(queued.state, 'active')
+        self.assertEqual(dispatcher.queue_depths(), {'read' : 0, 'write' : 1})
+        rejected = FakeGoalHandle()
+        dispatcher.writer(self._succeed)(rejected)
+        self.assertEqual(rejected.state, 'rejected')
+        # reads have a queue of their own
+        read = FakeGoalHandle()
+        dispatcher.reader(self._succeed)(read)
+        self.assertTrue(read.done.wait(5))
+        self.release.set()
+        self.assertTrue(queued.done.wait(5))
+        self.assertEqual(queued.state, 'succeeded')
+
+    def test_failed_goal_is_aborted(self):
+        dispatcher = GoalDispatcher(read_workers=1, write_workers=1)
+        def fail(gh):
+            raise ValueError('bad goal')
+        gh = FakeGoalHandle()
+        dispatcher.reader(fail)(gh)
+        self.assertTrue(gh.done.wait(5))
+        self.assertEqual(gh.state, 'aborted')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+# Software License Agreement (BSD License)
+#
+# Copyright (c) 2013, Willow Garage, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above
+# copyright notice, this list of conditions and the following
+# disclaimer in the documentation and/or other materials provided
+# with the distribution.
+# * Neither the name of Willow Garage, Inc. nor the names of its
+# contributors may be used to endorse or promote products derived
+# from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Tests of the InstanceCache class.
+
+@author:  Jihoon Lee
+@version: October 16, 2026
+'''
+
+import unittest
+from worldlib.instance_cache import InstanceCache
+
+class TestInstanceCache(unittest.TestCase):
+    '''
+    Tests of InstanceCache.
+    '''
+
+    def setUp(self):
+        self.cache = InstanceCache(max_size=3, max_searches=2)
+
+    def test_get_and_put(self):
+        self.assertIsNone(self.cache.get(1))
+        self.cache.put(1, ['a'], 'one')
+        self.assertEqual(self.cache.get(1), 'one')
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['size']), (1, 1, 1))
+
+    def test_least_recently_used_is_evicted(self):
+        for i in range(3):
+            self.cache.put(i, ['a'], i)
+        self.cache.get(0)
+        self.cache.put(3, ['a'], 3)
+        self.assertIsNone(self.cache.peek(1))
+        self.assertEqual(self.cache.peek(0), 0)
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+
+    def test_full_cache_evicts_in_order(self):
+        cache = InstanceCache(max_size=100)
+        for i in range(1000):
+            cache.put(i, ['t' + str(i % 3)], i)
+        self.assertEqual(cache.stats()['size'], 100)
+        self.assertEqual(cache.stats()['evictions'], 900)
+        self.assertIsNone(cache.peek(899))
+        self.assertEqual([cache.peek(i) for i in range(900, 1000)], range(900, 1000))
+
+    def test_stale_put_evicts(self):
+        self.cache.put(1, ['a'], 'old')
+        version = self.cache.version()
+        self.cache.evict(1, ['a'])
+        self.assertEqual(self.cache.put(1, ['a'], 'stale', version), -1)
+        self.assertIsNone(self.cache.peek(1))
+        version = self.cache.version()
+        self.assertEqual(self.cache.put(1, ['a'], 'new', version), version + 1)
+        self.assertEqual(self.cache.peek(1), 'new')
+
+    def test_search(self):
+        self.assertIsNone(self.cache.get_search(['a']))
+        version = self.cache.version()
+        self.cache.put_search(['a'], [(2, ['a', 'b'], 'two'), (1, ['a'], 'one')], version)
+        self.assertEqual(self.cache.get_search(['a']), ['one', 'two'])
+        # narrower searches are not known to be complete
+        self.assertIsNone(self.cache.get_search(['a', 'b']))
+
+    def test_stale_search_is_dropped(self):
+        version = self.cache.version()
+        self.cache.remove(5)
+        self.cache.put_search(['a'], [(1, ['a'], 'one')], version)
+        self.assertIsNone(self.cache.get_search(['a']))
+
+    def test_search_larger_than_cache_is_dropped(self):
+        instances = [(i, ['a'], i) for i in range(4)]
+        self.cache.put_search(['a'], instances, self.cache.version())
+        self.assertIsNone(self.cache.get_search(['a']))
+
+    def test_evict_drops_old_and_new_searches(self):
+        self.cache.put_search(['a'], [(1, ['a'], 'one')], self.cache.version())
+        self.cache.put_search(['b'], [(2, ['b'], 'two')], self.cache.version())
+        # instance 1 moves from tag a to tag b
+        self.cache.evict(1, ['b'])
+        self.assertIsNone(self.cache.peek(1))
+        self.assertIsNone(self.cache.get_search(['a']))
+        self.assertIsNone(self.cache.get_search(['b']))
+
+    def test_remove_keeps_searches_complete(self):
+        self.cache.put_search(['a'], [(1, ['a'], 'one'), (2, ['a'], 'two')], 
+                              self.cache.version())
+        self.cache.remove(1)
+        self.assertEqual(self.cache.get_search(['a']), ['two'])
+
+    def test_lru_eviction_drops_searches(self):
+        self.cache.put_search(['a'], [(1, ['a'], 'one')], self.cache.version())
+        for i in range(2, 5):
+            self.cache.put(i, ['b'], i)
+        self.assertIsNone(self.cache.get_search(['a']))
+
+    def test_clear(self):
+        self.cache.put_search(['a'], [(1, ['a'], 'one')], self.cache.version())
+        self.cache.clear()
+        self.assertIsNone(self.cache.get(1))
+        self.assertIsNone(self.cache.get_search(['a']))
+        self.assertEqual(self.cache.stats()['size'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,199 @@
+# Software License Agreement (BSD License)
+#
+# Copyright (c) 2013, Willow Garage, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above
+# copyright notice, this list of conditions and the following
+# disclaimer in the documentation and/or other materials provided
+# with the distribution.
+# * Neither the name of Willow Garage, Inc. nor the names of its
+# contributors may be used to endorse or promote products derived
+# from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Tests of how the MapTileConnection class splits grids into tiles and assembles regions from them,
+without a database.
+
+@author:  Jihoon Lee
+@version: October 16, 2026
+'''
+
+import unittest
+from contextlib import contextmanager
+from worldlib.map_tile_connection import MapTileConnection
+
+class SplitOnlyConnection(MapTileConnection):
+    '''
+    A MapTileConnection which keeps the tiles of a grid instead of storing them.
+    '''
+
+    def insert_tiles(self, descriptor_id, tiles, conn=None):
+        self.tiles = tiles
+        self.conn = conn
+        return len(tiles)
+
+class FailingTileConnection(MapTileConnection):
+    '''
+    A MapTileConnection which fails to store any tiles.
+    '''
+
+    def insert_tiles(self, descriptor_id, tiles, conn=None):
+        raise IOError('tiles could not be stored')
+
+class FakeConnection(object):
+    '''
+    A stand-in for a psycopg2 connection which records the end of its transaction.
+    '''
+
+    def __init__(self):
+        self.commits = 0
+        self.rollbacks = 0
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+class FakePool(object):
+    '''
+    A stand-in for a ConnectionPool which rolls back the transaction of a failed block.
+    '''
+
+    def __init__(self):
+        self.conn = FakeConnection()
+
+    @contextmanager
+    def connection(self, write=True):
+        try:
+            yield self.conn
+        except:
+            self.conn.rollback()
+            raise
+
+class FakeDescriptorConnection(object):
+    '''
+    A stand-in for a DescriptorConnection which records the connection it inserts with.
+    '''
+
+    def insert_many(self, entities, conn=None):
+        self.conn = conn
+        return range(10, 10 + len(entities))
+
+class TestMapTileConnection(unittest.TestCase):
+    '''
+    Tests of MapTileConnection.
+    '''
+
+    def setUp(self):
+        self.mtc = SplitOnlyConnection(None, None, pool=object(), tile_size=4)
+        # a 10x7 grid, so the tiles of the last column and row are partial
+        self.width = 10
+        self.height = 7
+        self.grid = ''.join([chr(i % 100) for i in range(self.width * self.height)])
+        self.mtc.insert_grid(1, self.width, self.height, self.grid)
+
+    def _region(self, x, y, width, height):
+        '''
+        Cut a region out of the grid directly, with cells outside of the grid set to -1.
+        '''
+        cells = []
+        for row in range(y, y + height):
+            for col in range(x, x + width):
+                inside = 0 <= col < self.width and 0 <= row < self.height
+                cells.append(self.grid[row * self.width + col] if inside else '\xff')
+        return ''.join(cells)
+
+    def test_invalid_arguments(self):
+        self.assertRaises(ValueError, MapTileConnection, None, None, pool=object(), tile_size=0)
+        self.assertRaises(ValueError, self.mtc.insert_grid, 1, 3, 4, 'too short')
+
+    def test_split(self):
+        self.assertEqual(len(self.mtc.tiles), 3 * 2)
+        sizes = [(t[2], t[3]) for t in self.mtc.tiles]
+        self.assertEqual(sizes, [(4, 4), (4, 4), (2, 4), (4, 3), (4, 3), (2, 3)])
+        for x, y, w, h, data in self.mtc.tiles:
+            self.assertEqual(len(data), w * h)
+
+    def test_whole_grid(self):
+        assembled = self.mtc.assemble(self.mtc.tiles, 0, 0, self.width, self.height)
+        self.assertEqual(assembled, self.grid)
+
+    def test_regions(self):
+        # inside one tile, across tile borders, the partial edge tiles, and a single cell
+        for region in [(1, 1, 2, 2), (3, 2, 5, 4), (8, 4, 2, 3), (9, 6, 1, 1)]:
+            self.assertEqual(self.mtc.assemble(self.mtc.tiles, *region), self._region(*region),
+                             region)
+
+    def test_region_past_the_grid_is_unknown(self):
+        for region in [(8, 5, 4, 4), (-2, -2, 4, 4), (20, 20, 3, 3)]:
+            self.assertEqual(self.mtc.assemble(self.mtc.tiles, *region), self._region(*region),
+                             region)
+
+    def test_tiles_beside_the_region_are_ignored(self):
+        # the tiles share rows with the region but none of its columns
+        self.assertEqual(self.mtc.assemble(self.mtc.tiles, 4, 0, 0, 7), '')
+        tiles = [t for t in self.mtc.tiles if t[0] == 0]
+        self.assertEqual(self.mtc.assemble(tiles, 5, 0, 3, 2), '\xff' * 6)
+
+    def test_no_tiles(self):
+        self.assertEqual(self.mtc.assemble([], 0, 0, 3, 2), '\xff' * 6)
+
+    def test_empty_region(self):
+        self.assertEqual(self.mtc.assemble(self.mtc.tiles, 0, 0, 0, 0), '')
+
+    def test_identical_tiles_share_a_digest(self):
+        self.mtc.insert_grid(2, 8, 4, '\x00' * 32)
+        digests = set([self.mtc._digest(t[2], t[3], t[4]) for t in self.mtc.tiles])
+        self.assertEqual(len(digests), 1)
+        # the same bytes in a different shape are a different tile
+        self.assertNotEqual(self.mtc._digest(4, 4, '\x00' * 16), 
+                            self.mtc._digest(2, 8, '\x00' * 16))
+
+class TestInsertDescriptors(unittest.TestCase):
+    '''
+    Tests of storing descriptors together with the tiles of their grids.
+    '''
+
+    def setUp(self):
+        self.pool = FakePool()
+        self.dc = FakeDescriptorConnection()
+        self.grids = [(1, 2, 2, '\x00' * 4)]
+
+    def test_one_transaction(self):
+        mtc = SplitOnlyConnection(None, None, pool=self.pool, tile_size=4)
+        self.assertEqual(mtc.insert_descriptors(self.dc, [{}, {}], self.grids), [10, 11])
+        # the tiles are stored for the grid's descriptor, on the descriptors' connection
+        self.assertIs(self.dc.conn, self.pool.conn)
+        self.assertIs(mtc.conn, self.pool.conn)
+        self.assertEqual(self.pool.conn.commits, 1)
+
+    def test_tile_failure_rolls_back_the_descriptors(self):
+        mtc = FailingTileConnection(None, None, pool=self.pool, tile_size=4)
+        self.assertRaises(IOError, mtc.insert_descriptors, self.dc, [{}, {}], self.grids)
+        self.assertIs(self.dc.conn, self.pool.conn)
+        self.assertEqual(self.pool.conn.commits, 0)
+        self.assertEqual(self.pool.conn.rollbacks, 1)
+
+if __name__ == '__main__':
+    unittest.main()
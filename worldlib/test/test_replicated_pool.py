@@ -0,0 +1,231 @@
+# Software License Agreement (BSD License)
+#
+# Copyright (c) 2013, Willow Garage, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above
+# copyright notice, this list of conditions and the following
+# disclaimer in the documentation and/or other materials provided
+# with the distribution.
+# * Neither the name of Willow Garage, Inc. nor the names of its
+# contributors may be used to endorse or promote products derived
+# from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Tests of the ReplicatedPool class, with fake pools in place of the databases.
+
+@author:  Jihoon Lee
+@version: October 16, 2026
+'''
+
+import psycopg2
+import time
+import unittest
+from contextlib import contextmanager
+from worldlib.connection_pool import PoolTimeoutError
+from worldlib.replicated_pool import ReplicatedPool
+
+class FakeCursor(object):
+    '''
+    A stand-in for a psycopg2 cursor which answers log position queries.
+    '''
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql):
+        self.conn.queries.append((sql, self.conn.autocommit))
+
+    def fetchone(self):
+        return (self.conn.pool.lsn,)
+
+    def close(self):
+        pass
+
+class FakeConnection(object):
+    '''
+    A stand-in for a psycopg2 connection which records the queries run with it.
+    '''
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.queries = []
+        self.autocommit = False
+        self.closed = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        pass
+
+class FakePool(object):
+    '''
+    A stand-in for a ConnectionPool whose server is at the given log position, or which raises
+    the given error when a connection is checked out.
+    '''
+
+    statements = None
+    metrics = None
+
+    def __init__(self, lsn='0/0', error=None):
+        self.lsn = lsn
+        self.error = error
+        # every connection checked out, and if each was discarded when returned
+        self.opened = []
+        self.discarded = []
+
+    def getconn(self):
+        if self.error is not None:
+            raise self.error
+        conn = FakeConnection(self)
+        self.opened.append(conn)
+        return conn
+
+    def putconn(self, conn, discard=False):
+        self.discarded.append(discard)
+
+    @contextmanager
+    def hold(self, conn):
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            self.putconn(conn, True)
+            raise
+        else:
+            self.putconn(conn)
+
+    @contextmanager
+    def connection(self, write=True):
+        conn = self.getconn()
+        with self.hold(conn):
+            yield conn
+
+class TestReplicatedPool(unittest.TestCase):
+    '''
+    Tests of the ReplicatedPool class.
+    '''
+
+    def read(self, pool):
+        with pool.connection(False) as conn:
+            return conn.pool
+
+    def test_write_uses_primary(self):
+        primary = FakePool('0/10')
+        pool = ReplicatedPool(primary, [FakePool()])
+        with pool.connection() as conn:
+            self.assertIs(conn.pool, primary)
+        # the log position is looked up outside of a transaction, which is restored
+        self.assertEqual(conn.queries, [('SELECT pg_current_wal_lsn()::text', True)])
+        self.assertFalse(conn.autocommit)
+        self.assertEqual(pool._written, 16)
+
+    def test_read_uses_current_replica(self):
+        primary = FakePool('0/10')
+        replica = FakePool('0/20')
+        pool = ReplicatedPool(primary, [replica])
+        self.assertIs(self.read(pool), replica)
+        with pool.connection():
+            pass
+        self.assertIs(self.read(pool), replica)
+        # the replica is not queried again until a later write
+        self.assertIs(self.read(pool), replica)
+        self.assertEqual(sum([len(c.queries) for c in replica.opened]), 1)
+
+    def test_lagging_replica_falls_back_to_primary(self):
+        primary = FakePool('1/0')
+        replica = FakePool('0/FFFFFFFF')
+        pool = ReplicatedPool(primary, [replica])
+        with pool.connection():
+            pass
+        self.assertIs(self.read(pool), primary)
+        # the replica is still used once it caught up
+        replica.lsn = '1/0'
+        self.assertIs(self.read(pool), replica)
+
+    def test_lagging_replica_is_skipped(self):
+        primary = FakePool('1/0')
+        behind = FakePool('0/FFFFFFFF')
+        current = FakePool('1/0')
+        pool = ReplicatedPool(primary, [behind, current])
+        with pool.connection():
+            pass
+        # whichever replica is tried first, the read goes to the one which is up to date
+        self.assertIs(self.read(pool), current)
+        self.assertIs(self.read(pool), current)
+        self.assertEqual(pool._down, [0.0, 0.0])
+
+    def test_without_read_your_writes(self):
+        replica = FakePool('0/0')
+        pool = ReplicatedPool(FakePool('1/0'), [replica], read_your_writes=False)
+        with pool.connection() as conn:
+            pass
+        self.assertEqual(conn.queries, [])
+        self.assertIs(self.read(pool), replica)
+
+    def test_busy_and_down_replicas(self):
+        primary = FakePool()
+        busy = FakePool(error=PoolTimeoutError('busy'))
+        down = FakePool(error=psycopg2.OperationalError('refused'))
+        pool = ReplicatedPool(primary, [busy, down])
+        self.assertIs(self.read(pool), primary)
+        # only the replica which could not be reached is skipped
+        self.assertEqual(pool._down[0], 0.0)
+        self.assertTrue(pool._down[1] > time.time())
+        self.assertEqual(pool._candidates(), [0])
+
+    def test_lost_and_cancelled_reads(self):
+        replica = FakePool()
+        pool = ReplicatedPool(FakePool(), [replica])
+        def fail(error, closed):
+            with pool.connection(False) as conn:
+                conn.closed = closed
+                raise error
+        # a cancelled query does not mean the replica is down
+        self.assertRaises(psycopg2.extensions.QueryCanceledError, fail, 
+                          psycopg2.extensions.QueryCanceledError('cancelled'), 0)
+        self.assertEqual(pool._down, [0.0])
+        self.assertRaises(psycopg2.OperationalError, fail, 
+                          psycopg2.OperationalError('server closed the connection'), 2)
+        self.assertTrue(pool._down[0] > time.time())
+        self.assertEqual(replica.discarded, [True, True])
+
+    def test_no_replica_up(self):
+        primary = FakePool('0/10')
+        replica = FakePool('0/10')
+        pool = ReplicatedPool(primary, [replica])
+        pool._down = [time.time() + 60]
+        # writes do not look up their position while no replica can be used
+        with pool.connection() as conn:
+            pass
+        self.assertEqual(conn.queries, [])
+        self.assertEqual(pool._written, 0)
+        # the next read which could use a replica looks it up first
+        pool._down = [0.0]
+        primary.lsn = '0/20'
+        self.assertIs(self.read(pool), primary)
+        self.assertEqual(pool._written, 32)
+        replica.lsn = '0/20'
+        self.assertIs(self.read(pool), replica)
+
+if __name__ == '__main__':
+    unittest.main()
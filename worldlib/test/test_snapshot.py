@@ -0,0 +1,201 @@
+# Software License Agreement (BSD License)
+#
+# Copyright (c) 2013, Willow Garage, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above
+# copyright notice, this list of conditions and the following
+# disclaimer in the documentation and/or other materials provided
+# with the distribution.
+# * Neither the name of Willow Garage, Inc. nor the names of its
+# contributors may be used to endorse or promote products derived
+# from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Tests of snapshot export and import between SQLite World Models.
+
+@author:  Jihoon Lee
+@version: October 16, 2026
+'''
+
+import os
+import shutil
+import struct
+import tempfile
+import time
+import unittest
+import zlib
+from StringIO import StringIO
+from worldlib import snapshot
+from worldlib.map_tile_connection import MapTileConnection
+from worldlib.storage import SqliteStorage
+
+def serialize_grid(width, height, cells):
+    '''
+    Serialize an OccupancyGrid message as ROS does, with the given cells.
+    '''
+    header = struct.pack('<IIII', 1, 2, 3, 4) + '/map'
+    info = struct.pack('<IIfII', 5, 6, 0.05, width, height)
+    origin = struct.pack('<7d', 1, 2, 0, 0, 0, 0, 1)
+    return header + info + origin + struct.pack('<I', len(cells)) + cells
+
+class FakeMaps(object):
+    '''
+    A stand-in for a MapTileConnection which holds the tiles of one descriptor.
+    '''
+
+    def __init__(self, descriptor_id, tiles):
+        self.tiles = {descriptor_id : tiles}
+
+    def search_tiles(self, descriptor_ids):
+        return dict([(d, self.tiles[d]) for d in descriptor_ids if d in self.tiles])
+
+class TestSnapshot(unittest.TestCase):
+    '''
+    Tests of export_snapshot and import_snapshot.
+    '''
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.source = SqliteStorage(os.path.join(self.dir, 'source.db'))
+        self.target = SqliteStorage(':memory:')
+        self.now = time.time()
+        cup = self.source.descriptions.insert({'name' : 'cup', 'tags' : ['kitchen']})
+        self.source.descriptions.insert({'name' : 'unused'})
+        self.source.descriptors.insert_many([{'description_id' : cup, 'type' : 'mesh', 
+                                              'data' : 'x' * 5000, 'ref' : 'r', 'tags' : ['a']},
+                                             {'description_id' : cup, 'type' : 'none'}])
+        base = {'creation' : self.now, 'pose_frame_id' : '/map', 'expected_ttl' : 0}
+        self.source.instances.insert_many([
+            dict(base, name='a', tags=['obj', 'red'], description_id=cup, 
+                 pose_position=[1.0, 2.0, 0.0]),
+            dict(base, name='b', tags=['obj']),
+            dict(base, name='old', tags=['x'], creation=self.now - 1000)])
+
+    def tearDown(self):
+        self.source.close()
+        self.target.close()
+        shutil.rmtree(self.dir)
+
+    def _export(self, **kwargs):
+        f = StringIO()
+        counts = snapshot.export_snapshot(self.source, f, chunk_size=2, **kwargs)
+        f.seek(0)
+        return counts, f
+
+    def _instances(self, storage):
+        return [e for c in storage.instances.stream() for e in c]
+
+    def test_round_trip(self):
+        counts, f = self._export()
+        self.assertEqual(counts, {'descriptions' : 2, 'descriptors' : 2, 'tiles' : 0, 
+                                  'instances' : 3})
+        loaded = snapshot.import_snapshot(self.target, f)
+        self.assertEqual(loaded, dict(counts, merged_tiles=0))
+        instances = self._instances(self.target)
+        self.assertEqual([e['name'] for e in instances], ['a', 'b', 'old'])
+        a = instances[0]
+        self.assertEqual(a['tags'], ['obj', 'red'])
+        self.assertEqual(a['pose_position'], [1.0, 2.0, 0.0])
+        self.assertAlmostEqual(a['creation'], self.now, places=3)
+        # references are remapped to the new descriptions
+        description = self.target.descriptions.search_description_id(a['description_id'])
+        self.assertEqual(description['name'], 'cup')
+        descriptors = self.target.descriptors.search_by_description_id(a['description_id'])
+        self.assertEqual([(d['type'], d['data']) for d in descriptors], 
+                         [('mesh', 'x' * 5000), ('none', None)])
+        self.assertIsNone(instances[1]['description_id'])
+
+    def test_filters(self):
+        counts, f = self._export(tags=['obj'])
+        self.assertEqual(counts['instances'], 2)
+        # only the descriptions the instances refer to are exported
+        self.assertEqual(counts['descriptions'], 1)
+        snapshot.import_snapshot(self.target, f)
+        self.assertEqual([e['name'] for e in self._instances(self.target)], ['a', 'b'])
+        counts, f = self._export(end=self.now - 10)
+        self.assertEqual(counts['instances'], 1)
+        counts, f = self._export(start=self.now - 10, tags=['red'])
+        self.assertEqual(counts['instances'], 1)
+
+    def test_truncated(self):
+        counts, f = self._export()
+        data = f.getvalue()
+        for end in [len(data) - 3, len(data) / 2]:
+            self.assertRaises(ValueError, snapshot.import_snapshot, self.target, 
+                              StringIO(data[:end]))
+
+    def test_not_a_snapshot(self):
+        self.assertRaises(ValueError, snapshot.import_snapshot, self.target, StringIO('garbage'))
+
+    def test_tiled_grid_without_maps(self):
+        # a 3x2 grid stored as a 2x2 and a 1x2 tile
+        cells = 'abcdef'
+        description_id = self.source.descriptions.insert({'name' : 'map'})
+        descriptor_id = self.source.descriptors.insert({
+            'description_id' : description_id, 'type' : 'nav_msgs/OccupancyGrid', 
+            'encoding' : MapTileConnection.ENCODING, 'data' : serialize_grid(3, 2, '')})
+        maps = FakeMaps(descriptor_id, [(0, 0, 2, 2, 'abde'), (2, 0, 1, 2, 'cf')])
+        counts, f = self._export(maps=maps)
+        self.assertEqual(counts['tiles'], 2)
+        loaded = snapshot.import_snapshot(self.target, f)
+        self.assertEqual((loaded['tiles'], loaded['merged_tiles']), (0, 2))
+        self.assertEqual(loaded['descriptors'], counts['descriptors'])
+        # the grid is loaded whole since the target has no tiled maps
+        names = dict([(e['name'], e['description_id']) 
+                      for c in self.target.descriptions.stream() for e in c])
+        descriptors = self.target.descriptors.search_by_description_id(names['map'])
+        self.assertEqual([(d['encoding'], d['data']) for d in descriptors], 
+                         [('ros', serialize_grid(3, 2, cells))])
+
+    def test_unsupported_format(self):
+        counts, f = self._export()
+        data = f.getvalue()
+        old = data[:len(snapshot.MAGIC)] + chr(1) + data[len(snapshot.MAGIC) + 1:]
+        self.assertRaises(ValueError, snapshot.import_snapshot, self.target, StringIO(old))
+
+    def test_records(self):
+        # binary data and text which is not ASCII survive a round trip
+        descriptors = [{'descriptor_id' : 1, 'type' : 'mesh', 'data' : '\x00\xff' * 3, 
+                        'tags' : ['caf\xc3\xa9']},
+                       {'descriptor_id' : 2, 'type' : 'none', 'data' : None, 'tags' : None}]
+        tiles = [(1, [(0, 0, 2, 1, '\x00\x01'), (2, 0, 1, 1, '\xff')]), (3, [(0, 0, 1, 1, 'x')])]
+        instances = [{'name' : 'caf\xc3\xa9', 'pose_position' : [0.1, -2.5e-8, 3.0]}]
+        for kind, payload in [(snapshot.DESCRIPTORS, descriptors), (snapshot.TILES, tiles), 
+                              (snapshot.INSTANCES, instances)]:
+            f = StringIO()
+            snapshot._write(f, kind, payload)
+            f.seek(0)
+            self.assertEqual(snapshot._read(f), (kind, payload))
+        self.assertEqual(type(snapshot._strings(u'caf\xe9')), str)
+
+    def test_corrupt_record(self):
+        f = StringIO()
+        snapshot._write(f, snapshot.TILES, [(1, [(0, 0, 2, 1, 'ab')])])
+        data = f.getvalue()
+        # a record whose tiles claim more data than it holds
+        body = zlib.compress(zlib.decompress(data[5:])[:-1])
+        f = StringIO(snapshot.TILES + struct.pack('>I', len(body)) + body)
+        self.assertRaises(ValueError, snapshot._read, f)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,277 @@
+# Software License Agreement (BSD License)
+#
+# Copyright (c) 2013, Willow Garage, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above
+# copyright notice, this list of conditions and the following
+# disclaimer in the documentation and/or other materials provided
+# with the distribution.
+# * Neither the name of Willow Garage, Inc. nor the names of its
+# contributors may be used to endorse or promote products derived
+# from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Tests of the SQLite versions of the world object instance, world object description and descriptor
+connections, run against private in-memory databases.
+
+@author:  Jihoon Lee
+@version: October 16, 2026
+'''
+
+import threading
+import time
+import unittest
+from worldlib.storage import SqliteStorage, Storage
+
+class TestSqliteInstances(unittest.TestCase):
+    '''
+    Tests of SqliteWorldObjectInstanceConnection.
+    '''
+
+    def setUp(self):
+        self.storage = SqliteStorage(':memory:')
+        self.woic = self.storage.instances
+        self.now = time.time()
+
+    def tearDown(self):
+        self.storage.close()
+
+    def _instance(self, name, tags, position=None, **kwargs):
+        entity = {'name' : name, 'creation' : self.now, 'tags' : tags, 'expected_ttl' : 0, 
+                  'pose_frame_id' : '/map'}
+        if position is not None:
+            entity['pose_position'] = position
+        entity.update(kwargs)
+        return entity
+
+    def test_insert_and_search_instance_id(self):
+        instance_id = self.woic.insert(self._instance('cup', ['kitchen', 'red'], [1.0, 2.0, 0.0]))
+        entity = self.woic.search_instance_id(instance_id)
+        self.assertEqual(entity['name'], 'cup')
+        self.assertEqual(entity['tags'], ['kitchen', 'red'])
+        self.assertEqual(entity['pose_position'], [1.0, 2.0, 0.0])
+        self.assertAlmostEqual(entity['creation'], self.now, places=3)
+        self.assertIsNone(self.woic.search_instance_id(instance_id + 1))
+
+    def test_insert_many_keeps_order(self):
+        ids = self.woic.insert_many([self._instance(n, ['batch']) for n in ['a', 'b', 'c']])
+        self.assertEqual(len(ids), 3)
+        names = [e['name'] for e in self.woic.search_instance_ids(ids)]
+        self.assertEqual(sorted(names), ['a', 'b', 'c'])
+        self.assertEqual([self.woic.search_instance_id(i)['name'] for i in ids], ['a', 'b', 'c'])
+
+    def test_search_tags_requires_all_tags(self):
+        a = self.woic.insert(self._instance('a', ['obj', 'red']))
+        b = self.woic.insert(self._instance('b', ['obj', 'blue']))
+        self.assertEqual([e['instance_id'] for e in self.woic.search_tags(['obj'])], [a, b])
+        self.assertEqual([e['instance_id'] for e in self.woic.search_tags(['obj', 'red'])], [a])
+        self.assertEqual(self.woic.search_tags(['green']), [])
+
+    def test_search_tags_pages(self):
+        ids = self.woic.insert_many([self._instance(str(i), ['page']) for i in range(5)])
+        first = self.woic.search_tags(['page'], 0, 2)
+        self.assertEqual([e['instance_id'] for e in first], ids[:2])
+        rest = self.woic.search_tags(['page'], first[-1]['instance_id'])
+        self.assertEqual([e['instance_id'] for e in rest], ids[2:])
+
+    def test_stream_tags_chunks(self):
+        ids = self.woic.insert_many([self._instance(str(i), ['stream']) for i in range(5)])
+        chunks = list(self.woic.stream_tags(['stream'], 2))
+        self.assertEqual([len(c) for c in chunks], [2, 2, 1])
+        self.assertEqual([e['instance_id'] for c in chunks for e in c], ids)
+
+    def test_stream_filters_tags_and_time(self):
+        old = self.woic.insert(self._instance('old', ['x'], creation=self.now - 100))
+        new = self.woic.insert(self._instance('new', ['x', 'y']))
+        everything = [e['instance_id'] for c in self.woic.stream() for e in c]
+        self.assertEqual(everything, [old, new])
+        tagged = [e['instance_id'] for c in self.woic.stream(tags=['y']) for e in c]
+        self.assertEqual(tagged, [new])
+        recent = [e['instance_id'] for c in self.woic.stream(start=self.now - 10) for e in c]
+        self.assertEqual(recent, [new])
+        early = [e['instance_id'] for c in self.woic.stream(end=self.now - 10) for e in c]
+        self.assertEqual(early, [old])
+
+    def test_update_entity_by_instance_id(self):
+        instance_id = self.woic.insert(self._instance('a', ['obj']))
+        self.assertTrue(self.woic.update_entity_by_instance_id(instance_id, 
+                                                               {'name' : 'b', 'tags' : ['new']}))
+        self.assertEqual(self.woic.search_instance_id(instance_id)['name'], 'b')
+        self.assertEqual(self.woic.search_tags(['obj']), [])
+        self.assertEqual(len(self.woic.search_tags(['new'])), 1)
+        self.assertFalse(self.woic.update_entity_by_instance_id(instance_id + 1, {'name' : 'c'}))
+
+    def test_update_many(self):
+        a = self.woic.insert(self._instance('a', ['obj']))
+        results = self.woic.update_many([(a, {'name' : 'b'}), (a + 1, {'name' : 'c'})])
+        self.assertEqual(results, [True, False])
+        self.assertEqual(self.woic.search_instance_id(a)['name'], 'b')
+
+    def test_upsert_by_tags(self):
+        instance_id, created = self.woic.upsert_by_tags(['robot'], self._instance('r', ['robot']))
+        self.assertTrue(created)
+        same, created = self.woic.upsert_by_tags(['robot'], self._instance('x', ['robot']), 
+                                                 {'name' : 'updated'})
+        self.assertEqual(same, instance_id)
+        self.assertFalse(created)
+        self.assertEqual(self.woic.search_instance_id(instance_id)['name'], 'updated')
+
+    def test_concurrent_upserts_create_one_instance(self):
+        storage = SqliteStorage(':memory:')
+        def upsert():
+            for i in range(10):
+                storage.instances.upsert_by_tags(['race'], self._instance('r', ['race']))
+        threads = [threading.Thread(target=upsert) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(storage.instances.search_tags(['race'])), 1)
+        storage.close()
+
+    def test_delete(self):
+        a = self.woic.insert(self._instance('a', ['obj']))
+        b = self.woic.insert(self._instance('b', ['obj']))
+        self.assertTrue(self.woic.delete(a))
+        self.assertIsNone(self.woic.search_instance_id(a))
+        self.assertEqual(self.woic.delete_many([b, b + 1]), [True, False])
+        self.assertEqual(self.woic.search_tags(['obj']), [])
+
+    def test_spatial_searches(self):
+        a = self.woic.insert(self._instance('a', ['obj', 'red'], [1.0, 1.0, 0.0]))
+        b = self.woic.insert(self._instance('b', ['obj'], [5.0, 5.0, 0.0]))
+        c = self.woic.insert(self._instance('c', ['obj'], [2.0, 0.0, 0.0]))
+        box = sorted([e['instance_id'] for e in self.woic.search_box(0, 0, 3, 3)])
+        self.assertEqual(box, [a, c])
+        radius = sorted([e['instance_id'] for e in self.woic.search_radius(0, 0, 2.0)])
+        self.assertEqual(radius, [a, c])
+        nearest = [e['instance_id'] for e in self.woic.search_nearest(4, 4, 2)]
+        self.assertEqual(nearest, [b, a])
+        tagged = [e['instance_id'] for e in self.woic.search_nearest(4, 4, 2, '/map', ['red'])]
+        self.assertEqual(tagged, [a])
+        self.assertEqual(self.woic.search_box(0, 0, 3, 3, '/other'), [])
+
+    def test_expire_and_archive(self):
+        keep = self.woic.insert(self._instance('keep', ['obj']))
+        gone = self.woic.insert(self._instance('gone', ['obj'], expected_ttl=1, 
+                                               update=self.now - 10))
+        self.assertEqual(self.woic.expire(), [gone])
+        self.assertIsNotNone(self.woic.search_instance_id(gone)['perceived_end'])
+        self.assertEqual(self.woic.archive(), [gone])
+        self.assertIsNone(self.woic.search_instance_id(gone))
+        self.assertIsNotNone(self.woic.search_instance_id(keep))
+
+class TestSqliteDescriptions(unittest.TestCase):
+    '''
+    Tests of SqliteWorldObjectDescriptionConnection.
+    '''
+
+    def setUp(self):
+        self.storage = SqliteStorage(':memory:')
+        self.wodc = self.storage.descriptions
+
+    def tearDown(self):
+        self.storage.close()
+
+    def test_insert_and_search(self):
+        description_id = self.wodc.insert({'name' : 'cup', 'tags' : ['kitchen', 'mug']})
+        entity = self.wodc.search_description_id(description_id)
+        self.assertEqual(entity['name'], 'cup')
+        self.assertEqual(entity['tags'], ['kitchen', 'mug'])
+        self.assertIsNone(self.wodc.search_description_id(description_id + 1))
+
+    def test_search_tags(self):
+        cup = self.wodc.insert({'name' : 'cup', 'tags' : ['kitchen', 'mug']})
+        plate = self.wodc.insert({'name' : 'plate', 'tags' : ['kitchen']})
+        found = [e['description_id'] for e in self.wodc.search_tags(['kitchen'])]
+        self.assertEqual(found, [cup, plate])
+        found = [e['description_id'] for e in self.wodc.search_tags(['kitchen', 'mug'])]
+        self.assertEqual(found, [cup])
+
+    def test_insert_many_and_stream(self):
+        ids = self.wodc.insert_many([{'name' : str(i), 'tags' : ['t']} for i in range(5)])
+        self.assertEqual(len(ids), 5)
+        chunks = list(self.wodc.stream(2))
+        self.assertEqual([len(c) for c in chunks], [2, 2, 1])
+        self.assertEqual([e['description_id'] for c in chunks for e in c], ids)
+        self.assertEqual(len(self.wodc.search_tags(['t'])), 5)
+
+class TestSqliteDescriptors(unittest.TestCase):
+    '''
+    Tests of SqliteDescriptorConnection.
+    '''
+
+    def setUp(self):
+        self.storage = SqliteStorage(':memory:')
+        self.dc = self.storage.descriptors
+        self.description_id = self.storage.descriptions.insert({'name' : 'cup'})
+
+    def tearDown(self):
+        self.storage.close()
+
+    def test_insert_and_search_descriptor_id(self):
+        data = 'x' * 10000
+        descriptor_id = self.dc.insert({'description_id' : self.description_id, 'type' : 'mesh', 
+                                        'data' : data, 'ref' : 'r', 'tags' : ['a']})
+        entity = self.dc.search_descriptor_id(descriptor_id)
+        self.assertEqual(entity['data'], data)
+        self.assertEqual(entity['tags'], ['a'])
+        self.assertIsNotNone(entity['digest'])
+        self.assertIsNone(self.dc.search_descriptor_id(descriptor_id, False)['data'])
+        self.assertIsNone(self.dc.search_descriptor_id(descriptor_id + 1))
+
+    def test_search_by_description_ids(self):
+        other = self.storage.descriptions.insert({'name' : 'plate'})
+        self.dc.insert_many([{'description_id' : self.description_id, 'type' : 'a', 'data' : '1'},
+                             {'description_id' : self.description_id, 'type' : 'b'},
+                             {'description_id' : other, 'type' : 'c', 'data' : '3'}])
+        found = self.dc.search_by_description_ids([self.description_id, other])
+        self.assertEqual([(d['type'], d['data']) for d in found[self.description_id]], 
+                         [('a', '1'), ('b', None)])
+        self.assertEqual([d['data'] for d in found[other]], ['3'])
+        metadata = self.dc.search_by_description_id(self.description_id, False)
+        self.assertEqual([d['data'] for d in metadata], [None, None])
+
+    def test_search_digest(self):
+        first = self.dc.insert({'description_id' : self.description_id, 'type' : 't', 
+                                'data' : 'same'})
+        second = self.dc.insert({'description_id' : self.description_id, 'type' : 't', 
+                                 'data' : 'same'})
+        digest = self.dc.search_descriptor_id(first)['digest']
+        found = [d['descriptor_id'] for d in self.dc.search_digest(digest)]
+        self.assertEqual(found, [first, second])
+
+class TestSqliteStorage(unittest.TestCase):
+    '''
+    Tests of SqliteStorage.
+    '''
+
+    def test_features(self):
+        storage = SqliteStorage(':memory:')
+        self.assertFalse(storage.supports(Storage.MAPS))
+        self.assertFalse(storage.supports(Storage.HISTORY))
+        self.assertFalse(storage.supports(Storage.CHANGES))
+        storage.close()
+
+if __name__ == '__main__':
+    unittest.main()
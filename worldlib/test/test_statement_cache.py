@@ -0,0 +1,136 @@
+# Software License Agreement (BSD License)
+#
+# Copyright (c) 2013, Willow Garage, Inc.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above
+# copyright notice, this list of conditions and the following
+# disclaimer in the documentation and/or other materials provided
+# with the distribution.
+# * Neither the name of Willow Garage, Inc. nor the names of its
+# contributors may be used to endorse or promote products derived
+# from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Tests of the StatementCache class, with fake cursors in place of a database.
+
+@author:  Jihoon Lee
+@version: October 16, 2026
+'''
+
+import unittest
+from worldlib.statement_cache import StatementCache
+
+class FakeConnection(object):
+    '''
+    A stand-in for a psycopg2 connection.
+    '''
+    pass
+
+class FakeCursor(object):
+    '''
+    A stand-in for a psycopg2 cursor which records the statements it executes.
+    '''
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.executed = []
+
+    def execute(self, sql, values=None):
+        self.executed.append((sql, values))
+
+def insert(table):
+    '''
+    Get a function which builds an insert of two values into the given table.
+    '''
+    return lambda: """INSERT INTO """ + table + """ (a, b) VALUES (%s, %s)"""
+
+class TestStatementCache(unittest.TestCase):
+    '''
+    Tests of the StatementCache class.
+    '''
+
+    def test_numbers_parameters(self):
+        cache = StatementCache()
+        cur = FakeCursor(FakeConnection())
+        cache.execute(cur, ('things', 'insert', 'a', 'b'), insert('things'), (1, 'x'))
+        self.assertEqual(len(cur.executed), 2)
+        prepare, execute = cur.executed
+        self.assertTrue(prepare[0].startswith('PREPARE things_insert_'))
+        self.assertTrue(prepare[0].endswith(' AS INSERT INTO things (a, b) VALUES ($1, $2)'))
+        self.assertEqual(prepare[1], None)
+        name = prepare[0].split()[1]
+        self.assertEqual(execute, ('EXECUTE ' + name + ' (%s, %s)', (1, 'x')))
+
+    def test_no_values(self):
+        cache = StatementCache()
+        cur = FakeCursor(FakeConnection())
+        cache.execute(cur, ('things', 'delete'), lambda: """DELETE FROM things""", ())
+        name = cur.executed[0][0].split()[1]
+        self.assertEqual(cur.executed[0][0], 'PREPARE ' + name + ' AS DELETE FROM things')
+        self.assertEqual(cur.executed[1], ('EXECUTE ' + name, None))
+
+    def test_prepared_once_per_connection(self):
+        cache = StatementCache()
+        key = ('things', 'insert', 'a', 'b')
+        cur = FakeCursor(FakeConnection())
+        cache.execute(cur, key, insert('things'), (1, 2))
+        cache.execute(cur, key, insert('things'), (3, 4))
+        self.assertEqual([s[0].split()[0] for s in cur.executed], ['PREPARE', 'EXECUTE', 'EXECUTE'])
+        # the same statement is prepared again on another connection
+        other = FakeCursor(FakeConnection())
+        cache.execute(other, key, insert('things'), (5, 6))
+        self.assertEqual(other.executed[0][0], cur.executed[0][0])
+        self.assertEqual(cache.stats(), {'compiled' : 1, 'prepared' : [1, 1]})
+
+    def test_deallocates_least_recent(self):
+        cache = StatementCache(max_size=2)
+        cur = FakeCursor(FakeConnection())
+        names = {}
+        for table in ['a', 'b', 'a', 'c']:
+            del cur.executed[:]
+            cache.execute(cur, (table, 'insert'), insert(table), (1, 2))
+            if cur.executed[0][0].startswith('PREPARE'):
+                names[table] = cur.executed[0][0].split()[1]
+        # 'b' was the least recently used on the connection when 'c' was prepared
+        self.assertEqual([s[0] for s in cur.executed[:2]],
+                         ['PREPARE ' + names['c'] + ' AS INSERT INTO c (a, b) VALUES ($1, $2)',
+                          'DEALLOCATE ' + names['b']])
+        # so it is prepared again, under the same name, when it is used next
+        del cur.executed[:]
+        cache.execute(cur, ('b', 'insert'), insert('b'), (1, 2))
+        self.assertTrue(cur.executed[0][0].startswith('PREPARE ' + names['b'] + ' '))
+        self.assertEqual(cur.executed[1][0], 'DEALLOCATE ' + names['a'])
+        self.assertEqual(cache.stats()['prepared'], [2])
+
+    def test_disabled(self):
+        cache = StatementCache(max_size=0)
+        cur = FakeCursor(FakeConnection())
+        cache.execute(cur, ('things', 'insert'), insert('things'), (1, 2))
+        self.assertEqual(cur.executed, [('INSERT INTO things (a, b) VALUES (%s, %s)', (1, 2))])
+        self.assertEqual(cache.stats(), {'compiled' : 0, 'prepared' : []})
+
+    def test_invalid_size(self):
+        self.assertRaises(ValueError, StatementCache, -1)
+
+if __name__ == '__main__':
+    unittest.main()